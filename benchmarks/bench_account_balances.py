@@ -0,0 +1,162 @@
+"""Benchmark: saldo corrente por conta somando a fato vs ledger incremental de saldos.
+
+Monta fct_transactions e dim_accounts sinteticas no DuckDB e compara:
+- consulta pontual e top-N do saldo direto na fato (agregado sobre o historico todo)
+  contra dim_account_balances (uma linha por conta, ordenada por account_id);
+- a carga de um dia novo no ledger (fct_account_balances_daily) pelo watermark contra
+  recalcular o ledger inteiro;
+- o custo do modo `opening_balances` (saidas que respeitam o saldo) no gerador.
+
+Uso:
+    python -m benchmarks.bench_account_balances --rows 20000000 --accounts 100000 --daily-volume 100000
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+
+import duckdb
+import numpy as np
+
+from src.generators.transaction_generator import generate_transaction_batches
+from src.generators.workload import DEFAULT_PROFILE, get_profile
+
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 365
+
+BUILD_ACCOUNTS = """
+    CREATE OR REPLACE TABLE dim_accounts AS
+    SELECT 'acc-' || lpad(i::varchar, 7, '0') as account_id, round(random() * 10000, 2) as initial_balance_snapshot
+    FROM range({accounts}) t(i)
+"""
+BUILD_FACT = """
+    CREATE OR REPLACE TABLE fct_transactions AS
+    SELECT
+        'acc-' || lpad(((random() * {accounts})::int % {accounts})::varchar, 7, '0') as account_id,
+        round(random() * 2000, 2) as amount,
+        'COMPLETED' as status,
+        timestamp '{first_day}' + to_seconds((random() * {days} * 86400)::bigint) as transaction_at,
+        case when random() < 0.4 then 'INFLOW' else 'OUTFLOW' end as movement_type
+    FROM range({rows})
+    ORDER BY transaction_at
+"""
+# Mesma logica dos modelos fct_account_balances_daily e dim_account_balances
+DAILY = """
+    SELECT
+        account_id,
+        cast(transaction_at as date) as balance_date,
+        coalesce(sum(amount) filter (where movement_type = 'INFLOW'), 0) as inflow,
+        coalesce(sum(amount) filter (where movement_type = 'OUTFLOW'), 0) as outflow,
+        count(*) as txn_count
+    FROM fct_transactions
+    WHERE status = 'COMPLETED' AND transaction_at >= timestamp '{watermark}'
+    GROUP BY 1, 2
+"""
+LEDGER_ROWS = """
+    WITH daily AS ({daily}),
+    opening AS (
+        SELECT a.account_id, coalesce(p.closing_balance, a.initial_balance_snapshot) as opening_balance
+        FROM dim_accounts a
+        LEFT JOIN (
+            SELECT account_id, arg_max(closing_balance, balance_date) as closing_balance
+            FROM {ledger} WHERE balance_date < date '{watermark}' GROUP BY 1
+        ) p ON a.account_id = p.account_id
+    )
+    SELECT d.*, coalesce(o.opening_balance, 0)
+        + sum(d.inflow - d.outflow) OVER (PARTITION BY d.account_id ORDER BY d.balance_date) as closing_balance
+    FROM daily d LEFT JOIN opening o ON d.account_id = o.account_id
+    ORDER BY d.balance_date, d.account_id
+"""
+BUILD_CURRENT = """
+    CREATE OR REPLACE TABLE dim_account_balances AS
+    SELECT a.account_id, coalesce(l.current_balance, a.initial_balance_snapshot) as current_balance
+    FROM dim_accounts a
+    LEFT JOIN (
+        SELECT account_id, arg_max(closing_balance, balance_date) as current_balance
+        FROM ledger GROUP BY 1
+    ) l ON a.account_id = l.account_id
+    ORDER BY a.account_id
+"""
+ADHOC_BALANCES = """
+    SELECT a.account_id, a.initial_balance_snapshot
+        + coalesce(sum(case when t.movement_type = 'INFLOW' then t.amount else -t.amount end), 0) as current_balance
+    FROM dim_accounts a
+    LEFT JOIN fct_transactions t ON t.account_id = a.account_id AND t.status = 'COMPLETED'
+"""
+QUERIES = {
+    "point lookup": (
+        ADHOC_BALANCES + " WHERE a.account_id = ? GROUP BY 1, a.initial_balance_snapshot",
+        "SELECT account_id, current_balance FROM dim_account_balances WHERE account_id = ?",
+    ),
+    "top 50": (
+        ADHOC_BALANCES + " GROUP BY 1, a.initial_balance_snapshot ORDER BY 2 DESC LIMIT 50",
+        "SELECT account_id, current_balance FROM dim_account_balances ORDER BY current_balance DESC LIMIT 50",
+    ),
+}
+
+
+def timed(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--gen-days", type=int, default=30, help="Dias gerados na medicao do gerador.")
+    parser.add_argument("--daily-volume", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    con = duckdb.connect()
+    con.execute(BUILD_ACCOUNTS.format(accounts=args.accounts))
+    con.execute(BUILD_FACT.format(accounts=args.accounts, rows=args.rows, first_day=FIRST_DAY, days=DAYS))
+    last_day = con.execute("SELECT max(cast(transaction_at as date)) FROM fct_transactions").fetchone()[0]
+
+    # Ledger ate o dia anterior ao ultimo; o ultimo dia e a carga incremental
+    con.execute("CREATE TABLE empty_ledger (account_id varchar, balance_date date, closing_balance double)")
+    full_sql = LEDGER_ROWS.format(daily=DAILY.format(watermark="1900-01-01"), ledger="empty_ledger", watermark="1900-01-01")
+    con.execute(f"CREATE TABLE ledger AS SELECT * FROM ({full_sql}) WHERE balance_date < date '{last_day}'")
+    incremental_sql = LEDGER_ROWS.format(daily=DAILY.format(watermark=last_day), ledger="ledger", watermark=last_day)
+
+    full = timed(lambda: con.execute(f"CREATE OR REPLACE TEMP TABLE rebuilt AS {full_sql}"), args.repeats)
+    incremental = timed(lambda: con.execute(f"CREATE OR REPLACE TEMP TABLE delta AS {incremental_sql}"), args.repeats)
+    con.execute("INSERT INTO ledger SELECT * FROM delta")
+    ledger_rows = con.execute("SELECT count(*) FROM ledger").fetchone()[0]
+    con.execute(BUILD_CURRENT)
+
+    print(f"{args.rows:,} transactions, {args.accounts:,} accounts, ledger {ledger_rows:,} rows")
+    print(f"ledger load of one day: full rebuild {full:.3f}s, incremental {incremental:.3f}s ({full / incremental:.1f}x)")
+    print(f"{'query':<14}{'fact (s)':>12}{'ledger (s)':>12}{'speedup':>10}")
+    probe = con.execute("SELECT account_id FROM dim_accounts USING SAMPLE 1").fetchone()[0]
+    for name, (adhoc, ledger) in QUERIES.items():
+        params = [probe] if "?" in ledger else []
+        fact_time = timed(lambda: con.execute(adhoc, params).fetchall(), args.repeats)
+        ledger_time = timed(lambda: con.execute(ledger, params).fetchall(), args.repeats)
+        print(f"{name:<14}{fact_time:>12.4f}{ledger_time:>12.4f}{fact_time / ledger_time:>9.0f}x")
+    con.close()
+
+    accounts = [f"acc-{i:07d}" for i in range(args.accounts)]
+    opening = np.full(len(accounts), 500.0)
+    profile = get_profile(DEFAULT_PROFILE, args.daily_volume)
+
+    def generate(**kwargs):
+        batches = generate_transaction_batches(
+            accounts, days_history=args.gen_days, seed=1, as_of=date(2025, 3, 1), profile=profile, **kwargs
+        )
+        for _ in batches:
+            pass
+
+    free = timed(generate, 1)
+    bound = timed(lambda: generate(opening_balances=opening), 1)
+    print(f"generator, {args.gen_days} days x ~{args.daily_volume:,} rows: free {free:.2f}s, "
+          f"respecting balances {bound:.2f}s (+{(bound / free - 1) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: startup do gerador de transacoes (carga dos IDs de contas).
+
+Compara a leitura dos arquivos de contas (listagem + parse) com o indice
+`_index/accounts/` baixado a frio e com cache local por ETag, em um S3 em
+memoria (moto).
+
+Uso:
+    python -m benchmarks.bench_account_index --accounts 100000 500000 --format jsonl
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+import boto3
+import pyarrow as pa
+from moto import mock_aws
+
+from src.generators import transaction_generator
+from src.generators.account_index import build_account_index, write_account_index
+from src.generators.utils import OUTPUT_FORMATS, get_logger, write_records_atomic
+from src.generators.models import ACCOUNT_ARROW_SCHEMA
+
+logger = get_logger(__name__)
+BUCKET = "bench"
+
+
+def _accounts(n: int):
+    return [
+        {
+            "id": str(uuid.uuid4()), "customer_id": str(uuid.uuid4()), "account_number": "123456",
+            "agency": "0001", "balance": 1.0, "account_type": "CHECKING",
+            "created_at": "2025-01-01T00:00:00", "status": "ACTIVE",
+        }
+        for _ in range(n)
+    ]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return len(result), time.perf_counter() - start
+
+
+def bench(accounts: int, output_format: str):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    records = _accounts(accounts)
+    key = f"accounts/accounts_20250101000000.{output_format}"
+    local_path = os.path.join("data", key)
+    write_records_atomic(records, local_path, output_format, ACCOUNT_ARROW_SCHEMA)
+    s3.upload_file(local_path, BUCKET, key)
+
+    legacy = _timed(lambda: transaction_generator._read_account_ids(s3, BUCKET, key))
+
+    table = pa.table({"id": [r["id"] for r in records], "customer_id": [r["customer_id"] for r in records]})
+    write_account_index(s3, BUCKET, build_account_index([table]), "20250101000000", logger)
+    cold = _timed(lambda: transaction_generator.load_existing_account_ids(s3, BUCKET))
+    warm = _timed(lambda: transaction_generator.load_existing_account_ids(s3, BUCKET))
+    return legacy, cold, warm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    print(f"{'accounts':>10}{'arquivos':>12}{'indice frio':>14}{'indice cache':>15}")
+    for accounts in args.accounts:
+        with tempfile.TemporaryDirectory() as tmp, mock_aws():
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                legacy, cold, warm = bench(accounts, args.format)
+            finally:
+                os.chdir(cwd)
+        print(f"{accounts:>10,}{legacy[1]:>11.2f}s{cold[1]:>13.2f}s{warm[1]:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: scan do DuckDB sobre muitos arquivos pequenos vs particoes compactadas.
+
+Simula a landing zone depois de semanas de micro-lotes (modo realtime ou execucoes
+repetidas): `--files-per-day` arquivos pequenos por particao dt=. Mede o scan do
+fct_transactions (glob Hive) antes e depois de juntar cada particao com
+`merge_parquet_files`. Em disco local o custo por arquivo e so abrir/ler o footer;
+no MinIO/S3 via httpfs cada arquivo ainda soma as requisicoes HTTP.
+
+Uso:
+    python -m benchmarks.bench_compaction --days 60 --files-per-day 200 --rows-per-file 500
+"""
+import argparse
+import glob
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.generators.compaction import merge_parquet_files
+from src.generators.transaction_generator import build_transaction_columns, columns_to_record_batch
+
+SCAN_QUERY = """
+    SELECT transaction_type, count(*), sum(amount)
+    FROM read_parquet('{root}/dt=*/*.parquet', hive_partitioning = true)
+    GROUP BY 1
+"""
+
+
+def build_landing(root: str, days: int, files_per_day: int, rows_per_file: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    accounts = np.array([f"acc-{i:07d}" for i in range(50_000)], dtype=object)
+    for offset in range(days):
+        day = date(2025, 1, 1) + timedelta(days=offset)
+        directory = os.path.join(root, f"dt={day.isoformat()}")
+        os.makedirs(directory)
+        start = datetime.combine(day, datetime.min.time())
+        for part in range(files_per_day):
+            columns = build_transaction_columns(accounts, start, rows_per_file, rng)
+            table = pa.Table.from_batches([columns_to_record_batch(columns)])
+            pq.write_table(table, os.path.join(directory, f"part-{part:05d}.parquet"), compression="zstd")
+
+
+def compact_landing(root: str) -> None:
+    for directory in sorted(glob.glob(os.path.join(root, "dt=*"))):
+        paths = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        merge_parquet_files(paths, os.path.join(directory, "compacted-00000.parquet.new"))
+        for path in paths:
+            os.remove(path)
+        os.replace(os.path.join(directory, "compacted-00000.parquet.new"), os.path.join(directory, "compacted-00000.parquet"))
+
+
+def time_scan(root: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        con = duckdb.connect()
+        start = time.perf_counter()
+        con.execute(SCAN_QUERY.format(root=root)).fetchall()
+        timings.append(time.perf_counter() - start)
+        con.close()
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--files-per-day", type=int, default=200)
+    parser.add_argument("--rows-per-file", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        build_landing(root, args.days, args.files_per_day, args.rows_per_file, args.seed)
+        files_before = len(glob.glob(os.path.join(root, "dt=*", "*.parquet")))
+        before = time_scan(root, args.repeats)
+
+        start = time.perf_counter()
+        compact_landing(root)
+        compaction = time.perf_counter() - start
+        files_after = len(glob.glob(os.path.join(root, "dt=*", "*.parquet")))
+        after = time_scan(root, args.repeats)
+
+    rows = args.days * args.files_per_day * args.rows_per_file
+    print(f"{rows:,} rows | compaction took {compaction:.2f}s")
+    print(f"{'layout':<12}{'files':>8}{'scan (s)':>10}")
+    print(f"{'small files':<12}{files_before:>8,}{before:>10.3f}")
+    print(f"{'compacted':<12}{files_after:>8,}{after:>10.3f}")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark: snapshot de clientes com check_cols (4 colunas) vs row_hash, e dim_customers full vs incremental.
+
+Simula um dia de churn: o gerador de deltas (`generate_customer_updates`) altera
+`--churn` dos clientes e o benchmark mede, no DuckDB, (a) a deteccao de mudancas do
+snapshot comparando as quatro colunas vs o hash, (b) a aplicacao das novas versoes no
+snapshot e (c) o rebuild completo da dim_customers vs o delete+insert so das versoes tocadas.
+
+Uso:
+    python -m benchmarks.bench_customer_snapshot --customers 10000000 --churn 0.01
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+
+import duckdb
+
+from src.generators.master_data import generate_customer_updates
+
+TRACKED = ["first_name", "last_name", "email", "risk_profile"]
+ROW_HASH = "md5(concat_ws('-', " + ", ".join(f"coalesce({c}, '_null_')" for c in TRACKED) + "))"
+
+BUILD_CUSTOMERS = """
+    CREATE OR REPLACE TABLE customers AS
+    SELECT
+        'c-' || range AS id, 'Nome' || (range % 5000) AS first_name, 'Sobrenome' || (range % 20000) AS last_name,
+        'cliente' || range || '@example.com' AS email, lpad(range::varchar, 11, '0') AS cpf,
+        timestamp '2024-01-01' + to_seconds(range % 50000000) AS created_at,
+        timestamp '2024-01-01' + to_seconds(range % 50000000) AS updated_at,
+        (['LOW', 'MEDIUM', 'HIGH'])[1 + range % 3] AS risk_profile
+    FROM range({customers})
+"""
+
+BUILD_SNAPSHOT = f"""
+    CREATE OR REPLACE TABLE snapshot AS
+    SELECT id AS customer_id, * EXCLUDE (id), {ROW_HASH} AS row_hash, md5(id) AS dbt_scd_id,
+           timestamp '2025-01-01' AS dbt_valid_from, NULL::timestamp AS dbt_valid_to
+    FROM customers
+"""
+
+# a mesma deduplicacao do stg_customers (ultima versao por id), materializada para
+# separar o custo do staging (e do hash) do custo da comparacao
+STAGING = """
+    CREATE OR REPLACE TEMP TABLE stg AS
+    SELECT id AS customer_id, * EXCLUDE (id){extra}
+    FROM (SELECT * FROM customers UNION ALL SELECT * FROM delta)
+    QUALIFY row_number() OVER (PARTITION BY id ORDER BY updated_at DESC) = 1
+"""
+
+CHANGED_CHECK_COLS = "SELECT count(*) FROM stg s JOIN snapshot t USING (customer_id) WHERE t.dbt_valid_to IS NULL AND (" + \
+    " OR ".join(f"s.{c} IS DISTINCT FROM t.{c}" for c in TRACKED) + ")"
+
+CHANGED_HASH = """
+    SELECT count(*) FROM stg s JOIN snapshot t USING (customer_id)
+    WHERE t.dbt_valid_to IS NULL AND s.row_hash IS DISTINCT FROM t.row_hash
+"""
+
+APPLY_SNAPSHOT = """
+    CREATE OR REPLACE TEMP TABLE changes AS
+    SELECT s.* FROM stg s JOIN snapshot t USING (customer_id)
+    WHERE t.dbt_valid_to IS NULL AND s.row_hash IS DISTINCT FROM t.row_hash;
+    UPDATE snapshot SET dbt_valid_to = TIMESTAMP '{now}'
+    WHERE dbt_valid_to IS NULL AND customer_id IN (SELECT customer_id FROM changes);
+    INSERT INTO snapshot
+    SELECT *, md5(customer_id || '{now}') AS dbt_scd_id, TIMESTAMP '{now}' AS dbt_valid_from, NULL AS dbt_valid_to
+    FROM changes;
+"""
+
+DIM_COLUMNS = """
+    dbt_scd_id AS customer_version_id, customer_id, first_name, last_name, first_name || ' ' || last_name AS full_name,
+    email, cpf, risk_profile, created_at, updated_at, dbt_valid_from AS valid_from, dbt_valid_to AS valid_to,
+    dbt_valid_to IS NULL AS is_current
+"""
+
+DIM_FULL = f"CREATE OR REPLACE TABLE dim_full AS SELECT {DIM_COLUMNS} FROM snapshot"
+
+DIM_INCREMENTAL = f"""
+    CREATE OR REPLACE TEMP TABLE dim_delta AS
+    SELECT {DIM_COLUMNS} FROM snapshot WHERE dbt_valid_from >= TIMESTAMP '{{now}}' OR dbt_valid_to >= TIMESTAMP '{{now}}';
+    DELETE FROM dim_incremental WHERE customer_version_id IN (SELECT customer_version_id FROM dim_delta);
+    INSERT INTO dim_incremental SELECT * FROM dim_delta;
+"""
+
+
+def _timed(con, sql: str):
+    start = time.perf_counter()
+    result = con.execute(sql).fetchall()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=2_000_000)
+    parser.add_argument("--churn", type=float, default=0.01, help="Fracao de clientes alterados no dia.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    now = datetime(2025, 6, 2)
+    con = duckdb.connect()
+    con.execute(BUILD_CUSTOMERS.format(customers=args.customers))
+    con.execute(BUILD_SNAPSHOT)
+    con.execute(f"CREATE OR REPLACE TABLE dim_incremental AS SELECT {DIM_COLUMNS} FROM snapshot")
+
+    start = time.perf_counter()
+    delta = generate_customer_updates(con.execute("SELECT * FROM customers").arrow(), args.churn, args.seed, now)
+    generator = time.perf_counter() - start
+    con.register("delta_arrow", delta)
+    con.execute("CREATE TABLE delta AS SELECT * FROM delta_arrow")
+    print(f"{args.customers:,} clientes, {delta.num_rows:,} alterados (gerador: {generator:.2f}s)")
+
+    staging_time, _ = _timed(con, STAGING.format(extra=""))
+    check_time, [(check_count,)] = _timed(con, CHANGED_CHECK_COLS)
+    hashed_staging_time, _ = _timed(con, STAGING.format(extra=f", {ROW_HASH} AS row_hash"))
+    hash_time, [(hash_count,)] = _timed(con, CHANGED_HASH)
+    apply_time, _ = _timed(con, APPLY_SNAPSHOT.format(now=now))
+    full_time, _ = _timed(con, DIM_FULL)
+    incremental_time, _ = _timed(con, DIM_INCREMENTAL.format(now=now))
+
+    rows_equal = con.execute(
+        "SELECT (SELECT count(*) FROM (SELECT * FROM dim_full EXCEPT SELECT * FROM dim_incremental)) = 0"
+    ).fetchone()[0]
+    print(f"{'etapa':<32}{'seconds':>10}")
+    print(f"{'staging (dedup)':<32}{staging_time:>10.2f}")
+    print(f"{'staging (dedup + row_hash)':<32}{hashed_staging_time:>10.2f}")
+    print(f"{'deteccao check_cols (4 col.)':<32}{check_time:>10.2f}   ({check_count:,} mudancas)")
+    print(f"{'deteccao row_hash':<32}{hash_time:>10.2f}   ({hash_count:,} mudancas)")
+    print(f"{'aplicar versoes no snapshot':<32}{apply_time:>10.2f}")
+    print(f"{'dim_customers full rebuild':<32}{full_time:>10.2f}")
+    print(f"{'dim_customers incremental':<32}{incremental_time:>10.2f}   (igual ao full: {rows_equal})")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: conexao por consulta + pandas (antes) vs DuckDBConnectionManager + Arrow.
+
+Simula um rerun do dashboard sem cache (varias consultas pequenas ao rollup e uma
+pagina da auditoria) em um arquivo .duckdb local.
+
+Uso:
+    python -m benchmarks.bench_dashboard_connections --rows 2000000 --reruns 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import duckdb
+
+from benchmarks.bench_dashboard_queries import BUILD_FACT, BUILD_ROLLUP, DAYS, FIRST_DAY
+from src.dashboard.db import DuckDBConnectionManager
+
+QUERIES = [
+    "SELECT min(transaction_day), max(transaction_day) FROM agg_daily_by_type",
+    "SELECT sum(total_amount), sum(txn_count), sum(over_5k_count) FROM agg_daily_by_type",
+    "SELECT transaction_day, sum(total_amount) FROM agg_daily_by_type GROUP BY 1 ORDER BY 1",
+    "SELECT transaction_type, sum(total_amount) FROM agg_daily_by_type GROUP BY 1",
+    "SELECT counterparty_bank, transaction_type, sum(total_amount) FROM agg_daily_by_type GROUP BY 1, 2",
+    "SELECT transaction_id, amount, status, counterparty_bank FROM fct_transactions "
+    "WHERE amount > 1000 ORDER BY amount DESC LIMIT 100",
+]
+
+
+def rerun_before(db_path: str):
+    for query in QUERIES:
+        con = duckdb.connect(db_path, read_only=True)
+        try:
+            con.execute(query).df()
+        finally:
+            con.close()
+
+
+def rerun_after(manager: DuckDBConnectionManager):
+    for query in QUERIES:
+        manager.query_arrow(query)
+
+
+def _timed(fn, reruns: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reruns):
+        fn()
+    return (time.perf_counter() - start) / reruns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "luisbank.duckdb")
+        con = duckdb.connect(db_path)
+        con.execute(BUILD_FACT.format(first_day=FIRST_DAY, days=DAYS, rows=args.rows))
+        con.execute(BUILD_ROLLUP)
+        con.close()
+
+        before = _timed(lambda: rerun_before(db_path), args.reruns)
+        manager = DuckDBConnectionManager(db_path)
+        after = _timed(lambda: rerun_after(manager), args.reruns)
+        manager.close()
+
+    print(f"{len(QUERIES)} consultas por rerun, {args.rows:,} linhas na fato")
+    print(f"{'modo':<34}{'ms/rerun':>10}")
+    print(f"{'connect + .df() por consulta':<34}{before * 1000:>10.1f}")
+    print(f"{'manager + cursor/thread + Arrow':<34}{after * 1000:>10.1f}")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
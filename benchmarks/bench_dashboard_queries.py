@@ -0,0 +1,127 @@
+"""Benchmark: consultas do dashboard lendo a fato inteira (pandas) vs rollup agg_daily_by_type.
+
+Monta fct_transactions sintetica no DuckDB (365 dias) e mede o tempo de uma
+renderizacao da pagina (KPIs, serie diaria, composicao e uma pagina da auditoria)
+para um periodo de 30 dias. A pagina da auditoria (LIMIT 100) e a unica consulta
+que ainda le a fato.
+
+Uso:
+    python -m benchmarks.bench_dashboard_queries --rows 1000000 5000000 20000000
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import duckdb
+
+TYPES = ["PIX_IN", "PIX_OUT", "TED_IN", "TED_OUT", "BOLETO_PAY"]
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 365
+
+BUILD_FACT = """
+    CREATE OR REPLACE TABLE fct_transactions AS
+    SELECT
+        uuid()::varchar as transaction_id,
+        'acc-' || (random() * 100000)::int as account_id,
+        (['PIX_IN', 'PIX_OUT', 'TED_IN', 'TED_OUT', 'BOLETO_PAY'])[1 + (random() * 4.999)::int] as transaction_type,
+        round(random() * 6000, 2) as amount,
+        (['LuisBank', 'Nubank', 'Itau', 'Bradesco'])[1 + (random() * 3.999)::int] as counterparty_bank,
+        'COMPLETED' as status,
+        timestamp '{first_day}' + to_seconds((random() * {days} * 86400)::bigint) as transaction_at
+    FROM range({rows})
+"""
+
+# mesma agregacao do modelo dbt marts/core/agg_daily_by_type.sql
+BUILD_ROLLUP = """
+    CREATE OR REPLACE TABLE agg_daily_by_type AS
+    SELECT
+        cast(transaction_at as date) as transaction_day,
+        transaction_type,
+        counterparty_bank,
+        status,
+        count(*) as txn_count,
+        sum(amount) as total_amount,
+        max(amount) as max_amount,
+        count(*) filter (where amount > 1000) as over_1k_count,
+        count(*) filter (where amount > 5000) as over_5k_count
+    FROM fct_transactions
+    GROUP BY 1, 2, 3, 4
+"""
+
+ROLLUP_FILTER = "WHERE transaction_day BETWEEN ? AND ? AND transaction_type IN (SELECT * FROM UNNEST(?))"
+
+
+def render_before(con, params):
+    df = con.execute(
+        """
+        SELECT * FROM fct_transactions
+        WHERE cast(transaction_at as date) BETWEEN ? AND ?
+        AND transaction_type IN (SELECT * FROM UNNEST(?))
+        """,
+        params,
+    ).df()
+    df["amount"].sum(), df.shape[0], df["amount"].mean(), df[df["amount"] > 5000].shape[0]
+    df.groupby(df["transaction_at"].dt.date)["amount"].sum()
+    df.groupby("transaction_type")["amount"].sum()
+    df[df["amount"] > 1000].sort_values("amount", ascending=False)
+
+
+def render_after(con, params):
+    con.execute(
+        f"SELECT sum(total_amount), sum(txn_count), sum(over_5k_count), sum(over_1k_count) "
+        f"FROM agg_daily_by_type {ROLLUP_FILTER}",
+        params,
+    ).fetchall()
+    con.execute(f"SELECT transaction_day, sum(total_amount) FROM agg_daily_by_type {ROLLUP_FILTER} GROUP BY 1", params).df()
+    con.execute(f"SELECT transaction_type, sum(total_amount) FROM agg_daily_by_type {ROLLUP_FILTER} GROUP BY 1", params).df()
+    con.execute(
+        f"SELECT counterparty_bank, transaction_type, sum(total_amount) FROM agg_daily_by_type {ROLLUP_FILTER} "
+        "GROUP BY 1, 2",
+        params,
+    ).df()
+
+
+def render_audit_page(con, params):
+    con.execute(
+        """
+        SELECT transaction_id, amount, status, counterparty_bank FROM fct_transactions
+        WHERE transaction_at >= ? AND transaction_at < ? + INTERVAL 1 DAY
+        AND transaction_type IN (SELECT * FROM UNNEST(?)) AND amount > 1000
+        ORDER BY amount DESC, transaction_id LIMIT 100 OFFSET 0
+        """,
+        params,
+    ).df()
+
+
+def _best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    end_day = FIRST_DAY + timedelta(days=DAYS - 1)
+    params = [end_day - timedelta(days=30), end_day, TYPES]
+
+    print(f"{'fact rows':>12}{'antes (ms)':>12}{'rollups (ms)':>14}{'auditoria (ms)':>16}")
+    for rows in args.rows:
+        con = duckdb.connect()
+        con.execute(BUILD_FACT.format(first_day=FIRST_DAY, days=DAYS, rows=rows))
+        con.execute(BUILD_ROLLUP)
+        before = _best_of(lambda: render_before(con, params), args.repeats)
+        rollups = _best_of(lambda: render_after(con, params), args.repeats)
+        audit = _best_of(lambda: render_audit_page(con, params), args.repeats)
+        print(f"{rows:>12,}{before * 1000:>12.0f}{rollups * 1000:>14.0f}{audit * 1000:>16.0f}")
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
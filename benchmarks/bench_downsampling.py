@@ -0,0 +1,79 @@
+"""Benchmark: payload e tempo do scatter da aba Composicao (bruto vs LTTB, min/max e densidade).
+
+Mede, para periodos cada vez maiores, as linhas devolvidas pelo DuckDB, o tamanho
+do JSON do grafico Plotly enviado ao navegador e o tempo total (consulta + figura).
+
+Uso:
+    python -m benchmarks.bench_downsampling --rows 5000000 --days 30 90 365
+"""
+import argparse
+import time
+import warnings
+from datetime import timedelta
+
+import duckdb
+import plotly.express as px
+
+from benchmarks.bench_dashboard_queries import BUILD_FACT, DAYS, FIRST_DAY, TYPES
+from src.dashboard.downsampling import density_bins, lttb_points, minmax_points, risk_outliers
+
+WIDTH = 1200
+
+
+def raw_points(query, start, end, types):
+    return query(
+        """
+        SELECT transaction_type, transaction_at, amount FROM main.fct_transactions
+        WHERE transaction_at >= ? AND transaction_at < ? + INTERVAL 1 DAY
+        AND transaction_type IN (SELECT * FROM UNNEST(?))
+        """,
+        [start, end, list(types)],
+    )
+
+
+def _figure(mode: str, table):
+    df = table.to_pandas()
+    if mode == "densidade":
+        return px.density_heatmap(df, x="transaction_at", y="amount", z="transactions", histfunc="sum")
+    return px.scatter(df, x="transaction_at", y="amount", color="transaction_type")
+
+
+def measure(mode: str, fn):
+    start = time.perf_counter()
+    table = fn()
+    payload = len(_figure(mode, table).to_json())
+    return table.num_rows, payload, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Linhas da fato (365 dias).")
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90, 365])
+    parser.add_argument("--raw-max-days", type=int, default=30, help="Mede o scatter bruto ate este periodo.")
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore", FutureWarning)
+    con = duckdb.connect()
+    con.execute(BUILD_FACT.format(first_day=FIRST_DAY, days=DAYS, rows=args.rows))
+    query = lambda sql, params: con.execute(sql, params).arrow()  # noqa: E731
+    end = FIRST_DAY + timedelta(days=DAYS - 1)
+
+    print(f"{'dias':>5} {'modo':<10}{'pontos':>12}{'JSON (MB)':>12}{'seconds':>10}")
+    for days in args.days:
+        start = end - timedelta(days=days - 1)
+        modes = [
+            ("lttb", lambda: lttb_points(query, start, end, TYPES, WIDTH)),
+            ("minmax", lambda: minmax_points(query, start, end, TYPES, WIDTH // 2)),
+            ("densidade", lambda: density_bins(query, start, end, TYPES)),
+            ("outliers", lambda: risk_outliers(query, start, end, TYPES)),
+        ]
+        if days <= args.raw_max_days:
+            modes.insert(0, ("bruto", lambda: raw_points(query, start, end, TYPES)))
+        for mode, fn in modes:
+            rows, payload, seconds = measure(mode, fn)
+            print(f"{days:>5} {mode:<10}{rows:>12,}{payload / 1e6:>12.2f}{seconds:>10.2f}")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
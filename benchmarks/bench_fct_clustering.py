@@ -0,0 +1,107 @@
+"""Benchmark: janela de 30 dias sobre a fato com e sem ordenacao fisica, cast vs intervalo semiaberto.
+
+Monta fct_transactions sintetica com `--years` de historico em dois layouts: ordem de
+chegada aleatoria (cargas incrementais sem ORDER BY) e agrupada como o modelo dbt
+(dia, tipo, transaction_at). Para cada layout mede a consulta do dashboard com
+`cast(transaction_at as date) BETWEEN` e com `transaction_at >= ? AND transaction_at < ?`.
+
+Row groups pulados = row groups cujo min/max de transaction_at (pragma_storage_info)
+nao cruza a janela. So o filtro semiaberto usa esses zone maps; com o cast a tabela
+inteira e lida.
+
+Uso:
+    python -m benchmarks.bench_fct_clustering --rows 20000000 --years 3
+"""
+import argparse
+import os
+import re
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import duckdb
+
+FIRST_DAY = date(2023, 1, 1)
+CLUSTER_KEY = "date_trunc('day', transaction_at), transaction_type, transaction_at"
+
+BUILD_FACT = """
+    CREATE OR REPLACE TABLE fct_random AS
+    SELECT
+        uuid()::varchar AS transaction_id,
+        (['PIX_IN', 'PIX_OUT', 'TED_IN', 'TED_OUT', 'BOLETO_PAY'])[1 + (random() * 4.999)::int] AS transaction_type,
+        round(random() * 6000, 2) AS amount,
+        timestamp '{first_day}' + to_seconds((random() * {days} * 86400)::bigint) AS transaction_at
+    FROM range({rows})
+"""
+
+CAST_QUERY = """
+    SELECT transaction_type, count(*), sum(amount) FROM {table}
+    WHERE cast(transaction_at AS date) BETWEEN ? AND ? GROUP BY 1
+"""
+HALF_OPEN_QUERY = """
+    SELECT transaction_type, count(*), sum(amount) FROM {table}
+    WHERE transaction_at >= ? AND transaction_at < ? GROUP BY 1
+"""
+
+STATS = re.compile(r"\[Min: ([^,]+), Max: ([^\]]+)\]")
+
+
+def row_groups_skipped(con, table: str, start: datetime, end: datetime):
+    """(pulados, total) pelos zone maps de transaction_at para o intervalo [start, end)."""
+    ranges = {}
+    rows = con.execute(
+        f"SELECT row_group_id, stats FROM pragma_storage_info('{table}') "
+        "WHERE column_name = 'transaction_at' AND segment_type = 'TIMESTAMP'"
+    ).fetchall()
+    for row_group, stats in rows:
+        low, high = (datetime.fromisoformat(value) for value in STATS.search(stats).groups())
+        current = ranges.get(row_group, (low, high))
+        ranges[row_group] = (min(current[0], low), max(current[1], high))
+    skipped = sum(1 for low, high in ranges.values() if high < start or low >= end)
+    return skipped, len(ranges)
+
+
+def timed(con, query: str, params: list, repeats: int) -> float:
+    con.execute(query, params).fetchall()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        con.execute(query, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    days = 365 * args.years
+    window_end = FIRST_DAY + timedelta(days=days - 1)
+    window_start = window_end - timedelta(days=args.window_days - 1)
+    start = datetime.combine(window_start, datetime.min.time())
+    end = datetime.combine(window_end + timedelta(days=1), datetime.min.time())
+
+    with tempfile.TemporaryDirectory() as root:
+        con = duckdb.connect(os.path.join(root, "bench.duckdb"))
+        con.execute(BUILD_FACT.format(first_day=FIRST_DAY, days=days, rows=args.rows))
+        con.execute(f"CREATE OR REPLACE TABLE fct_clustered AS SELECT * FROM fct_random ORDER BY {CLUSTER_KEY}")
+        con.execute("CHECKPOINT")
+
+        print(f"{args.rows:,} rows over {args.years} years, window {window_start} .. {window_end}")
+        print(f"{'layout':<11}{'filter':<11}{'latency (ms)':>14}{'row groups skipped':>22}")
+        for table, layout in (("fct_random", "arrival"), ("fct_clustered", "clustered")):
+            skipped, total = row_groups_skipped(con, table, start, end)
+            cast_ms = timed(con, CAST_QUERY.format(table=table), [window_start, window_end], args.repeats) * 1000
+            half_ms = timed(con, HALF_OPEN_QUERY.format(table=table), [start, end], args.repeats) * 1000
+            print(f"{layout:<11}{'cast':<11}{cast_ms:>14.1f}{f'0/{total}':>22}")
+            print(f"{layout:<11}{'half-open':<11}{half_ms:>14.1f}{f'{skipped}/{total}':>22}")
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Benchmark: reexecucao de uma carga de transacoes com e sem ingestao idempotente.
+
+Roda a engine batch duas vezes com a mesma seed contra um S3 em memoria. Antes, a
+reexecucao ganhava chaves novas (run_id), subia tudo de novo e dobrava a landing; agora
+as chaves vem do batch_id e lotes ja catalogados sao pulados. Do lado do dbt mede a
+carga incremental da fato com delete+insert por transaction_id (o merge do unique_key)
+contra o append, e o scan da landing com e sem as copias da reexecucao.
+
+Uso:
+    python -m benchmarks.bench_idempotent_ingestion --days 30 --daily-volume 100000 --fact-rows 20000000
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+import duckdb
+
+from src.generators.transaction_generator import generate_sharded, generate_transaction_batches, stream_and_upload
+from src.generators.workload import DEFAULT_PROFILE, get_profile
+
+AS_OF = date(2025, 3, 1)
+BUILD_FACT = """
+    CREATE OR REPLACE TABLE fct AS
+    SELECT
+        uuid()::varchar AS transaction_id,
+        round(random() * 6000, 2) AS amount,
+        timestamp '2024-01-01' + to_seconds((random() * 365 * 86400)::bigint) AS transaction_at
+    FROM range({rows})
+"""
+BUILD_BATCH = """
+    CREATE OR REPLACE TABLE batch AS
+    SELECT
+        uuid()::varchar AS transaction_id,
+        round(random() * 6000, 2) AS amount,
+        timestamp '2025-01-01' + to_seconds((random() * 86400)::bigint) AS transaction_at
+    FROM range({rows})
+"""
+# O que o dbt-duckdb executa para cada estrategia incremental
+MERGE = [
+    "DELETE FROM target WHERE transaction_id IN (SELECT transaction_id FROM batch)",
+    "INSERT INTO target SELECT * FROM batch",
+]
+APPEND = ["INSERT INTO target SELECT * FROM batch"]
+SCAN_QUERY = "SELECT count(*), sum(amount) FROM read_parquet('{root}/transactions/dt=*/*.parquet')"
+
+
+class MemoryS3:
+    """Bucket em memoria com o subconjunto da API usado pelos geradores (PUT, multipart, listagem)."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploaded_bytes = 0
+        self._multipart = {}
+
+    def put_object(self, Bucket, Key, Body):
+        body = Body if isinstance(Body, bytes) else Body.read()
+        self.objects[Key] = body
+        self.uploaded_bytes += len(body)
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        with open(Filename, "rb") as handle:
+            self.put_object(Bucket, Key, handle.read())
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None, Delimiter=None):
+        contents = [{"Key": key, "Size": len(body)} for key, body in sorted(self.objects.items()) if key.startswith(Prefix)]
+        return {"KeyCount": len(contents), "Contents": contents, "IsTruncated": False}
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = str(len(self._multipart))
+        self._multipart[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._multipart[UploadId][PartNumber] = Body
+        return {"ETag": str(PartNumber)}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self._multipart.pop(UploadId)
+        self.put_object(Bucket, Key, b"".join(parts[part["PartNumber"]] for part in MultipartUpload["Parts"]))
+
+
+def landing_keys(s3: MemoryS3) -> list:
+    return [key for key in s3.objects if key.startswith("transactions/")]
+
+
+def timed_run(s3: MemoryS3, run) -> tuple:
+    uploaded = s3.uploaded_bytes
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start, s3.uploaded_bytes - uploaded
+
+
+def time_load(con, statements: list, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        con.execute("CREATE OR REPLACE TABLE target AS SELECT * FROM fct")
+        start = time.perf_counter()
+        for statement in statements:
+            con.execute(statement)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def time_scan(s3: MemoryS3, repeats: int) -> float:
+    with tempfile.TemporaryDirectory() as root:
+        for key in landing_keys(s3):
+            path = os.path.join(root, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as handle:
+                handle.write(s3.objects[key])
+        con = duckdb.connect()
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            con.execute(SCAN_QUERY.format(root=root)).fetchall()
+            timings.append(time.perf_counter() - start)
+        con.close()
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--daily-volume", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, default=50_000)
+    parser.add_argument("--fact-rows", type=int, default=20_000_000)
+    parser.add_argument("--batch-rows", type=int, default=None, help="Linhas da carga incremental (padrao: um dia).")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    accounts = [f"acc-{i:07d}" for i in range(args.accounts)]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            idempotent, legacy = MemoryS3(), MemoryS3()
+
+            def run(s3):
+                return lambda: generate_sharded(
+                    accounts, 1, lambda: s3, "landing-zone", days_history=args.days, master_seed=args.seed,
+                    as_of=AS_OF, daily_volume=args.daily_volume,
+                )
+
+            def legacy_run():
+                # Comportamento anterior: chaves com run_id novo e nenhum lote pulado
+                profile = get_profile(DEFAULT_PROFILE, args.daily_volume)
+                batches = generate_transaction_batches(accounts, args.days, seed=args.seed, as_of=AS_OF, profile=profile)
+                stream_and_upload(batches, legacy, "landing-zone", run_id=f"{time.time_ns()}")
+
+            first, first_bytes = timed_run(idempotent, run(idempotent))
+            rerun, rerun_bytes = timed_run(idempotent, run(idempotent))
+            timed_run(legacy, legacy_run)
+            legacy_rerun, legacy_bytes = timed_run(legacy, legacy_run)
+        finally:
+            os.chdir(cwd)
+
+    print(f"{args.days} days x ~{args.daily_volume:,} rows | first load {first:.2f}s, {first_bytes / 1024 / 1024:.1f} MB")
+    print(f"{'rerun':<12}{'time (s)':>10}{'MB uploaded':>14}{'landing files':>16}")
+    print(f"{'run_id keys':<12}{legacy_rerun:>10.2f}{legacy_bytes / 1024 / 1024:>14.1f}{len(landing_keys(legacy)):>16,}")
+    print(f"{'batch_id':<12}{rerun:>10.2f}{rerun_bytes / 1024 / 1024:>14.1f}{len(landing_keys(idempotent)):>16,}")
+
+    duplicated, deduped = time_scan(legacy, args.repeats), time_scan(idempotent, args.repeats)
+    print(f"landing scan: {duplicated:.3f}s with the rerun's copies, {deduped:.3f}s deduplicated")
+
+    con = duckdb.connect()
+    con.execute(BUILD_FACT.format(rows=args.fact_rows))
+    con.execute(BUILD_BATCH.format(rows=args.batch_rows or args.daily_volume))
+    merge, append = time_load(con, MERGE, args.repeats), time_load(con, APPEND, args.repeats)
+    con.close()
+    print(f"incremental load into {args.fact_rows:,} rows: delete+insert {merge:.3f}s, append {append:.3f}s "
+          f"({merge / append:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
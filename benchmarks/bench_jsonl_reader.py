@@ -0,0 +1,93 @@
+"""Benchmark: throughput dos backends do JsonlReader em JSONL de transacoes.
+
+Gera um arquivo JSONL no formato da landing zone e le com cada backend instalado
+(registro a registro), com o parser colunar do pyarrow e com o caminho antigo
+(`ijson.items` direto no stream).
+
+Uso:
+    python -m benchmarks.bench_jsonl_reader --size-mb 1024
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import ijson
+import numpy as np
+
+from src.generators.jsonl_reader import DEFAULT_CHUNK_SIZE, JsonlReader, available_backends
+from src.generators.models import TRANSACTION_ARROW_SCHEMA
+from src.generators.transaction_generator import build_transaction_columns, columns_to_records
+from src.generators.utils import encode_jsonl
+
+
+def write_landing_jsonl(path: str, size_mb: int, seed: int) -> int:
+    """Escreve ~size_mb MB repetindo um bloco de 100k transacoes; retorna o numero de linhas."""
+    rng = np.random.default_rng(seed)
+    accounts = np.array([f"acc-{i:09d}" for i in range(100_000)], dtype=object)
+    block = encode_jsonl(columns_to_records(build_transaction_columns(accounts, datetime(2025, 1, 1), 100_000, rng)))
+    lines_per_block = block.count(b"\n")
+    target = size_mb * 1024 * 1024
+    written = lines = 0
+    with open(path, "wb") as handle:
+        while written < target:
+            handle.write(block)
+            written += len(block)
+            lines += lines_per_block
+    return lines
+
+
+def _run(label: str, path: str, fn):
+    start = time.perf_counter()
+    with open(path, "rb") as handle:
+        rows = fn(handle)
+    return label, rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_SIZE // 1024 // 1024)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-legacy", action="store_true", help="Nao roda o caminho antigo (ijson.items).")
+    args = parser.parse_args(argv)
+    chunk_size = args.chunk_mb * 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "transactions.jsonl")
+        lines = write_landing_jsonl(path, args.size_mb, args.seed)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        results = []
+        if not args.skip_legacy:
+            results.append(
+                _run("ijson.items (antigo)", path, lambda f: sum(1 for _ in ijson.items(f, "", multiple_values=True)))
+            )
+        for backend in available_backends():
+            results.append(
+                _run(
+                    f"{backend} (dicts)",
+                    path,
+                    lambda f, b=backend: sum(len(batch) for batch in JsonlReader(f, b, chunk_size).iter_batches()),
+                )
+            )
+        results.append(
+            _run(
+                "pyarrow.json (colunar)",
+                path,
+                lambda f: sum(
+                    t.num_rows for t in JsonlReader(f, chunk_size=chunk_size).iter_tables(TRANSACTION_ARROW_SCHEMA)
+                ),
+            )
+        )
+
+    print(f"\n{lines:,} linhas, {size_mb:,.0f} MB")
+    print(f"{'backend':<26}{'seconds':>10}{'MB/s':>10}{'rows/s':>14}")
+    for label, rows, seconds in results:
+        assert rows == lines, f"{label}: {rows} != {lines}"
+        print(f"{label:<26}{seconds:>10.2f}{size_mb / seconds:>10.1f}{rows / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
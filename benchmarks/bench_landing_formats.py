@@ -0,0 +1,102 @@
+"""Benchmark: tamanho, tempo de escrita e scan no DuckDB para JSONL vs Parquet (zstd).
+
+Uso:
+    python -m benchmarks.bench_landing_formats --rows 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pyarrow.parquet as pq
+
+from src.generators.models import TRANSACTION_ARROW_SCHEMA
+from src.generators.transaction_generator import (
+    build_transaction_columns,
+    columns_to_record_batch,
+    columns_to_records,
+)
+from src.generators.utils import DEFAULT_ROW_GROUP_SIZE, encode_jsonl
+
+SCAN_QUERY = """
+    SELECT transaction_type, count(*), sum(amount), max(amount)
+    FROM {reader}
+    WHERE amount > 1000
+    GROUP BY 1
+"""
+
+
+def _chunks(rows: int, chunk_size: int, seed: int):
+    rng = np.random.default_rng(seed)
+    accounts = np.array([f"acc-{i:09d}" for i in range(100_000)], dtype=object)
+    day = datetime(2025, 1, 1)
+    remaining = rows
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield build_transaction_columns(accounts, day, size, rng)
+        remaining -= size
+
+
+def write_jsonl(path: str, rows: int, chunk_size: int, seed: int) -> float:
+    start = time.perf_counter()
+    with open(path, "wb") as handle:
+        for columns in _chunks(rows, chunk_size, seed):
+            handle.write(encode_jsonl(columns_to_records(columns)))
+    return time.perf_counter() - start
+
+
+def write_parquet(path: str, rows: int, chunk_size: int, seed: int) -> float:
+    start = time.perf_counter()
+    with pq.ParquetWriter(path, TRANSACTION_ARROW_SCHEMA, compression="zstd") as writer:
+        for columns in _chunks(rows, chunk_size, seed):
+            writer.write_batch(columns_to_record_batch(columns), row_group_size=DEFAULT_ROW_GROUP_SIZE)
+    return time.perf_counter() - start
+
+
+def scan(reader: str) -> float:
+    con = duckdb.connect()
+    try:
+        start = time.perf_counter()
+        con.execute(SCAN_QUERY.format(reader=reader)).fetchall()
+        return time.perf_counter() - start
+    finally:
+        con.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        jsonl_path = os.path.join(workdir, "transactions.jsonl")
+        parquet_path = os.path.join(workdir, "transactions.parquet")
+
+        results = [
+            (
+                "jsonl",
+                write_jsonl(jsonl_path, args.rows, args.chunk_size, args.seed),
+                os.path.getsize(jsonl_path),
+                scan(f"read_json_auto('{jsonl_path}', format='newline_delimited')"),
+            ),
+            (
+                "parquet (zstd)",
+                write_parquet(parquet_path, args.rows, args.chunk_size, args.seed),
+                os.path.getsize(parquet_path),
+                scan(f"read_parquet('{parquet_path}')"),
+            ),
+        ]
+
+    print(f"rows: {args.rows:,}")
+    print(f"{'format':<16}{'size (MB)':>12}{'write (s)':>12}{'scan (s)':>12}")
+    for name, write_s, size, scan_s in results:
+        print(f"{name:<16}{size / 1e6:>12.1f}{write_s:>12.2f}{scan_s:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
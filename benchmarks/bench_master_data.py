@@ -0,0 +1,51 @@
+"""Benchmark: clientes/s do gerador de cadastro por linha (Faker + pydantic) vs engine colunar.
+
+A engine por linha roda sobre `--row-customers` (minutos por milhao); a colunar sobre
+`--customers`, gravando os dois Parquet como a carga real.
+
+Uso:
+    python -m benchmarks.bench_master_data --customers 10000000 --row-customers 20000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from src.generators.master_data import generate_customer_columns, generate_customer_data
+from src.generators.models import ARROW_SCHEMAS
+from src.generators.utils import write_records_atomic
+
+
+def bench(generate, customers: int, seed: int, root: str):
+    start = time.perf_counter()
+    data = dict(zip(("customers", "accounts"), generate(customers, seed=seed)))
+    generated = time.perf_counter() - start
+    for entity, records in data.items():
+        write_records_atomic(records, os.path.join(root, f"{entity}.parquet"), "parquet", ARROW_SCHEMAS[entity])
+    return customers, len(data["accounts"]), generated, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--row-customers", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.getLogger("src.generators.master_data").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as root:
+        results = [
+            ("row (Faker + pydantic)", *bench(generate_customer_data, args.row_customers, args.seed, root)),
+            ("batch (colunar)", *bench(generate_customer_columns, args.customers, args.seed, root)),
+        ]
+
+    baseline = results[0][1] / results[0][4]
+    print(f"{'engine':<24}{'customers':>12}{'accounts':>12}{'generate (s)':>14}{'+ parquet (s)':>15}{'customers/s':>14}{'speedup':>9}")
+    for name, customers, accounts, generated, total in results:
+        rate = customers / total
+        print(f"{name:<24}{customers:>12,}{accounts:>12,}{generated:>14.2f}{total:>15.2f}{rate:>14,.0f}{rate / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
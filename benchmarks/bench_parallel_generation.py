@@ -0,0 +1,83 @@
+"""Benchmark: escalabilidade da geracao com 1, 2, 4 e 8 workers (ProcessPoolExecutor).
+
+Clientes/contas gravam Parquet local (sem upload); transacoes sao geradas e
+serializadas para um cliente S3 que descarta os bytes, isolando o custo de CPU.
+
+Uso:
+    python -m benchmarks.bench_parallel_generation --customers 20000 --accounts 200000 --days 365
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from src.generators import master_data, transaction_generator
+
+
+class DiscardS3:
+    def put_object(self, Bucket, Key, Body):
+        pass
+
+    def upload_file(self, Filename, Bucket, Key):
+        pass
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {"UploadId": "discard"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        return {"ETag": str(PartNumber)}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        pass
+
+
+def bench_master_data(customers: int, workers: int, seed: int):
+    start = time.perf_counter()
+    manifest = master_data.generate_sharded(customers, workers, master_seed=seed)
+    rows = sum(f["rows"] for f in manifest["files"] if f["entity"] == "customers")
+    return rows, time.perf_counter() - start
+
+
+def bench_transactions(account_ids, days: int, workers: int, seed: int):
+    start = time.perf_counter()
+    manifest = transaction_generator.generate_sharded(
+        account_ids, workers, DiscardS3, "bench", days_history=days, master_seed=seed
+    )
+    rows = sum(f["rows"] for f in manifest["files"])
+    return rows, time.perf_counter() - start
+
+
+def _report(title: str, results):
+    print(f"\n{title}")
+    print(f"{'workers':>8}{'rows':>12}{'seconds':>10}{'rows/s':>14}{'speedup':>9}{'efficiency':>12}")
+    base_rate = results[0][1] / results[0][2]
+    for workers, rows, seconds in results:
+        speedup = (rows / seconds) / base_rate
+        print(f"{workers:>8}{rows:>12,}{seconds:>10.2f}{rows / seconds:>14,.0f}{speedup:>8.2f}x{speedup / workers:>11.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--accounts", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"CPUs disponiveis: {os.cpu_count()}")
+    account_ids = [f"acc-{i:09d}" for i in range(args.accounts)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        master = [(w, *bench_master_data(args.customers, w, args.seed)) for w in args.workers]
+        txns = [(w, *bench_transactions(account_ids, args.days, w, args.seed)) for w in args.workers]
+
+    _report(f"master_data ({args.customers:,} clientes)", master)
+    _report(f"transactions ({args.days} dias, {args.accounts:,} contas)", txns)
+
+
+if __name__ == "__main__":
+    main()
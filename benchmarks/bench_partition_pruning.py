@@ -0,0 +1,109 @@
+"""Benchmark: arquivos/bytes lidos numa carga incremental com layout plano vs Hive (dt=YYYY-MM-DD).
+
+Simula 2 anos de historico (um arquivo por dia) e a consulta incremental do
+fct_transactions com o watermark no penultimo dia.
+
+Uso:
+    python -m benchmarks.bench_partition_pruning --days 730 --rows-per-day 10000
+"""
+import argparse
+import glob
+import os
+import re
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.generators.transaction_generator import build_transaction_columns, columns_to_record_batch
+
+SCANNING_FILES = re.compile(r"Scanning Files:\s*(\d+)/(\d+)")
+
+
+def build_layouts(root: str, days: int, rows_per_day: int, seed: int) -> date:
+    rng = np.random.default_rng(seed)
+    accounts = np.array([f"acc-{i:07d}" for i in range(50_000)], dtype=object)
+    first_day = date(2024, 1, 1)
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        columns = build_transaction_columns(accounts, datetime.combine(day, datetime.min.time()), rows_per_day, rng)
+        table = pa.Table.from_batches([columns_to_record_batch(columns)])
+
+        flat_path = os.path.join(root, "flat", f"transactions_{day:%Y%m%d}000000.parquet")
+        hive_path = os.path.join(root, "hive", f"dt={day.isoformat()}", "part-00000.parquet")
+        for path in (flat_path, hive_path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(table, path, compression="zstd")
+    return first_day + timedelta(days=days - 1)
+
+
+def run_incremental(con, reader: str, predicate: str, repeats: int):
+    query = f"SELECT count(*) FROM {reader} WHERE {predicate}"
+    profile = con.execute(f"EXPLAIN ANALYZE {query}").fetchall()[0][1]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = con.execute(query).fetchone()[0]
+        timings.append(time.perf_counter() - start)
+    match = SCANNING_FILES.search(profile)
+    files_scanned = int(match.group(1)) if match else None
+    return rows, files_scanned, statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--rows-per-day", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        last_day = build_layouts(root, args.days, args.rows_per_day, args.seed)
+        watermark = datetime.combine(last_day, datetime.min.time()) - timedelta(seconds=1)
+
+        flat_files = glob.glob(os.path.join(root, "flat", "*.parquet"))
+        hive_files = glob.glob(os.path.join(root, "hive", "dt=*", "*.parquet"))
+        hive_pruned = [
+            path for path in hive_files
+            if date.fromisoformat(path.split("dt=")[1][:10]) >= watermark.date()
+        ]
+
+        con = duckdb.connect()
+        scenarios = [
+            (
+                "flat (antes)",
+                f"read_parquet('{root}/flat/*.parquet')",
+                f"transaction_date > TIMESTAMP '{watermark}'",
+                len(flat_files),
+                sum(os.path.getsize(p) for p in flat_files),
+            ),
+            (
+                "hive dt= (depois)",
+                f"read_parquet('{root}/hive/dt=*/*.parquet', hive_partitioning = true)",
+                f"dt >= DATE '{watermark.date()}' AND transaction_date > TIMESTAMP '{watermark}'",
+                len(hive_pruned),
+                sum(os.path.getsize(p) for p in hive_pruned),
+            ),
+        ]
+
+        print(f"historico: {args.days} dias x {args.rows_per_day:,} linhas; watermark: {watermark}")
+        print(f"{'layout':<20}{'files scanned':>16}{'MB scanned':>12}{'rows':>10}{'latency (ms)':>14}")
+        for name, reader, predicate, expected_files, scanned_bytes in scenarios:
+            rows, files_scanned, latency = run_incremental(con, reader, predicate, args.repeats)
+            files = files_scanned if files_scanned is not None else expected_files
+            total = len(flat_files) if name.startswith("flat") else len(hive_files)
+            print(
+                f"{name:<20}{f'{files}/{total}':>16}{scanned_bytes / 1e6:>12.1f}"
+                f"{rows:>10,}{latency * 1000:>14.1f}"
+            )
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
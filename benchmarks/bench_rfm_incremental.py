@@ -0,0 +1,122 @@
+"""Benchmark: refresh do RFM recalculando a fato inteira vs estado incremental por cliente.
+
+Para historicos crescentes, mede o refresh apos a chegada de um lote fixo de
+transacoes novas: (a) o modelo antigo (agregacao da fato + 3 ntile), (b) a
+atualizacao de rfm_customer_state so com o lote novo e (c) a pontuacao sobre o
+estado, com ntile e com approx_quantile.
+
+Uso:
+    python -m benchmarks.bench_rfm_incremental --history 2000000 10000000 --customers 500000
+"""
+import argparse
+import time
+
+import duckdb
+
+BUILD_FACT = """
+    CREATE OR REPLACE TABLE fct_transactions AS
+    SELECT
+        'c-' || (random() * {customers})::int AS customer_id,
+        round(random() * 6000, 2) AS amount,
+        timestamp '2024-01-01' + to_seconds((random() * 600 * 86400)::bigint) AS transaction_at
+    FROM range({rows})
+"""
+
+APPEND_BATCH = """
+    INSERT INTO fct_transactions
+    SELECT
+        'c-' || (random() * {customers})::int,
+        round(random() * 6000, 2),
+        timestamp '2025-09-01' + to_seconds((random() * 86400)::bigint)
+    FROM range({rows})
+"""
+
+FULL_RFM = """
+    CREATE OR REPLACE TABLE rfm_full AS
+    WITH base AS (
+        SELECT customer_id, date_diff('day', max(transaction_at), current_date) AS recency_days,
+               count(*) AS frequency, sum(amount) AS monetary
+        FROM fct_transactions GROUP BY 1
+    )
+    SELECT *, ntile(5) OVER (ORDER BY recency_days DESC) AS r, ntile(5) OVER (ORDER BY frequency) AS f,
+           ntile(5) OVER (ORDER BY monetary) AS m
+    FROM base
+"""
+
+BUILD_STATE = """
+    CREATE OR REPLACE TABLE rfm_state AS
+    SELECT customer_id, max(transaction_at) AS last_transaction_at, count(*) AS frequency, sum(amount) AS monetary
+    FROM fct_transactions GROUP BY 1
+"""
+
+# mesma logica do modelo rfm_customer_state (delete+insert por customer_id)
+UPDATE_STATE = """
+    CREATE OR REPLACE TEMP TABLE rfm_delta AS
+    WITH new_activity AS (
+        SELECT customer_id, max(transaction_at) AS last_transaction_at, count(*) AS frequency, sum(amount) AS monetary
+        FROM fct_transactions WHERE transaction_at > TIMESTAMP '{watermark}' GROUP BY 1
+    )
+    SELECT n.customer_id, greatest(n.last_transaction_at, s.last_transaction_at) AS last_transaction_at,
+           n.frequency + coalesce(s.frequency, 0) AS frequency, n.monetary + coalesce(s.monetary, 0) AS monetary
+    FROM new_activity n LEFT JOIN rfm_state s USING (customer_id);
+    DELETE FROM rfm_state WHERE customer_id IN (SELECT customer_id FROM rfm_delta);
+    INSERT INTO rfm_state SELECT * FROM rfm_delta;
+"""
+
+SCORE_NTILE = """
+    CREATE OR REPLACE TABLE rfm_scored AS
+    SELECT *, ntile(5) OVER (ORDER BY last_transaction_at) AS r, ntile(5) OVER (ORDER BY frequency) AS f,
+           ntile(5) OVER (ORDER BY monetary) AS m
+    FROM rfm_state
+"""
+
+SCORE_APPROX = """
+    CREATE OR REPLACE TABLE rfm_scored AS
+    WITH bp AS (
+        SELECT approx_quantile(epoch(last_transaction_at), [0.2, 0.4, 0.6, 0.8]) AS r_bp,
+               approx_quantile(frequency, [0.2, 0.4, 0.6, 0.8]) AS f_bp,
+               approx_quantile(monetary, [0.2, 0.4, 0.6, 0.8]) AS m_bp
+        FROM rfm_state
+    )
+    SELECT s.*,
+        1 + (epoch(last_transaction_at) > r_bp[1])::int + (epoch(last_transaction_at) > r_bp[2])::int
+          + (epoch(last_transaction_at) > r_bp[3])::int + (epoch(last_transaction_at) > r_bp[4])::int AS r,
+        1 + (frequency > f_bp[1])::int + (frequency > f_bp[2])::int + (frequency > f_bp[3])::int
+          + (frequency > f_bp[4])::int AS f,
+        1 + (monetary > m_bp[1])::int + (monetary > m_bp[2])::int + (monetary > m_bp[3])::int
+          + (monetary > m_bp[4])::int AS m
+    FROM rfm_state s, bp
+"""
+
+
+def _timed(con, sql: str) -> float:
+    start = time.perf_counter()
+    con.execute(sql)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--customers", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=50_000, help="Transacoes novas por refresh.")
+    args = parser.parse_args(argv)
+
+    print(f"{'history':>12}{'full (s)':>10}{'state upd (s)':>15}{'ntile (s)':>11}{'approx (s)':>12}")
+    for rows in args.history:
+        con = duckdb.connect()
+        con.execute(BUILD_FACT.format(rows=rows, customers=args.customers))
+        con.execute(BUILD_STATE)
+        watermark = con.execute("SELECT max(last_transaction_at) FROM rfm_state").fetchone()[0]
+        con.execute(APPEND_BATCH.format(rows=args.batch, customers=args.customers))
+
+        full = _timed(con, FULL_RFM)
+        update = _timed(con, UPDATE_STATE.format(watermark=watermark))
+        ntile = _timed(con, SCORE_NTILE)
+        approx = _timed(con, SCORE_APPROX)
+        print(f"{rows:>12,}{full:>10.2f}{update:>15.2f}{ntile:>11.2f}{approx:>12.2f}")
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: exportacao da lista de clientes em risco via pandas vs `COPY ... TO`.
+
+Compara o caminho antigo (consulta inteira para pandas + `to_csv()` em memoria) com o
+`DuckDBConnectionManager.copy_to` usado pelo dashboard, medindo tempo e pico de
+memoria do processo (RSS).
+
+Uso:
+    python -m benchmarks.bench_risk_export --customers 1000000 3000000
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import duckdb
+
+from src.dashboard.db import DuckDBConnectionManager
+
+BUILD = """
+    CREATE OR REPLACE TABLE dm_rfm_segmentation AS
+    SELECT 'c-' || range AS customer_id, (random() * 365)::int AS recency_days,
+           round(random() * 50000, 2) AS monetary, 'Em Risco' AS rfm_segment
+    FROM range({customers});
+    CREATE OR REPLACE TABLE dim_customers AS
+    SELECT 'c-' || range AS customer_id, 'Cliente ' || range AS name,
+           'cliente' || range || '@example.com' AS email, true AS is_current
+    FROM range({customers});
+"""
+
+RISK_QUERY = """
+    SELECT r.customer_id, c.name, c.email, r.recency_days, r.monetary
+    FROM dm_rfm_segmentation r
+    JOIN dim_customers c ON r.customer_id = c.customer_id AND c.is_current
+    WHERE r.rfm_segment = 'Em Risco'
+    ORDER BY r.monetary DESC
+"""
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, nargs="+", default=[500_000, 2_000_000])
+    parser.add_argument("--mode", choices=["copy", "pandas"], default=None,
+                        help="Roda um unico modo (o pico de RSS e do processo inteiro).")
+    args = parser.parse_args(argv)
+
+    modes = [args.mode] if args.mode else ["copy", "pandas"]
+    print(f"{'clientes':>12} {'modo':<8}{'seconds':>10}{'peak RSS (MB)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for customers in args.customers:
+            db_path = os.path.join(tmp, f"wh_{customers}.duckdb")
+            con = duckdb.connect(db_path)
+            con.execute(BUILD.format(customers=customers))
+            con.close()
+            manager = DuckDBConnectionManager(db_path)
+            for mode in modes:
+                start = time.perf_counter()
+                if mode == "copy":
+                    manager.copy_to(RISK_QUERY, os.path.join(tmp, "export.csv"))
+                else:
+                    manager.query_arrow(RISK_QUERY).to_pandas().to_csv(index=False).encode("utf-8")
+                print(f"{customers:>12,} {mode:<8}{time.perf_counter() - start:>10.2f}{_peak_rss_mb():>16.0f}")
+            manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark: descoberta dos arquivos da landing zone (100k objetos) listando o bucket vs catalogo.
+
+O bucket e um stand-in em memoria com a semantica do `list_objects_v2` (paginas de 1000,
+continuation token, Delimiter) e `--latency-ms` de espera por requisicao, que e o que
+domina a listagem no MinIO/S3. Compara:
+
+- uma chamada (comportamento antigo: so as primeiras 1000 chaves);
+- paginacao sequencial (`list_all_objects`);
+- uma listagem por particao dt= em paralelo (`list_partitioned_objects`);
+- leitura do catalogo `_catalog/transactions/` (`read_catalog`, segmentos em paralelo).
+
+Uso:
+    python -m benchmarks.bench_s3_discovery --objects 100000 --partitions 365 --latency-ms 20
+"""
+import argparse
+import bisect
+import io
+import itertools
+import time
+from datetime import date, datetime, timedelta
+
+import pyarrow.parquet as pq
+
+from src.generators.utils import (
+    catalog_table,
+    list_all_objects,
+    list_objects_with_retry,
+    list_partitioned_objects,
+    read_catalog,
+)
+
+PAGE_SIZE = 1000
+BUCKET = "landing-zone"
+
+
+class LatencyS3:
+    """`list_objects_v2`/`get_object` em memoria com latencia fixa por requisicao."""
+
+    def __init__(self, objects: dict, latency: float):
+        self.objects = objects
+        self.keys = sorted(objects)
+        self.latency = latency
+        self.requests = itertools.count()
+
+    def _wait(self):
+        next(self.requests)
+        time.sleep(self.latency)
+
+    def get_object(self, Bucket, Key):
+        self._wait()
+        return {"Body": io.BytesIO(self.objects[Key]), "ContentLength": len(self.objects[Key])}
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None, Delimiter=None):
+        self._wait()
+        end = bisect.bisect_left(self.keys, Prefix + "\uffff")
+        position = bisect.bisect_left(self.keys, Prefix)
+        if ContinuationToken:
+            position = max(position, bisect.bisect_right(self.keys, ContinuationToken))
+        contents, prefixes = [], []
+        while position < end and len(contents) + len(prefixes) < PAGE_SIZE:
+            key = self.keys[position]
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                common = Prefix + rest.split(Delimiter)[0] + Delimiter
+                prefixes.append({"Prefix": common})
+                position = bisect.bisect_left(self.keys, common + "\uffff")
+            else:
+                contents.append({"Key": key, "Size": len(self.objects[key])})
+                position += 1
+        response = {"KeyCount": len(contents) + len(prefixes), "Contents": contents, "CommonPrefixes": prefixes}
+        response["IsTruncated"] = position < end
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = self.keys[position - 1]
+        return response
+
+
+def build_bucket(objects: int, partitions: int, segments: int) -> dict:
+    """Particoes dt= com `objects` arquivos no total e o catalogo equivalente em `segments` segmentos."""
+    first_day = date(2025, 1, 1)
+    entries = []
+    for index in range(objects):
+        day = first_day + timedelta(days=index % partitions)
+        start = datetime.combine(day, datetime.min.time())
+        entries.append({
+            "key": f"transactions/dt={day.isoformat()}/part-00000-{index:07d}-20250101000000.parquet",
+            "rows": 1000,
+            "bytes": 64 * 1024,
+            "min_ts": start.isoformat(),
+            "max_ts": (start + timedelta(hours=23)).isoformat(),
+        })
+    bucket = {entry["key"]: b"" for entry in entries}
+    size = -(-len(entries) // segments)
+    for segment in range(segments):
+        sink = io.BytesIO()
+        pq.write_table(catalog_table("transactions", f"run{segment}", entries[segment * size:(segment + 1) * size]), sink)
+        bucket[f"_catalog/transactions/{segment:05d}-run{segment}.parquet"] = sink.getvalue()
+    return bucket
+
+
+def timed(s3: LatencyS3, discover):
+    start_requests = next(s3.requests)
+    start = time.perf_counter()
+    found = discover()
+    return found, time.perf_counter() - start, next(s3.requests) - start_requests - 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=100_000)
+    parser.add_argument("--partitions", type=int, default=365)
+    parser.add_argument("--catalog-segments", type=int, default=30, help="Segmentos (~execucoes) no catalogo.")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    s3 = LatencyS3(build_bucket(args.objects, args.partitions, args.catalog_segments), args.latency_ms / 1000)
+    prefix = "transactions/"
+    methods = [
+        ("single call", lambda: list_objects_with_retry(s3, BUCKET, prefix)["KeyCount"]),
+        ("paginated", lambda: len(list_all_objects(s3, BUCKET, prefix))),
+        (f"per-partition x{args.workers}", lambda: len(list_partitioned_objects(s3, BUCKET, prefix, args.workers))),
+        ("catalog", lambda: read_catalog(s3, BUCKET, "transactions", args.workers).num_rows),
+    ]
+
+    print(f"{args.objects:,} objects in {args.partitions} partitions, {args.latency_ms:.0f} ms/request")
+    print(f"{'method':<22}{'objects':>10}{'requests':>10}{'seconds':>10}")
+    for name, discover in methods:
+        found, seconds, requests = timed(s3, discover)
+        print(f"{name:<22}{found:>10,}{requests:>10,}{seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
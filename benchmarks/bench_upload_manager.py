@@ -0,0 +1,115 @@
+"""Benchmark: upload sequencial (um arquivo por vez) vs UploadManager concorrente.
+
+Por padrao roda contra um S3 em memoria (moto) com latencia artificial por request,
+simulando o RTT de rede; com --minio usa o endpoint real configurado no .env.
+
+Uso:
+    python -m benchmarks.bench_upload_manager --files 200 --size-kb 512 --latency-ms 20
+    python -m benchmarks.bench_upload_manager --minio --files 500 --workers 16
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+
+from src.generators.utils import (
+    UploadManager,
+    build_s3_client,
+    build_transfer_config,
+    ensure_bucket_exists,
+    get_logger,
+    load_minio_settings,
+    upload_file_with_retry,
+)
+
+logger = get_logger(__name__)
+
+
+def _make_files(directory: str, files: int, size_kb: int):
+    payload = os.urandom(size_kb * 1024)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"part-{i:05d}.bin")
+        with open(path, "wb") as handle:
+            handle.write(payload)
+        paths.append(path)
+    return paths
+
+
+def _add_latency(s3_client, latency_ms: int):
+    if latency_ms <= 0:
+        return
+
+    def _sleep(**_):
+        time.sleep(latency_ms / 1000)
+
+    s3_client.meta.events.register("before-send.s3", _sleep)
+
+
+def bench_sequential(s3_client, bucket: str, paths):
+    start = time.perf_counter()
+    for path in paths:
+        upload_file_with_retry(s3_client, path, bucket, f"bench/seq/{os.path.basename(path)}", logger)
+    return time.perf_counter() - start
+
+
+def bench_manager(s3_client, bucket: str, paths, workers: int):
+    items = [(path, f"bench/pool/{os.path.basename(path)}") for path in paths]
+    manager = UploadManager(s3_client, bucket, logger, max_workers=workers, transfer_config=build_transfer_config())
+    report = manager.upload_many(items)
+    if report.failed:
+        raise RuntimeError(f"{len(report.failed)} upload(s) failed")
+    return report.seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=int, default=20, help="Latencia artificial por request (so no moto).")
+    parser.add_argument("--minio", action="store_true", help="Usa o MinIO/S3 configurado no .env.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+
+    if args.minio:
+        context = nullcontext()
+    else:
+        from moto import mock_aws
+
+        context = mock_aws()
+
+    with context, tempfile.TemporaryDirectory() as tmp:
+        if args.minio:
+            settings = load_minio_settings()
+            bucket = settings.bucket
+            s3_client = build_s3_client(settings, max_pool_connections=args.workers * 4)
+        else:
+            import boto3
+            from botocore.config import Config
+
+            bucket = "bench"
+            s3_client = boto3.client(
+                "s3", region_name="us-east-1", config=Config(max_pool_connections=args.workers * 4)
+            )
+            _add_latency(s3_client, args.latency_ms)
+        ensure_bucket_exists(s3_client, bucket, logger)
+
+        paths = _make_files(tmp, args.files, args.size_kb)
+        total_mb = args.files * args.size_kb / 1024
+
+        sequential = bench_sequential(s3_client, bucket, paths)
+        concurrent = bench_manager(s3_client, bucket, paths, args.workers)
+
+    print(f"\n{args.files} arquivos x {args.size_kb} KB ({total_mb:.1f} MB)")
+    print(f"{'modo':<24}{'seconds':>10}{'MB/s':>10}{'files/s':>10}")
+    for label, seconds in [("sequencial", sequential), (f"UploadManager({args.workers})", concurrent)]:
+        print(f"{label:<24}{seconds:>10.2f}{total_mb / seconds:>10.1f}{args.files / seconds:>10.1f}")
+    print(f"speedup: {sequential / concurrent:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
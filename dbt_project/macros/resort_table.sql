@@ -0,0 +1,16 @@
+{#- Regrava uma tabela ordenada, refazendo os min/max dos row groups depois de muitas
+    cargas incrementais fora de ordem. A troca acontece numa transacao.
+    Uso: dbt run-operation resort_table --args '{model_name: fct_transactions}' -#}
+{% macro resort_table(model_name='fct_transactions', order_by="date_trunc('day', transaction_at), transaction_type, transaction_at") %}
+    {%- set relation = ref(model_name) -%}
+    {%- set resorted = relation.incorporate(path={"identifier": relation.identifier ~ "__resort"}) -%}
+    {%- set sql -%}
+        begin transaction;
+        create or replace table {{ resorted }} as select * from {{ relation }} order by {{ order_by }};
+        drop table {{ relation }};
+        alter table {{ resorted }} rename to {{ relation.identifier }};
+        commit;
+    {%- endset -%}
+    {%- do run_query(sql) -%}
+    {{ log("Resorted " ~ relation ~ " by " ~ order_by, info=True) }}
+{% endmacro %}
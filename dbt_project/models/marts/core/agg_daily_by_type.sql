@@ -0,0 +1,32 @@
+{{ config(
+    materialized='incremental',
+    unique_key=['transaction_day', 'transaction_type', 'counterparty_bank', 'status'],
+    incremental_strategy='delete+insert'
+) }}
+
+{#- Rollup diario para o dashboard. Na carga incremental recalcula a partir do ultimo
+    dia ja agregado (inclusive), que pode ter recebido transacoes novas. O dia entra como
+    literal (e nao subquery) para o DuckDB podar os row groups da fato pelo min/max. -#}
+{%- set watermark = '1900-01-01' -%}
+{%- if is_incremental() and execute -%}
+    {%- set watermark_query -%}
+        select cast(coalesce(max(transaction_day), date '1900-01-01') as varchar) from {{ this }}
+    {%- endset -%}
+    {%- set watermark = run_query(watermark_query).columns[0].values()[0] -%}
+{%- endif %}
+select
+    cast(transaction_at as date) as transaction_day,
+    transaction_type,
+    counterparty_bank,
+    status,
+    movement_type,
+    count(*) as txn_count,
+    sum(amount) as total_amount,
+    max(amount) as max_amount,
+    count(*) filter (where amount > 1000) as over_1k_count,
+    count(*) filter (where amount > 5000) as over_5k_count
+from {{ ref('fct_transactions') }}
+{% if is_incremental() %}
+where transaction_at >= timestamp '{{ watermark }}'
+{% endif %}
+group by 1, 2, 3, 4, 5
@@ -0,0 +1,29 @@
+{{ config(materialized='table') }}
+
+{#- Saldo corrente por conta (consulta pontual e top-N do dashboard). Sai do ledger
+    diario, ordens de grandeza menor que a fato; contas sem movimento ficam com o saldo
+    inicial. Gravada ordenada por account_id: a busca por uma conta poda os row groups
+    pelo min/max e le so um deles. -#}
+with latest as (
+    select
+        account_id,
+        max(balance_date) as last_movement_date,
+        arg_max(closing_balance, balance_date) as current_balance,
+        sum(txn_count) as txn_count
+    from {{ ref('fct_account_balances_daily') }}
+    group by 1
+)
+
+select
+    a.account_id,
+    a.customer_id,
+    a.customer_name,
+    a.account_type,
+    a.status,
+    a.initial_balance_snapshot,
+    coalesce(l.current_balance, a.initial_balance_snapshot) as current_balance,
+    l.last_movement_date,
+    coalesce(l.txn_count, 0) as txn_count
+from {{ ref('dim_accounts') }} a
+left join latest l on a.account_id = l.account_id
+order by a.account_id
@@ -1,6 +1,22 @@
-﻿{{ config(materialized='table') }}
+﻿{{ config(
+    materialized='incremental',
+    unique_key='customer_version_id',
+    incremental_strategy='delete+insert'
+) }}
+
+{#- Cada `dbt snapshot` so abre versoes (dbt_valid_from) e fecha as anteriores
+    (dbt_valid_to) dos clientes cujo row_hash mudou. A carga incremental traz apenas as
+    versoes tocadas a partir do ultimo watermark; as demais linhas nao sao reescritas. -#}
+{%- set watermark = '1900-01-01 00:00:00' -%}
+{%- if is_incremental() and execute -%}
+    {%- set watermark_query -%}
+        select cast(coalesce(max(coalesce(valid_to, valid_from)), timestamp '1900-01-01') as varchar) from {{ this }}
+    {%- endset -%}
+    {%- set watermark = run_query(watermark_query).columns[0].values()[0] -%}
+{%- endif %}
 
 select
+    dbt_scd_id as customer_version_id,
     customer_id,
     first_name,
     last_name,
@@ -14,3 +30,7 @@ select
     dbt_valid_to as valid_to,
     case when dbt_valid_to is null then true else false end as is_current
 from {{ ref('dim_customers_snapshot') }}
+{% if is_incremental() %}
+where dbt_valid_from >= timestamp '{{ watermark }}'
+   or dbt_valid_to >= timestamp '{{ watermark }}'
+{% endif %}
\ No newline at end of file
@@ -0,0 +1,71 @@
+{{ config(
+    materialized='incremental',
+    unique_key=['account_id', 'balance_date'],
+    incremental_strategy='delete+insert'
+) }}
+
+{#- Ledger de saldos: uma linha por conta e dia com movimento (so transacoes COMPLETED),
+    com entradas/saidas pelo movement_type e o saldo de fechamento do dia.
+    Na carga incremental recalcula a partir do ultimo dia ja gravado (inclusive), menos
+    `balance_lookback_days` para absorver cargas tardias da fato; o saldo de abertura de
+    cada conta vem do ultimo fechamento anterior a esse dia (ou do saldo inicial da conta).
+    Assim a fato so e lida a partir do watermark, nunca o historico inteiro. Cargas mais
+    antigas que a janela pedem `dbt run --full-refresh -s fct_account_balances_daily+`. -#}
+{%- set watermark = '1900-01-01' -%}
+{%- if is_incremental() and execute -%}
+    {%- set watermark_query -%}
+        select cast(coalesce(max(balance_date) - {{ var('balance_lookback_days', 0) | int }}, date '1900-01-01') as varchar)
+        from {{ this }}
+    {%- endset -%}
+    {%- set watermark = run_query(watermark_query).columns[0].values()[0] -%}
+{%- endif %}
+
+with daily as (
+    select
+        account_id,
+        cast(transaction_at as date) as balance_date,
+        coalesce(sum(amount) filter (where movement_type = 'INFLOW'), 0) as inflow,
+        coalesce(sum(amount) filter (where movement_type = 'OUTFLOW'), 0) as outflow,
+        count(*) as txn_count
+    from {{ ref('fct_transactions') }}
+    where status = 'COMPLETED'
+    {% if is_incremental() %}
+      and transaction_at >= timestamp '{{ watermark }}'
+    {% endif %}
+    group by 1, 2
+),
+
+opening as (
+    select
+        a.account_id,
+        {% if is_incremental() -%}
+        coalesce(p.closing_balance, a.initial_balance_snapshot) as opening_balance
+        {%- else -%}
+        a.initial_balance_snapshot as opening_balance
+        {%- endif %}
+    from {{ ref('dim_accounts') }} a
+    {% if is_incremental() %}
+    left join (
+        select account_id, arg_max(closing_balance, balance_date) as closing_balance
+        from {{ this }}
+        where balance_date < date '{{ watermark }}'
+        group by 1
+    ) p on a.account_id = p.account_id
+    {% endif %}
+)
+
+select
+    d.account_id,
+    d.balance_date,
+    d.inflow,
+    d.outflow,
+    d.inflow - d.outflow as net_amount,
+    d.txn_count,
+    coalesce(o.opening_balance, 0) + sum(d.inflow - d.outflow) over (
+        partition by d.account_id
+        order by d.balance_date
+        rows between unbounded preceding and current row
+    ) as closing_balance
+from daily d
+left join opening o on d.account_id = o.account_id
+order by d.balance_date, d.account_id
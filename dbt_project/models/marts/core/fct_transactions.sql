@@ -1,11 +1,32 @@
-﻿{{ config(materialized='incremental', unique_key='transaction_id') }}
+﻿{{ config(
+    materialized='incremental',
+    unique_key='transaction_id',
+    incremental_strategy='delete+insert' if var('fct_lookback_minutes', 0) | int > 0 else 'append'
+) }}
+
+{#- Watermark como literal: o DuckDB so poda particoes dt=... com filtros constantes.
+    `fct_lookback_minutes` reprocessa a janela final (uploads do modo realtime terminam
+    fora de ordem); a sobreposicao e resolvida pelo unique_key (delete+insert).
+    Sem lookback a carga so traz linhas depois do watermark, que nao podem estar na
+    tabela, e a landing nao tem lotes duplicados (ingestao idempotente, ver runbook):
+    o append dispensa o delete por transaction_id sobre a tabela inteira.
+    O `order by` grava cada carga agrupada por dia e tipo: os row groups ficam com
+    min/max de transaction_at estreitos e filtros por periodo pulam o resto da tabela.
+    Cargas tardias desordenam a cauda; `make dbt-resort` regrava a tabela ordenada. -#}
+{%- set watermark = '1900-01-01 00:00:00' -%}
+{%- if is_incremental() and execute -%}
+    {%- set watermark_query -%}
+        select cast(coalesce(max(transaction_at) - to_minutes({{ var('fct_lookback_minutes', 0) }}), timestamp '1900-01-01') as varchar)
+        from {{ this }}
+    {%- endset -%}
+    {%- set watermark = run_query(watermark_query).columns[0].values()[0] -%}
+{%- endif %}
 
 with transactions as (
     select * from {{ ref('stg_transactions') }}
     {% if is_incremental() %}
-        where transaction_at > (
-            select coalesce(max(transaction_at), timestamp '1900-01-01') from {{ this }}
-        )
+        where partition_date >= cast(timestamp '{{ watermark }}' as date)
+          and transaction_at > timestamp '{{ watermark }}'
     {% endif %}
 ),
 
@@ -28,3 +49,4 @@ select
     end as movement_type
 from transactions t
 left join accounts a on t.account_id = a.account_id
+order by date_trunc('day', t.transaction_at), t.transaction_type, t.transaction_at
\ No newline at end of file
@@ -1,17 +1,47 @@
 {{ config(materialized='table') }}
 
+{#- Pontua o estado compacto (uma linha por cliente) em vez da fato inteira.
+    Com a var rfm_approx_quantiles=true os quintis vem de approx_quantile (sem
+    ordenar a base inteira), o que vale a pena com dezenas de milhoes de clientes. -#}
+{%- set approx = var('rfm_approx_quantiles', false) -%}
+
 with rfm_base as (
-    -- 1. Calcular as métricas brutas por cliente
-    select 
+    -- 1. Métricas por cliente, lidas do estado incremental (uma linha por cliente)
+    select
         customer_id,
-        max(transaction_at) as last_transaction_date,
-        date_diff('day', max(transaction_at), current_date) as recency_days,
-        count(distinct transaction_id) as frequency,
-        sum(amount) as monetary
-    from {{ ref('fct_transactions') }}
-    group by 1
+        last_transaction_at as last_transaction_date,
+        date_diff('day', last_transaction_at, current_date) as recency_days,
+        frequency,
+        monetary
+    from {{ ref('rfm_customer_state') }}
 ),
 
+{% if approx %}
+breakpoints as (
+    select
+        approx_quantile(recency_days, [0.2, 0.4, 0.6, 0.8]) as r_bp,
+        approx_quantile(frequency, [0.2, 0.4, 0.6, 0.8]) as f_bp,
+        approx_quantile(monetary, [0.2, 0.4, 0.6, 0.8]) as m_bp
+    from rfm_base
+),
+
+rfm_scores as (
+    -- 2. Notas de 1 a 5 pelos pontos de corte aproximados dos quintis (sem window sort)
+    select
+        customer_id,
+        recency_days,
+        frequency,
+        monetary,
+        -- Para Recência: Quem tem MENOS dias ganha nota MAIOR (5)
+        1 + (recency_days < r_bp[4])::int + (recency_days < r_bp[3])::int
+          + (recency_days < r_bp[2])::int + (recency_days < r_bp[1])::int as r_score,
+        1 + (frequency > f_bp[1])::int + (frequency > f_bp[2])::int
+          + (frequency > f_bp[3])::int + (frequency > f_bp[4])::int as f_score,
+        1 + (monetary > m_bp[1])::int + (monetary > m_bp[2])::int
+          + (monetary > m_bp[3])::int + (monetary > m_bp[4])::int as m_score
+    from rfm_base, breakpoints
+)
+{% else %}
 rfm_scores as (
     -- 2. Atribuir notas de 1 a 5 (Quintis)
     select 
@@ -26,6 +56,7 @@ rfm_scores as (
         ntile(5) over (order by monetary asc) as m_score
     from rfm_base
 )
+{% endif %}
 
 select 
     customer_id,
@@ -0,0 +1,44 @@
+{{ config(
+    materialized='incremental',
+    unique_key='customer_id',
+    incremental_strategy='delete+insert'
+) }}
+
+{#- Estado RFM acumulado por cliente (ultima transacao, quantidade, soma). Na carga
+    incremental so as transacoes apos o watermark sao agregadas e somadas ao estado
+    anterior dos clientes afetados; os demais clientes nao sao tocados. -#}
+{%- set watermark = '1900-01-01 00:00:00' -%}
+{%- if is_incremental() and execute -%}
+    {%- set watermark_query -%}
+        select cast(coalesce(max(last_transaction_at), timestamp '1900-01-01') as varchar) from {{ this }}
+    {%- endset -%}
+    {%- set watermark = run_query(watermark_query).columns[0].values()[0] -%}
+{%- endif %}
+
+with new_activity as (
+    select
+        customer_id,
+        min(transaction_at) as first_transaction_at,
+        max(transaction_at) as last_transaction_at,
+        count(*) as frequency,
+        sum(amount) as monetary
+    from {{ ref('fct_transactions') }}
+    where customer_id is not null
+    {% if is_incremental() %}
+      and transaction_at > timestamp '{{ watermark }}'
+    {% endif %}
+    group by 1
+)
+
+{% if is_incremental() %}
+select
+    n.customer_id,
+    coalesce(s.first_transaction_at, n.first_transaction_at) as first_transaction_at,
+    greatest(n.last_transaction_at, s.last_transaction_at) as last_transaction_at,
+    n.frequency + coalesce(s.frequency, 0) as frequency,
+    n.monetary + coalesce(s.monetary, 0) as monetary
+from new_activity n
+left join {{ this }} s on n.customer_id = s.customer_id
+{% else %}
+select * from new_activity
+{% endif %}
@@ -1,5 +1,14 @@
 {{ config(materialized='view') }}
 
+{#- Os deltas do gerador (`customers_<run_id>_delta`) repetem clientes com `updated_at`
+    maior: fica so a versao mais recente de cada id. `row_hash` resume as colunas
+    versionadas, e o snapshot compara apenas ele. -#}
+with latest as (
+    select *
+    from {{ source('landing_zone', 'customers') }}
+    qualify row_number() over (partition by id order by cast(updated_at as timestamp) desc) = 1
+)
+
 select
     id as customer_id,
     first_name,
@@ -8,5 +17,6 @@ select
     cpf,
     risk_profile,
     cast(created_at as timestamp) as created_at,
-    cast(updated_at as timestamp) as updated_at
-from {{ source('landing_zone', 'customers') }}
\ No newline at end of file
+    cast(updated_at as timestamp) as updated_at,
+    {{ dbt_utils.generate_surrogate_key(['first_name', 'last_name', 'email', 'risk_profile']) }} as row_hash
+from latest
\ No newline at end of file
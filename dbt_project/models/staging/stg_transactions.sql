@@ -7,5 +7,6 @@ select
     transaction_type,
     cast(transaction_date as timestamp) as transaction_at,
     counterparty_bank,
-    status
+    status,
+    cast(dt as date) as partition_date
 from {{ source('landing_zone', 'transactions') }}
\ No newline at end of file
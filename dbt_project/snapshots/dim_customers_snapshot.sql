@@ -5,10 +5,11 @@
         target_schema='snapshots',
         unique_key='customer_id',
         strategy='check',
-        check_cols=['risk_profile', 'email', 'first_name', 'last_name']
+        check_cols=['row_hash']
     )
 }}
 
+-- row_hash (stg_customers) cobre risk_profile, email, first_name e last_name
 select
     customer_id,
     first_name,
@@ -17,7 +18,8 @@ select
     cpf,
     risk_profile,
     created_at,
-    updated_at
+    updated_at,
+    row_hash
 from {{ ref('stg_customers') }}
 
 {% endsnapshot %}
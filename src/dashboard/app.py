@@ -1,8 +1,28 @@
-﻿import streamlit as st
-import duckdb
+﻿import contextlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import zlib
+
+import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.dashboard.db import DuckDBConnectionManager
+from src.generators.utils import METRICS
+from src.dashboard.downsampling import (
+    RISK_THRESHOLD,
+    choose_mode,
+    density_bins,
+    lttb_points,
+    minmax_points,
+    risk_outliers,
+)
 
 # --- 1. ConfiguraÃ§Ã£o da PÃ¡gina ---
 st.set_page_config(
@@ -26,29 +46,56 @@ st.markdown("""
 
 # --- 2. ConexÃ£o Otimizada ---
 DB_PATH = "data/luisbank.duckdb"
+METRICS_WRITE_INTERVAL = float(os.getenv("METRICS_WRITE_INTERVAL", "5"))
+SCATTER_WIDTH = 1200  # pontos por tipo ~ largura em pixels do grafico
+
+@st.cache_resource
+def get_db():
+    return DuckDBConnectionManager(DB_PATH, idle_timeout=float(os.getenv("DUCKDB_IDLE_TIMEOUT", "30")))
+
+
+_query_state = threading.local()
+
 
 @st.cache_data(ttl=300)
+def cached_query(query, params, db_version):
+    # db_version (mtime do .duckdb) entra na chave: um novo dbt run invalida o cache na hora
+    _query_state.miss = True
+    return get_db().query_arrow(query, params)
+
+
+def query_name(query):
+    """Rotulo estavel da consulta nas metricas: tabela principal + hash do SQL."""
+    match = re.search(r"FROM\s+main\.(\w+)", query)
+    digest = zlib.crc32(" ".join(query.split()).encode()) & 0xFFFF
+    return f"{match.group(1) if match else 'query'}#{digest:04x}"
+
+
+def get_arrow(query, params=None):
+    # Latencia por consulta e hit/miss do cache; com METRICS_PATH o arquivo e regravado
+    # no maximo a cada METRICS_WRITE_INTERVAL segundos (as sessoes compartilham o registro)
+    _query_state.miss = False
+    with METRICS.span(f"dashboard.query.{query_name(query)}") as span:
+        table = cached_query(query, params, get_db().version())
+        span.rows, span.bytes = table.num_rows, table.nbytes
+    METRICS.increment("dashboard_cache", "miss" if _query_state.miss else "hit")
+    METRICS.write(min_interval=METRICS_WRITE_INTERVAL)
+    return table
+
+
 def get_data(query, params=None):
-    con = duckdb.connect(DB_PATH, read_only=True)
-    try:
-        if params:
-            df = con.execute(query, params).df()
-        else:
-            df = con.execute(query).df()
-        return df
-    finally:
-        con.close()
+    return get_arrow(query, params).to_pandas(split_blocks=True, self_destruct=False)
 
 # --- 3. Sidebar de Filtros ---
 with st.sidebar:
     st.title("ParÃ¢metros")
     
     try:
-        dates_df = get_data(
-            "SELECT min(transaction_at) as min_d, max(transaction_at) as max_d FROM main.fct_transactions"
+        dates = get_arrow(
+            "SELECT min(transaction_day) as min_d, max(transaction_day) as max_d FROM main.agg_daily_by_type"
         )
-        min_date = dates_df['min_d'][0].date()
-        max_date = dates_df['max_d'][0].date()
+        min_date = dates['min_d'][0].as_py()
+        max_date = dates['max_d'][0].as_py()
     except:
         min_date = date.today()
         max_date = date.today()
@@ -80,18 +127,38 @@ if not tipo_transacao:
     st.warning("Selecione um tipo de transaÃ§Ã£o.")
     st.stop()
 
-main_query = """
-    SELECT * FROM main.fct_transactions 
-    WHERE cast(transaction_at as date) BETWEEN ? AND ?
+# Filtros comuns ao rollup diario (agg_daily_by_type) e a fato, sempre como intervalo
+# semiaberto sobre a coluna crua: sem cast na coluna o DuckDB poda row groups pelo min/max
+ROLLUP_FILTER = """
+    WHERE transaction_day >= ? AND transaction_day < ?
     AND transaction_type IN (SELECT * FROM UNNEST(?))
 """
-df_main = get_data(main_query, [start_date, end_date, tipo_transacao])
+filter_params = [start_date, end_date + timedelta(days=1), tipo_transacao]
+fact_params = [
+    datetime.combine(start_date, time.min),
+    datetime.combine(end_date + timedelta(days=1), time.min),
+    tipo_transacao,
+]
+
+kpi = get_arrow(
+    f"""
+    SELECT
+        coalesce(sum(total_amount), 0) as total_vol,
+        coalesce(sum(txn_count), 0) as total_txns,
+        coalesce(sum(over_5k_count), 0) as risk_txns,
+        coalesce(sum(over_1k_count), 0) as audit_txns
+    FROM main.agg_daily_by_type
+    {ROLLUP_FILTER}
+    """,
+    filter_params,
+)
 
 # --- 5. LÃ³gica de KPIs ---
-total_vol = df_main['amount'].sum()
-total_txns = df_main.shape[0]
-avg_ticket = df_main['amount'].mean() if total_txns > 0 else 0
-risk_txns = df_main[df_main['amount'] > 5000].shape[0]
+total_vol = float(kpi['total_vol'][0].as_py())
+total_txns = int(kpi['total_txns'][0].as_py())
+avg_ticket = total_vol / total_txns if total_txns > 0 else 0
+risk_txns = int(kpi['risk_txns'][0].as_py())
+audit_txns = int(kpi['audit_txns'][0].as_py())
 
 # --- 6. Layout ---
 st.title("LuisBank Financial Overview")
@@ -109,21 +176,26 @@ c4.metric(
 
 st.markdown("---")
 
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "VisÃ£o Temporal",
     "ComposiÃ§Ã£o",
     "Marketing & CRM",
-    "Auditoria"
+    "Auditoria",
+    "Saldos"
 ])
 
 # TAB 1: Temporal
 with tab1:
-    if not df_main.empty:
-        daily_df = (
-            df_main
-            .groupby(df_main['transaction_at'].dt.date)['amount']
-            .sum()
-            .reset_index()
+    if total_txns > 0:
+        daily_df = get_data(
+            f"""
+            SELECT transaction_day as transaction_at, sum(total_amount) as amount
+            FROM main.agg_daily_by_type
+            {ROLLUP_FILTER}
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            filter_params,
         )
         fig = px.area(
             daily_df,
@@ -143,14 +215,17 @@ with tab1:
 
 # TAB 2: ComposiÃ§Ã£o
 with tab2:
-    if not df_main.empty:
+    if total_txns > 0:
         col_a, col_b = st.columns(2)
         with col_a:
-            type_df = (
-                df_main
-                .groupby('transaction_type')['amount']
-                .sum()
-                .reset_index()
+            type_df = get_data(
+                f"""
+                SELECT transaction_type, sum(total_amount) as amount
+                FROM main.agg_daily_by_type
+                {ROLLUP_FILTER}
+                GROUP BY 1
+                """,
+                filter_params,
             )
             fig_bar = px.bar(
                 type_df,
@@ -162,18 +237,115 @@ with tab2:
             )
             st.plotly_chart(fig_bar, use_container_width=True)
         with col_b:
+            bank_df = get_data(
+                f"""
+                SELECT counterparty_bank, transaction_type, sum(total_amount) as amount
+                FROM main.agg_daily_by_type
+                {ROLLUP_FILTER}
+                GROUP BY 1, 2
+                ORDER BY 3 DESC
+                """,
+                filter_params,
+            )
+            fig_bank = px.bar(
+                bank_df,
+                y='counterparty_bank',
+                x='amount',
+                color='transaction_type',
+                orientation='h',
+                title="Volume por Banco"
+            )
+            st.plotly_chart(fig_bank, use_container_width=True)
+
+        # Scatter reduzido no DuckDB: o payload fica limitado pela largura do grafico,
+        # nao pelo tamanho do periodo. Transacoes de risco (>5k) aparecem sempre.
+        scatter_mode = st.radio(
+            "Modo do grÃ¡fico de dispersÃ£o",
+            ["AutomÃ¡tico", "LTTB", "Min/Max", "Densidade"],
+            horizontal=True
+        )
+        if scatter_mode == "AutomÃ¡tico":
+            scatter_mode = "Densidade" if choose_mode(total_txns) == "density" else "LTTB"
+
+        if scatter_mode == "Densidade":
+            density_df = density_bins(get_arrow, start_date, end_date, tipo_transacao).to_pandas()
+            fig_scat = px.density_heatmap(
+                density_df,
+                x='transaction_at',
+                y='amount',
+                z='transactions',
+                histfunc='sum',
+                nbinsx=200,
+                nbinsy=60,
+                title="DispersÃ£o de TransaÃ§Ãµes (densidade)"
+            )
+        else:
+            if scatter_mode == "LTTB":
+                points = lttb_points(get_arrow, start_date, end_date, tipo_transacao, SCATTER_WIDTH)
+            else:
+                points = minmax_points(get_arrow, start_date, end_date, tipo_transacao, SCATTER_WIDTH // 2)
             fig_scat = px.scatter(
-                df_main,
+                points.to_pandas(),
                 x='transaction_at',
                 y='amount',
                 color='transaction_type',
-                title="DispersÃ£o de TransaÃ§Ãµes"
+                title=f"DispersÃ£o de TransaÃ§Ãµes ({scatter_mode}, {points.num_rows} pontos)"
             )
-            st.plotly_chart(fig_scat, use_container_width=True)
+        outliers_df = risk_outliers(get_arrow, start_date, end_date, tipo_transacao).to_pandas()
+        fig_scat.add_scatter(
+            x=outliers_df['transaction_at'],
+            y=outliers_df['amount'],
+            mode='markers',
+            marker=dict(color='red', symbol='x', size=8),
+            name=f"Risco (>{RISK_THRESHOLD // 1000}k)"
+        )
+        st.plotly_chart(fig_scat, use_container_width=True)
     else:
         st.info("Sem dados no perÃ­odo.")
 
 # TAB 3: Marketing & CRM
+RISK_PAGE_SIZE = 50
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "luisbank_exports")
+
+# dim_customers e SCD2: sem o filtro is_current cada versao antiga do cliente viraria uma linha
+RISK_LIST_QUERY = """
+    SELECT
+        r.customer_id,
+        c.email,
+        c.first_name,
+        r.recency_days,
+        r.monetary as total_gasto
+    FROM main.dm_rfm_segmentation r
+    JOIN main.dim_customers c
+      ON r.customer_id = c.customer_id
+     AND c.is_current
+    WHERE r.customer_segment LIKE '%Risk%'
+"""
+
+
+def export_risk_list(file_format):
+    """Exporta a lista completa via COPY ... TO (um arquivo por versao do banco)."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prefix = f"campanha_winback_{get_db().version()}."
+    path = os.path.join(EXPORT_DIR, prefix + file_format)
+    if not os.path.exists(path):
+        for stale in os.listdir(EXPORT_DIR):
+            if not stale.startswith(prefix):
+                # Outra sessao pode ter apagado o mesmo arquivo antes
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(EXPORT_DIR, stale))
+        get_db().copy_to(RISK_LIST_QUERY + " ORDER BY r.monetary DESC", path, file_format)
+    return path
+
+
+def risk_list_file(file_format):
+    """Callable do download: so exporta e le o arquivo quando o botao e clicado."""
+    def read():
+        with open(export_risk_list(file_format), "rb") as fh:
+            return fh.read()
+    return read
+
+
 with tab3:
     st.subheader("SegmentaÃ§Ã£o Inteligente (RFM)")
     
@@ -219,20 +391,18 @@ with tab3:
         st.markdown("#### AÃ§Ã£o Recomendada: Resgatar Clientes em Risco")
         st.caption("Baixe a lista abaixo e envie para o time de Marketing.")
         
-        risk_list_query = """
-            SELECT
-                r.customer_id,
-                c.email,
-                c.first_name,
-                r.recency_days,
-                r.monetary as total_gasto
-            FROM main.dm_rfm_segmentation r
-            JOIN main.dim_customers c
-              ON r.customer_id = c.customer_id
-            WHERE r.customer_segment LIKE '%Risk%'
-            ORDER BY r.monetary DESC
-        """
-        df_risk_list = get_data(risk_list_query)
+        risk_total = int(at_risk)
+        total_risk_pages = max(1, (risk_total - 1) // RISK_PAGE_SIZE + 1)
+        risk_page = st.number_input(
+            f"PÃ¡gina da lista (de {total_risk_pages}, {risk_total} clientes em risco)",
+            min_value=1,
+            max_value=total_risk_pages,
+            value=1
+        )
+        df_risk_list = get_arrow(
+            RISK_LIST_QUERY + " ORDER BY r.monetary DESC, r.customer_id LIMIT ? OFFSET ?",
+            [RISK_PAGE_SIZE, (risk_page - 1) * RISK_PAGE_SIZE],
+        )
         
         st.dataframe(
             df_risk_list,
@@ -240,11 +410,13 @@ with tab3:
             use_container_width=True
         )
         
+        export_format = st.radio("Formato do arquivo", ["CSV", "Parquet"], horizontal=True)
+        # Com um callable o arquivo nao e lido nem registrado na memoria a cada rerun
         st.download_button(
-            "Baixar Lista de Resgate (CSV)",
-            data=df_risk_list.to_csv(index=False).encode('utf-8'),
-            file_name="campanha_winback_luisbank.csv",
-            mime="text/csv"
+            f"Baixar Lista de Resgate ({export_format})",
+            data=risk_list_file(export_format.lower()),
+            file_name=f"campanha_winback_luisbank.{export_format.lower()}",
+            mime="text/csv" if export_format == "CSV" else "application/octet-stream"
         )
         
     except Exception as e:
@@ -255,18 +427,76 @@ with tab3:
         )
 
 # TAB 4: Auditoria
+AUDIT_PAGE_SIZE = 100
+
 with tab4:
-    if not df_main.empty:
+    if audit_txns > 0:
         st.subheader("Auditoria de TransaÃ§Ãµes")
-        audit_df = (
-            df_main[df_main['amount'] > 1000]
-            .sort_values('amount', ascending=False)
+        total_pages = (audit_txns - 1) // AUDIT_PAGE_SIZE + 1
+        page = st.number_input(
+            f"PÃ¡gina (de {total_pages}, {audit_txns} transaÃ§Ãµes > R$ 1.000)",
+            min_value=1,
+            max_value=total_pages,
+            value=1
+        )
+        audit_df = get_arrow(
+            """
+            SELECT transaction_id, amount, status, counterparty_bank
+            FROM main.fct_transactions
+            WHERE transaction_at >= ? AND transaction_at < ?
+            AND transaction_type IN (SELECT * FROM UNNEST(?))
+            AND amount > 1000
+            ORDER BY amount DESC, transaction_id
+            LIMIT ? OFFSET ?
+            """,
+            fact_params + [AUDIT_PAGE_SIZE, (page - 1) * AUDIT_PAGE_SIZE],
         )
         st.dataframe(
-            audit_df[
-                ['transaction_id', 'amount', 'status', 'counterparty_bank']
-            ],
+            audit_df,
             use_container_width=True
         )
     else:
         st.info("Sem dados no perÃ­odo.")
+
+# TAB 5: Saldos
+# dim_account_balances ja traz o saldo corrente por conta (ledger incremental do dbt):
+# a busca e o top-N leem uma linha por conta em vez de somar a fato inteira
+BALANCE_COLUMNS = """
+    SELECT account_id, customer_name, account_type, current_balance, last_movement_date, txn_count
+    FROM main.dim_account_balances
+"""
+TOP_BALANCES_OPTIONS = [10, 25, 50, 100]
+
+with tab5:
+    try:
+        st.subheader("Saldo por Conta")
+        account_id = st.text_input("ID da conta").strip()
+        if account_id:
+            balance = get_arrow(BALANCE_COLUMNS + " WHERE account_id = ?", [account_id])
+            if balance.num_rows:
+                row = balance.to_pylist()[0]
+                col_bal1, col_bal2, col_bal3 = st.columns(3)
+                col_bal1.metric("Saldo Atual", f"R$ {row['current_balance']:,.2f}")
+                col_bal2.metric("Ultimo Movimento", str(row['last_movement_date'] or "-"))
+                col_bal3.metric("Transacoes", row['txn_count'])
+                st.caption(f"{row['customer_name']} | {row['account_type']}")
+            else:
+                st.info("Conta nao encontrada.")
+
+        st.markdown("#### Maiores Saldos")
+        top_n = st.selectbox("Quantidade de contas", TOP_BALANCES_OPTIONS)
+        top_balances = get_arrow(
+            BALANCE_COLUMNS + " ORDER BY current_balance DESC, account_id LIMIT ?",
+            [top_n],
+        )
+        st.dataframe(
+            top_balances,
+            hide_index=True,
+            use_container_width=True
+        )
+    except Exception as e:
+        st.error(
+            "Erro ao carregar saldos. "
+            "Execute o pipeline completo (make pipeline). "
+            f"Detalhe: {e}"
+        )
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Sequence
+
+import duckdb
+import pyarrow as pa
+
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+
+class DuckDBConnectionManager:
+    """Conexao read-only compartilhada entre sessoes do Streamlit, com um cursor por thread.
+
+    O DuckDB trava o arquivo: enquanto houver uma conexao aberta, nem o `dbt run`
+    consegue escrever. Por isso a conexao e fechada apos `idle_timeout` segundos sem
+    consultas e reaberta na proxima, ja enxergando o que o dbt gravou.
+    """
+
+    def __init__(self, db_path: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.db_path = db_path
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connection = None
+        self._connection_version = None
+        self._generation = 0
+        self._cursors = []
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+
+    def version(self) -> int:
+        """mtime (ns) do arquivo do banco; muda a cada `dbt run` e entra na chave do cache."""
+        try:
+            return os.stat(self.db_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _close_locked(self) -> None:
+        for cursor in self._cursors:
+            cursor.close()
+        self._cursors = []
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+
+    def _cursor_locked(self):
+        version = self.version()
+        if self._connection is not None and version != self._connection_version and self._active == 1:
+            self._close_locked()
+        if self._connection is None:
+            self._connection = duckdb.connect(self.db_path, read_only=True)
+            self._connection_version = version
+            self._generation += 1
+        if getattr(self._local, "generation", None) != self._generation:
+            self._local.cursor = self._connection.cursor()
+            self._local.generation = self._generation
+            self._cursors.append(self._local.cursor)
+        return self._local.cursor
+
+    @contextmanager
+    def cursor(self):
+        """Cursor da thread atual; a conexao nao e liberada enquanto ele estiver em uso."""
+        with self._lock:
+            self._active += 1
+            try:
+                cursor = self._cursor_locked()
+            except Exception:
+                self._active -= 1
+                raise
+        try:
+            yield cursor
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.monotonic()
+                self._schedule_release_locked()
+
+    def query_arrow(self, query: str, params: Optional[Sequence] = None) -> pa.Table:
+        """Executa a consulta no cursor da thread atual e devolve uma tabela Arrow."""
+        with self.cursor() as cursor:
+            return cursor.execute(query, params or []).arrow()
+
+    def copy_to(self, query: str, path: str, file_format: str = "csv") -> str:
+        """Grava o resultado direto em arquivo com `COPY ... TO`, sem passar pelo Python.
+
+        Escreve num temporario unico por chamada e renomeia, para nunca servir um arquivo
+        pela metade; sessoes exportando o mesmo `path` ao mesmo tempo nao colidem e a
+        ultima a renomear so substitui um arquivo de mesmo conteudo.
+        """
+        options = {"csv": "FORMAT csv, HEADER", "parquet": "FORMAT parquet, COMPRESSION zstd"}[file_format]
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        escaped = temp_path.replace("'", "''")
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(f"COPY ({query}) TO '{escaped}' ({options})")
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+    def _schedule_release_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.idle_timeout, self._release_if_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _release_if_idle(self) -> None:
+        with self._lock:
+            if self._active == 0 and time.monotonic() - self._last_used >= self.idle_timeout:
+                self._close_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._close_locked()
+
+    @property
+    def is_open(self) -> bool:
+        return self._connection is not None
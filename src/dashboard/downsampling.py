@@ -0,0 +1,159 @@
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Sequence
+
+import numpy as np
+import pyarrow as pa
+
+RISK_THRESHOLD = 5000
+DEFAULT_WIDTH = 1200
+DEFAULT_OUTLIER_LIMIT = 2000
+DENSITY_ROW_THRESHOLD = 2_000_000
+LTTB_OVERSAMPLING = 4
+
+QueryFn = Callable[[str, list], pa.Table]
+
+_RANGE_FILTER = """
+    WHERE transaction_at >= ? AND transaction_at < ?
+    AND transaction_type IN (SELECT * FROM UNNEST(?))
+"""
+
+
+def _bounds(start_date: date, end_date: date):
+    """Intervalo semiaberto [inicio do start_date, inicio do dia seguinte ao end_date)."""
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+    return start, end, (end - start).total_seconds()
+
+
+def _bucket_expr(buckets: int, span_seconds: float) -> str:
+    return f"least({buckets - 1}, floor((epoch(transaction_at) - epoch(?::timestamp)) * {buckets / span_seconds!r}))::int"
+
+
+def minmax_points(query: QueryFn, start_date: date, end_date: date, types: Sequence[str], buckets: int) -> pa.Table:
+    """Por tipo e por bucket de tempo, devolve o ponto de menor e o de maior valor (<= 2 * buckets por tipo).
+
+    Preserva picos e vales, que e o que o olho procura num scatter de valores.
+    """
+    start, end, span = _bounds(start_date, end_date)
+    sql = f"""
+        WITH bucketed AS (
+            SELECT transaction_type, {_bucket_expr(buckets, span)} AS bucket, transaction_at, amount
+            FROM main.fct_transactions
+            {_RANGE_FILTER}
+        ),
+        extremes AS (
+            SELECT
+                transaction_type,
+                bucket,
+                arg_min(transaction_at, amount) AS min_at,
+                min(amount) AS min_amount,
+                arg_max(transaction_at, amount) AS max_at,
+                max(amount) AS max_amount
+            FROM bucketed
+            GROUP BY 1, 2
+        )
+        SELECT transaction_type, bucket, min_at AS transaction_at, min_amount AS amount FROM extremes
+        UNION
+        SELECT transaction_type, bucket, max_at, max_amount FROM extremes
+        ORDER BY transaction_type, transaction_at
+    """
+    return query(sql, [start, start, end, list(types)])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices de `threshold` pontos que preservam a forma da serie."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean() if next_hi > next_lo else x[-1]
+        avg_y = y[next_lo:next_hi].mean() if next_hi > next_lo else y[-1]
+        area = np.abs(
+            (x[previous] - avg_x) * (y[lo:hi] - y[previous]) - (x[previous] - x[lo:hi]) * (avg_y - y[previous])
+        )
+        previous = lo + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def lttb_points(query: QueryFn, start_date: date, end_date: date, types: Sequence[str], width: int) -> pa.Table:
+    """LTTB por tipo com `width` pontos.
+
+    O DuckDB reduz primeiro a faixa para min/max em `LTTB_OVERSAMPLING * width`
+    buckets; o LTTB roda em numpy sobre esse resultado, que tem tamanho limitado
+    independente do periodo.
+    """
+    reduced = minmax_points(query, start_date, end_date, types, width * LTTB_OVERSAMPLING)
+    if reduced.num_rows == 0:
+        return reduced.select(["transaction_type", "transaction_at", "amount"])
+
+    types_col = reduced.column("transaction_type").to_numpy(zero_copy_only=False)
+    at = reduced.column("transaction_at").cast(pa.int64()).to_numpy()
+    amount = reduced.column("amount").to_numpy()
+    keep = []
+    for transaction_type in np.unique(types_col):
+        rows = np.flatnonzero(types_col == transaction_type)
+        keep.append(rows[lttb_indices(at[rows].astype(float), amount[rows], width)])
+    return reduced.take(pa.array(np.concatenate(keep))).select(["transaction_type", "transaction_at", "amount"])
+
+
+def density_bins(
+    query: QueryFn,
+    start_date: date,
+    end_date: date,
+    types: Sequence[str],
+    x_bins: int = 200,
+    y_bins: int = 60,
+) -> pa.Table:
+    """Grade tempo x valor com a contagem de transacoes por celula (modo densidade)."""
+    start, end, span = _bounds(start_date, end_date)
+    step_us = span / x_bins * 1_000_000
+    sql = f"""
+        WITH scoped AS (
+            SELECT {_bucket_expr(x_bins, span)} AS bucket, amount
+            FROM main.fct_transactions
+            {_RANGE_FILTER}
+        ),
+        limits AS (SELECT max(amount) AS max_amount FROM scoped)
+        SELECT
+            ?::timestamp + to_microseconds(((bucket + 0.5) * {step_us!r})::bigint) AS transaction_at,
+            (least({y_bins - 1}, floor(amount / nullif(max_amount, 0) * {y_bins}))::int + 0.5)
+                * max_amount / {y_bins} AS amount,
+            count(*) AS transactions
+        FROM scoped, limits
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """
+    return query(sql, [start, start, end, list(types), start])
+
+
+def risk_outliers(
+    query: QueryFn,
+    start_date: date,
+    end_date: date,
+    types: Sequence[str],
+    threshold: float = RISK_THRESHOLD,
+    limit: int = DEFAULT_OUTLIER_LIMIT,
+) -> pa.Table:
+    """Transacoes acima do limite de risco, sempre exibidas (as `limit` maiores)."""
+    start, end, _ = _bounds(start_date, end_date)
+    sql = f"""
+        SELECT transaction_type, transaction_at, amount
+        FROM main.fct_transactions
+        {_RANGE_FILTER}
+        AND amount > ?
+        ORDER BY amount DESC
+        LIMIT ?
+    """
+    return query(sql, [start, end, list(types), threshold, limit])
+
+
+def choose_mode(row_count: int, density_threshold: int = DENSITY_ROW_THRESHOLD) -> str:
+    return "density" if row_count > density_threshold else "lttb"
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
+
+from src.generators.utils import get_object_with_retry, put_object_with_retry, upload_file_with_retry
+
+ACCOUNT_INDEX_PREFIX = "_index/accounts"
+ACCOUNT_INDEX_POINTER = f"{ACCOUNT_INDEX_PREFIX}/LATEST.json"
+ACCOUNT_INDEX_SCHEMA = pa.schema([("id", pa.string()), ("customer_id", pa.string())])
+DEFAULT_CACHE_DIR = os.path.join("data", "_cache", "account_index")
+
+
+def read_account_columns(local_path: str) -> pa.Table:
+    """Le apenas id/customer_id de um arquivo de contas local (Parquet ou JSONL)."""
+    if local_path.endswith(".parquet"):
+        table = pq.read_table(local_path, columns=ACCOUNT_INDEX_SCHEMA.names)
+    else:
+        table = pa_json.read_json(local_path).select(ACCOUNT_INDEX_SCHEMA.names)
+    return table.cast(ACCOUNT_INDEX_SCHEMA)
+
+
+def build_account_index(tables: Iterable[pa.Table], previous: Optional[pa.Table] = None) -> pa.Table:
+    """Une as contas novas ao indice anterior, sem duplicatas e ordenado por id.
+
+    As tabelas novas vem antes do indice anterior, entao em caso de id repetido
+    prevalece o `customer_id` mais recente.
+    """
+    parts = [table.cast(ACCOUNT_INDEX_SCHEMA) for table in tables]
+    if previous is not None:
+        parts.append(previous.cast(ACCOUNT_INDEX_SCHEMA))
+    if not parts:
+        return ACCOUNT_INDEX_SCHEMA.empty_table()
+
+    merged = pa.concat_tables(parts)
+    ids = merged.column("id").to_numpy(zero_copy_only=False).astype(str)
+    _, first = np.unique(ids, return_index=True)
+    return merged.take(pa.array(first)).combine_chunks()
+
+
+def _pointer_path() -> str:
+    return os.path.join("data", ACCOUNT_INDEX_POINTER)
+
+
+def write_account_index(s3_client, bucket: str, index: pa.Table, run_id: str, logger: logging.Logger) -> dict:
+    """Grava o indice (Arrow IPC) e depois o ponteiro LATEST.json (local + S3).
+
+    O arquivo do indice e imutavel (uma chave por execucao); trocar o ponteiro por
+    ultimo garante que leitores nunca vejam um indice pela metade.
+    """
+    s3_key = f"{ACCOUNT_INDEX_PREFIX}/accounts_index_{run_id}.arrow"
+    local_path = os.path.join("data", s3_key)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    temp_path = f"{local_path}.tmp"
+    with pa.OSFile(temp_path, "wb") as sink, pa.ipc.new_file(sink, ACCOUNT_INDEX_SCHEMA) as writer:
+        writer.write_table(index)
+    os.replace(temp_path, local_path)
+
+    pointer = {"key": s3_key, "run_id": run_id, "rows": index.num_rows, "bytes": os.path.getsize(local_path)}
+    payload = json.dumps(pointer, indent=2).encode("utf-8")
+    temp_path = f"{_pointer_path()}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(payload)
+    os.replace(temp_path, _pointer_path())
+
+    if s3_client is not None:
+        upload_file_with_retry(s3_client, local_path, bucket, s3_key, logger)
+        put_object_with_retry(s3_client, bucket, ACCOUNT_INDEX_POINTER, payload)
+    logger.info("Account index written: %s (%s accounts)", s3_key, index.num_rows)
+    return pointer
+
+
+def _is_status(exc: ClientError, *statuses: str) -> bool:
+    error = exc.response.get("Error", {})
+    status = str(exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", ""))
+    return error.get("Code") in statuses or status in statuses
+
+
+def read_account_index_pointer(s3_client, bucket: str) -> Optional[dict]:
+    """Le LATEST.json do S3 (ou do disco se `s3_client` for None); None se nao existir."""
+    if s3_client is None:
+        if not os.path.exists(_pointer_path()):
+            return None
+        with open(_pointer_path(), encoding="utf-8") as handle:
+            return json.load(handle)
+    try:
+        obj = get_object_with_retry(s3_client, bucket, ACCOUNT_INDEX_POINTER)
+    except ClientError as exc:
+        if _is_status(exc, "NoSuchKey", "404"):
+            return None
+        raise
+    return json.loads(obj["Body"].read())
+
+
+def _open_ipc(path: str) -> pa.Table:
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def load_account_index(
+    s3_client,
+    bucket: str,
+    logger: logging.Logger,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    key: Optional[str] = None,
+) -> Optional[pa.Table]:
+    """Baixa o indice de contas apontado por LATEST.json (ou o `key` pedido), com cache local por ETag.
+
+    Se o arquivo ja estiver em cache, faz um GET condicional (If-None-Match) e
+    reaproveita o disco quando o S3 responde 304. Retorna None se nao houver indice.
+    """
+    pointer = {"key": key} if key else read_account_index_pointer(s3_client, bucket)
+    if pointer is None:
+        return None
+    if s3_client is None:
+        return _open_ipc(os.path.join("data", pointer["key"]))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, os.path.basename(pointer["key"]))
+    etag_path = f"{cache_path}.etag"
+    cached_etag = None
+    if os.path.exists(cache_path) and os.path.exists(etag_path):
+        with open(etag_path, encoding="utf-8") as handle:
+            cached_etag = handle.read().strip()
+
+    try:
+        if cached_etag:
+            obj = s3_client.get_object(Bucket=bucket, Key=pointer["key"], IfNoneMatch=cached_etag)
+        else:
+            obj = get_object_with_retry(s3_client, bucket, pointer["key"])
+    except ClientError as exc:
+        if cached_etag and _is_status(exc, "304", "NotModified"):
+            logger.info("Account index cache hit: %s", cache_path)
+            return _open_ipc(cache_path)
+        raise
+
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, "wb") as handle:
+        for chunk in obj["Body"].iter_chunks(chunk_size=1024 * 1024):
+            handle.write(chunk)
+    os.replace(temp_path, cache_path)
+    with open(etag_path, "w", encoding="utf-8") as handle:
+        handle.write(obj["ETag"])
+    index = _open_ipc(cache_path)
+    logger.info("Account index downloaded: %s (%s accounts)", pointer["key"], index.num_rows)
+    return index
@@ -0,0 +1,425 @@
+import argparse
+import os
+import posixpath
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
+
+from src.generators.utils import (
+    DEFAULT_ROW_GROUP_SIZE,
+    METRICS,
+    OUTPUT_FORMATS,
+    IngestionLedger,
+    append_catalog,
+    checkpoint_catalog,
+    copy_object_with_retry,
+    delete_objects_with_retry,
+    get_logger,
+    get_object_with_retry,
+    get_shared_s3_client,
+    instrumented_run,
+    list_all_objects,
+    list_partitioned_objects,
+    load_minio_settings,
+    load_output_format,
+    read_catalog,
+    read_run_manifest,
+    upload_file_with_retry,
+    write_run_manifest,
+)
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+COMPACTED_ENTITIES = ("customers", "accounts", "transactions")
+STAGING_PREFIX = "_compaction"
+ARCHIVE_PREFIX = "_archive"
+DEFAULT_TARGET_MB = 256
+DEFAULT_MIN_AGE_MINUTES = 60
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class CompactionBin:
+    """Objetos pequenos de um mesmo diretorio (prefixo ou particao dt=) que viram um arquivo so."""
+
+    directory: str
+    sources: list = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return sum(item["Size"] for item in self.sources)
+
+    @property
+    def keys(self) -> list:
+        return [item["Key"] for item in self.sources]
+
+
+def plan_compaction(
+    objects: list,
+    output_format: str,
+    target_bytes: int = DEFAULT_TARGET_MB * MB,
+    min_age: timedelta = timedelta(minutes=DEFAULT_MIN_AGE_MINUTES),
+    now: Optional[datetime] = None,
+) -> list:
+    """Agrupa os objetos pequenos por diretorio em lotes de ate `target_bytes`.
+
+    Pequeno e tudo abaixo de metade do alvo; objetos mais novos que `min_age` ficam de
+    fora para nao competir com um gerador ainda escrevendo (ex.: o modo realtime).
+    Lotes com um unico arquivo nao sao compactados.
+    """
+    now = now or datetime.now(timezone.utc)
+    by_directory = defaultdict(list)
+    for item in objects:
+        if not item["Key"].endswith(f".{output_format}"):
+            continue
+        if item["Size"] >= target_bytes // 2 or now - item["LastModified"] < min_age:
+            continue
+        by_directory[posixpath.dirname(item["Key"])].append(item)
+
+    bins = []
+    for directory in sorted(by_directory):
+        current = CompactionBin(directory)
+        for item in sorted(by_directory[directory], key=lambda obj: obj["Key"]):
+            if current.sources and current.size + item["Size"] > target_bytes:
+                bins.append(current)
+                current = CompactionBin(directory)
+            current.sources.append(item)
+        bins.append(current)
+    return [item for item in bins if len(item.sources) > 1]
+
+
+def compacted_key(directory: str, run_id: str, index: int, output_format: str) -> str:
+    """Nome do arquivo compactado, no mesmo diretorio (e glob do dbt) dos originais.
+
+    Contas/clientes mantem o padrao `<entity>_<run_id>..._part-NNNNN` lido por
+    `load_existing_account_ids`; transacoes seguem o `part-*` das particoes.
+    """
+    if directory.startswith("transactions/"):
+        return f"{directory}/compacted-{index:05d}-{run_id}.{output_format}"
+    entity = directory.split("/")[0]
+    return f"{directory}/{entity}_{run_id}_compacted_part-{index:05d}.{output_format}"
+
+
+def merge_parquet_files(paths: list, output_path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """Concatena arquivos Parquet em streaming (ate um row group em memoria).
+
+    Os schemas sao unificados: colunas ausentes em arquivos antigos entram como nulas.
+    Cada `write_table` abre um row group novo, entao as tabelas pequenas sao acumuladas
+    ate `row_group_size` linhas antes de escrever.
+    """
+    schema = pa.unify_schemas([pq.read_schema(path) for path in paths])
+    rows = 0
+    pending, pending_rows = [], 0
+    temp_path = f"{output_path}.tmp"
+    with pq.ParquetWriter(temp_path, schema, compression="zstd") as writer:
+        for path in paths:
+            table = pq.read_table(path)
+            for column in schema:
+                if column.name not in table.column_names:
+                    table = table.append_column(column, pa.nulls(table.num_rows, column.type))
+            pending.append(table.select(schema.names).cast(schema))
+            pending_rows += table.num_rows
+            rows += table.num_rows
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.concat_tables(pending), row_group_size=row_group_size)
+                pending, pending_rows = [], 0
+        if pending:
+            writer.write_table(pa.concat_tables(pending), row_group_size=row_group_size)
+    os.replace(temp_path, output_path)
+    return rows
+
+
+def merge_jsonl_files(paths: list, output_path: str) -> int:
+    """Concatena arquivos JSONL byte a byte, garantindo a quebra de linha entre eles."""
+    rows = 0
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "wb") as output:
+        for path in paths:
+            with open(path, "rb") as handle:
+                last = b"\n"
+                for chunk in iter(lambda: handle.read(MB), b""):
+                    output.write(chunk)
+                    rows += chunk.count(b"\n")
+                    last = chunk[-1:]
+                if last != b"\n":
+                    output.write(b"\n")
+                    rows += 1
+    os.replace(temp_path, output_path)
+    return rows
+
+
+def merge_files(paths: list, output_path: str, output_format: str) -> int:
+    if output_format == "parquet":
+        return merge_parquet_files(paths, output_path)
+    if output_format == "jsonl":
+        return merge_jsonl_files(paths, output_path)
+    raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def _staging_key(run_id: str, key: str) -> str:
+    return f"{STAGING_PREFIX}/{run_id}/{key}"
+
+
+def _object_exists(s3_client, bucket: str, key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError:
+        return False
+
+
+def compact_bin(s3_client, bucket: str, compaction_bin: CompactionBin, key: str, run_id: str, output_format: str) -> dict:
+    """Baixa os originais, gera o arquivo compactado e o envia para a area de staging.
+
+    Nada fica visivel para o dbt aqui: o staging (`_compaction/<run_id>/...`) esta fora
+    dos globs da landing zone.
+    """
+    workdir = tempfile.mkdtemp(prefix="compaction-")
+    try:
+        paths = []
+        for index, source in enumerate(compaction_bin.keys):
+            path = os.path.join(workdir, f"{index:05d}.{output_format}")
+            body = get_object_with_retry(s3_client, bucket, source)["Body"]
+            with open(path, "wb") as handle:
+                shutil.copyfileobj(body, handle, MB)
+            paths.append(path)
+
+        output_path = os.path.join(workdir, f"compacted.{output_format}")
+        with METRICS.span("compact") as span:
+            rows = merge_files(paths, output_path, output_format)
+            span.rows, span.bytes = rows, os.path.getsize(output_path)
+        staging_key = _staging_key(run_id, key)
+        upload_file_with_retry(s3_client, output_path, bucket, staging_key, logger)
+        return {
+            "key": key,
+            "staging_key": staging_key,
+            "sources": compaction_bin.keys,
+            "source_bytes": compaction_bin.size,
+            "bytes": os.path.getsize(output_path),
+            "rows": rows,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def update_catalog(s3_client, bucket: str, manifest: dict) -> None:
+    """Registra no catalogo a troca: `remove` dos originais e `add` dos compactados.
+
+    A faixa de tempo do compactado vem das linhas dos originais no catalogo (nula se
+    eles foram gravados antes do catalogo). Originais com `content_hash` saem como
+    `compacted`, guardando o lote para o `IngestionLedger`: uma reexecucao do gerador
+    continua pulando o lote depois da compactacao. Reaplicar (roll-forward) nao muda o estado.
+    """
+    by_entity = defaultdict(list)
+    for entry in manifest["outputs"]:
+        by_entity[entry["key"].split("/")[0]].append(entry)
+    for entity, outputs in by_entity.items():
+        known = {row["key"]: row for row in read_catalog(s3_client, bucket, entity).to_pylist()}
+        ingested = IngestionLedger.load(s3_client, bucket, entity).by_key
+        added = []
+        for entry in outputs:
+            sources = [known[key] for key in entry["sources"] if key in known and known[key]["min_ts"]]
+            bounds = {"min_ts": None, "max_ts": None}
+            if sources and len(sources) == len(entry["sources"]):
+                bounds = {
+                    "min_ts": min(row["min_ts"] for row in sources).isoformat(),
+                    "max_ts": max(row["max_ts"] for row in sources).isoformat(),
+                }
+            added.append({"key": entry["key"], "rows": entry["rows"], "bytes": entry["bytes"], **bounds})
+        originals = [key for entry in outputs for key in entry["sources"]]
+        merged = [IngestionLedger.entry(ingested[key]) for key in originals if key in ingested]
+        removed = [{"key": key} for key in originals if key not in ingested]
+        append_catalog(s3_client, bucket, entity, manifest["run_id"], merged, logger, action="compacted")
+        append_catalog(s3_client, bucket, entity, manifest["run_id"], removed, logger, action="remove")
+        append_catalog(s3_client, bucket, entity, manifest["run_id"], added, logger)
+
+
+def publish_compaction(s3_client, bucket: str, manifest: dict) -> dict:
+    """Troca os originais pelos compactados de um manifesto `pending` (idempotente).
+
+    O manifesto e gravado antes desta etapa e e o ponto de commit: se o processo cair
+    no meio, a proxima execucao refaz a publicacao a partir dele (roll-forward).
+    """
+    run_id = manifest["run_id"]
+    for entry in manifest["outputs"]:
+        if _object_exists(s3_client, bucket, entry["staging_key"]):
+            copy_object_with_retry(s3_client, bucket, entry["staging_key"], entry["key"])
+        elif not _object_exists(s3_client, bucket, entry["key"]):
+            raise RuntimeError(f"Compacted object {entry['key']} missing from staging and destination.")
+
+        directory = posixpath.dirname(entry["key"]) + "/"
+        existing = {item["Key"] for item in list_all_objects(s3_client, bucket, directory)}
+        sources = [key for key in entry["sources"] if key in existing]
+        if manifest["archive"]:
+            for key in sources:
+                copy_object_with_retry(s3_client, bucket, key, f"{ARCHIVE_PREFIX}/{run_id}/{key}")
+        delete_objects_with_retry(s3_client, bucket, sources + [entry["staging_key"]])
+
+    update_catalog(s3_client, bucket, manifest)
+    manifest["status"] = "committed"
+    manifest["committed_at"] = datetime.now().isoformat()
+    write_run_manifest(s3_client, bucket, "compaction", run_id, manifest, logger)
+    return manifest
+
+
+def resume_pending_compactions(s3_client, bucket: str) -> list:
+    """Conclui compactacoes que pararam entre o manifesto `pending` e o commit."""
+    resumed = []
+    for item in list_all_objects(s3_client, bucket, "_manifests/compaction/"):
+        run_id = posixpath.basename(item["Key"]).rsplit(".", 1)[0]
+        manifest = read_run_manifest(s3_client, bucket, "compaction", run_id)
+        if manifest.get("status") == "pending":
+            logger.warning("Resuming pending compaction %s.", run_id)
+            resumed.append(publish_compaction(s3_client, bucket, manifest))
+    return resumed
+
+
+def measure_scan(settings, output_format: str, entity: str) -> float:
+    """Tempo (s) de um `count(*)` do DuckDB (httpfs) sobre o mesmo glob usado pelo dbt."""
+    import duckdb
+
+    pattern = "transactions/dt=*/*" if entity == "transactions" else f"{entity}/*"
+    reader = "read_parquet" if output_format == "parquet" else "read_json_auto"
+    con = duckdb.connect()
+    try:
+        con.execute("INSTALL httpfs; LOAD httpfs;")
+        con.execute(
+            "SET s3_region='us-east-1'; SET s3_use_ssl=false; SET s3_url_style='path';"
+            f"SET s3_endpoint='{os.getenv('MINIO_S3_ENDPOINT', 'localhost:9000')}';"
+            f"SET s3_access_key_id='{settings.access_key}'; SET s3_secret_access_key='{settings.secret_key}';"
+        )
+        start = time.perf_counter()
+        con.execute(f"SELECT count(*) FROM {reader}('s3://{settings.bucket}/{pattern}.{output_format}')").fetchone()
+        return time.perf_counter() - start
+    finally:
+        con.close()
+
+
+def run_compaction(
+    s3_client,
+    bucket: str,
+    output_format: str,
+    entities=COMPACTED_ENTITIES,
+    target_bytes: int = DEFAULT_TARGET_MB * MB,
+    min_age: timedelta = timedelta(minutes=DEFAULT_MIN_AGE_MINUTES),
+    archive: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    run_id: Optional[str] = None,
+    dry_run: bool = False,
+) -> Optional[dict]:
+    """Compacta os objetos pequenos da landing zone e devolve o manifesto da execucao."""
+    resume_pending_compactions(s3_client, bucket)
+    run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S")
+
+    bins = []
+    for entity in entities:
+        objects = list_partitioned_objects(s3_client, bucket, f"{entity}/")
+        entity_bins = plan_compaction(objects, output_format, target_bytes, min_age)
+        logger.info(
+            "%s: %s objects, %s to compact into %s files.",
+            entity, len(objects), sum(len(item.sources) for item in entity_bins), len(entity_bins),
+        )
+        bins.extend(entity_bins)
+    if not bins or dry_run:
+        return None
+
+    counters = defaultdict(int)
+    keys = []
+    for item in bins:
+        keys.append(compacted_key(item.directory, run_id, counters[item.directory], output_format))
+        counters[item.directory] += 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outputs = list(
+            pool.map(lambda pair: compact_bin(s3_client, bucket, pair[0], pair[1], run_id, output_format), zip(bins, keys))
+        )
+
+    manifest = {
+        "run_id": run_id,
+        "status": "pending",
+        "output_format": output_format,
+        "target_bytes": target_bytes,
+        "archive": archive,
+        "source_objects": sum(len(entry["sources"]) for entry in outputs),
+        "outputs": outputs,
+    }
+    write_run_manifest(s3_client, bucket, "compaction", run_id, manifest, logger)
+    manifest = publish_compaction(s3_client, bucket, manifest)
+    for entity in sorted({entry["key"].split("/")[0] for entry in outputs}):
+        checkpoint_catalog(s3_client, bucket, entity, logger)
+    logger.info(
+        "Compaction %s committed: %s objects -> %s (%.1f MB).",
+        run_id, manifest["source_objects"], len(outputs), sum(entry["bytes"] for entry in outputs) / MB,
+    )
+    return manifest
+
+
+def rebuild_catalog(s3_client, bucket: str, entities=COMPACTED_ENTITIES) -> list:
+    """Reconcilia o catalogo com uma listagem completa (landing zones anteriores ao catalogo)."""
+    keys = []
+    for entity in entities:
+        listed = [
+            item
+            for item in list_partitioned_objects(s3_client, bucket, f"{entity}/")
+            if item["Key"].endswith(tuple(f".{fmt}" for fmt in OUTPUT_FORMATS))
+        ]
+        keys.append(checkpoint_catalog(s3_client, bucket, entity, logger, listed=listed))
+    return keys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compacta arquivos pequenos da landing zone.")
+    parser.add_argument("--entity", choices=COMPACTED_ENTITIES, action="append", help="Padrao: todas.")
+    parser.add_argument("--target-mb", type=int, default=DEFAULT_TARGET_MB, help="Tamanho alvo (128-512 MB).")
+    parser.add_argument(
+        "--min-age-minutes", type=int, default=DEFAULT_MIN_AGE_MINUTES, help="Ignora objetos mais novos que isso."
+    )
+    parser.add_argument("--archive", action="store_true", help="Copia os originais para _archive/ antes de apagar.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="So mostra o plano.")
+    parser.add_argument("--measure", action="store_true", help="Mede o scan do DuckDB antes e depois.")
+    parser.add_argument(
+        "--rebuild-catalog",
+        action="store_true",
+        help="So reconcilia _catalog/ com a listagem do bucket (arquivos gravados antes do catalogo).",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    settings = load_minio_settings()
+    s3_client = get_shared_s3_client(settings)
+    output_format = args.format or load_output_format()
+    entities = args.entity or COMPACTED_ENTITIES
+
+    with instrumented_run(logger):
+        if args.rebuild_catalog:
+            rebuild_catalog(s3_client, settings.bucket, entities)
+        else:
+            before = {entity: measure_scan(settings, output_format, entity) for entity in entities} if args.measure else {}
+            manifest = run_compaction(
+                s3_client,
+                settings.bucket,
+                output_format,
+                entities=entities,
+                target_bytes=args.target_mb * MB,
+                min_age=timedelta(minutes=args.min_age_minutes),
+                archive=args.archive,
+                workers=args.workers,
+                dry_run=args.dry_run,
+            )
+            if args.measure and manifest is not None:
+                for entity in entities:
+                    after = measure_scan(settings, output_format, entity)
+                    logger.info("%s scan: %.2fs before, %.2fs after compaction.", entity, before[entity], after)
@@ -0,0 +1,172 @@
+import argparse
+import glob
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import pyarrow.parquet as pq
+
+from src.generators.utils import (
+    DLQ_DIR,
+    IngestionLedger,
+    append_catalog,
+    dlq_meta_path,
+    file_content_hash,
+    get_logger,
+    get_shared_s3_client,
+    instrumented_run,
+    load_minio_settings,
+    upload_file_with_retry,
+    write_run_manifest,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class DlqEntry:
+    """Um arquivo da DLQ e os metadados gravados na falha (`data/dlq_meta/`)."""
+
+    path: str
+    key: Optional[str]
+    object_key: Optional[str]
+    content_hash: str
+    failed_at: Optional[datetime]
+    reason: str = ""
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def entity(self) -> str:
+        return self.key.split("/")[0]
+
+
+def load_dlq_entries() -> list:
+    """Arquivos da DLQ em ordem de nome; sem metadados (gravados antes deles) a chave fica nula."""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(DLQ_DIR, "*.dlq"))):
+        meta = {}
+        if os.path.exists(dlq_meta_path(path)):
+            with open(dlq_meta_path(path), encoding="utf-8") as handle:
+                meta = json.load(handle)
+        entries.append(
+            DlqEntry(
+                path=path,
+                key=meta.get("key"),
+                object_key=meta.get("object_key"),
+                content_hash=meta.get("content_hash") or file_content_hash(path),
+                failed_at=datetime.fromisoformat(meta["failed_at"]) if meta.get("failed_at") else None,
+                reason=meta.get("reason", ""),
+            )
+        )
+    return entries
+
+
+def delivered_as(entry: DlqEntry, ledger: IngestionLedger) -> Optional[str]:
+    """Chave que ja contem o lote: mesmo hash no catalogo, ou objeto de origem regravado depois da falha."""
+    row = ledger.find(entry.content_hash)
+    if row is not None:
+        return row["key"]
+    row = ledger.by_key.get(entry.object_key)
+    if row is not None and entry.failed_at is not None and row["recorded_at"] > entry.failed_at:
+        return row["key"]
+    return None
+
+
+def _count_rows(path: str, key: str) -> int:
+    if key.endswith(".parquet"):
+        return pq.read_metadata(path).num_rows
+    with open(path, "rb") as handle:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: handle.read(1024 * 1024), b""))
+
+
+def _discard(entry: DlqEntry) -> None:
+    for path in (entry.path, dlq_meta_path(entry.path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _replay_entry(s3_client, bucket: str, entry: DlqEntry, ledger: IngestionLedger, dry_run: bool) -> tuple:
+    """(`already_ingested` | `replayed` | `failed`, entrada do catalogo ou None) de um arquivo da DLQ."""
+    existing = delivered_as(entry, ledger)
+    if existing is not None:
+        logger.info("%s already ingested as %s.", entry.name, existing)
+        return "already_ingested", None
+    if dry_run:
+        return "replayed", None
+    try:
+        upload_file_with_retry(s3_client, entry.path, bucket, entry.key, logger)
+    except Exception as exc:
+        logger.error("Replay of %s failed: %s", entry.name, exc)
+        return "failed", None
+    # O mesmo lote pode estar duas vezes na DLQ (falhou em duas execucoes)
+    ledger.by_hash[entry.content_hash] = {"key": entry.key}
+    return "replayed", {
+        "key": entry.key,
+        "rows": _count_rows(entry.path, entry.key),
+        "bytes": os.path.getsize(entry.path),
+        "content_hash": entry.content_hash,
+    }
+
+
+def replay_dlq(s3_client, bucket: str, dry_run: bool = False) -> dict:
+    """Reenvia os lotes da DLQ que ainda faltam na landing zone e os registra no catalogo.
+
+    Lotes ja entregues (ver `delivered_as`) nao sobem de novo. Arquivos resolvidos saem da
+    DLQ so depois do catalogo gravado; os que falharem de novo ficam para o proximo replay.
+    """
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    report = {"run_id": run_id, "replayed": [], "already_ingested": [], "unreplayable": [], "failed": []}
+    ledgers, added, resolved = {}, defaultdict(list), []
+
+    for entry in load_dlq_entries():
+        if not entry.key:
+            logger.warning("%s has no destination key (no metadata or aborted upload); skipping.", entry.name)
+            report["unreplayable"].append(entry.name)
+            continue
+        if entry.entity not in ledgers:
+            ledgers[entry.entity] = IngestionLedger.load(s3_client, bucket, entry.entity)
+
+        outcome, catalog_entry = _replay_entry(s3_client, bucket, entry, ledgers[entry.entity], dry_run)
+        report[outcome].append(entry.key if outcome == "replayed" else entry.name)
+        if catalog_entry is not None:
+            added[entry.entity].append(catalog_entry)
+        if outcome != "failed":
+            resolved.append(entry)
+
+    if dry_run:
+        return report
+    for entity, entries in added.items():
+        append_catalog(s3_client, bucket, entity, run_id, entries, logger)
+    for entry in resolved:
+        _discard(entry)
+    write_run_manifest(s3_client, bucket, "dlq_replay", run_id, report, logger)
+    logger.info(
+        "DLQ replay %s: %s replayed, %s already ingested, %s unreplayable, %s failed.",
+        run_id,
+        len(report["replayed"]),
+        len(report["already_ingested"]),
+        len(report["unreplayable"]),
+        len(report["failed"]),
+    )
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reenvia para o Data Lake os lotes da DLQ (data/dlq/) que faltam.")
+    parser.add_argument("--dry-run", action="store_true", help="So mostra o que seria reenviado.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    settings = load_minio_settings()
+    s3_client = get_shared_s3_client(settings)
+
+    with instrumented_run(logger):
+        replay_dlq(s3_client, settings.bucket, dry_run=args.dry_run)
@@ -0,0 +1,197 @@
+import io
+import json
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.json as pa_json
+
+try:
+    import orjson
+except ImportError:  # opcional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # opcional
+    msgspec = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+BACKEND_PRIORITY = ("msgspec", "orjson", "yajl2_c", "stdlib")
+
+
+class JsonlDecodeError(ValueError):
+    """Linha JSONL invalida; `line_number` e 1-based dentro do objeto lido."""
+
+    def __init__(self, line_number: int, line: bytes, cause: Exception):
+        self.line_number = line_number
+        self.line = line
+        super().__init__(f"invalid JSONL at line {line_number}: {cause}")
+
+
+@dataclass(frozen=True)
+class JsonlBackend:
+    name: str
+    decode_lines: Callable[[bytes], List[dict]]
+
+
+def _split_lines(buffer: bytes) -> list:
+    return [line for line in buffer.split(b"\n") if line.strip()]
+
+
+def _msgspec_backend() -> JsonlBackend:
+    decoder = msgspec.json.Decoder()
+    return JsonlBackend("msgspec", decoder.decode_lines)
+
+
+def _orjson_backend() -> JsonlBackend:
+    loads = orjson.loads
+    return JsonlBackend("orjson", lambda buffer: [loads(line) for line in _split_lines(buffer)])
+
+
+def _yajl2_c_backend() -> JsonlBackend:
+    items = ijson.get_backend("yajl2_c").items
+    return JsonlBackend(
+        "yajl2_c",
+        lambda buffer: [
+            record
+            for record in items(io.BytesIO(buffer), "", multiple_values=True, use_float=True)
+            if record is not None
+        ],
+    )
+
+
+def _stdlib_backend() -> JsonlBackend:
+    loads = json.loads
+    return JsonlBackend("stdlib", lambda buffer: [loads(line) for line in _split_lines(buffer)])
+
+
+def _available(name: str) -> bool:
+    if name == "msgspec":
+        return msgspec is not None
+    if name == "orjson":
+        return orjson is not None
+    if name == "yajl2_c":
+        if ijson is None:
+            return False
+        try:
+            ijson.get_backend("yajl2_c")
+        except ImportError:
+            return False
+        return True
+    return name == "stdlib"
+
+
+_FACTORIES = {
+    "msgspec": _msgspec_backend,
+    "orjson": _orjson_backend,
+    "yajl2_c": _yajl2_c_backend,
+    "stdlib": _stdlib_backend,
+}
+
+
+def available_backends() -> list:
+    """Backends instalados, do mais rapido para o mais lento."""
+    return [name for name in BACKEND_PRIORITY if _available(name)]
+
+
+def select_backend(name: Optional[str] = None) -> JsonlBackend:
+    """Escolhe o backend pedido (erro se nao instalado) ou o mais rapido disponivel."""
+    if name is None:
+        name = available_backends()[0]
+    elif name not in _FACTORIES:
+        raise ValueError(f"Unknown JSONL backend '{name}'. Use one of {BACKEND_PRIORITY}.")
+    elif not _available(name):
+        raise ImportError(f"JSONL backend '{name}' is not installed.")
+    return _FACTORIES[name]()
+
+
+class JsonlReader:
+    """Le JSONL de um arquivo/stream (ex.: Body do S3) em blocos grandes.
+
+    Cada bloco termina numa quebra de linha; o resto vai para o bloco seguinte.
+    O backend e fixo durante toda a leitura: um erro de parse levanta
+    `JsonlDecodeError` com o numero da linha, sem trocar de backend no meio do stream.
+    """
+
+    def __init__(self, body, backend: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.body = body
+        self.chunk_size = chunk_size
+        self._backend = select_backend(backend)
+        self.backend = self._backend.name
+        self.bytes_read = 0
+        self.records_read = 0
+        self._lines_before = 0
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Blocos de ~chunk_size bytes contendo apenas linhas completas."""
+        remainder = b""
+        while True:
+            data = self.body.read(self.chunk_size)
+            if not data:
+                break
+            self.bytes_read += len(data)
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                remainder += data
+                continue
+            yield remainder + data[: cut + 1]
+            remainder = data[cut + 1:]
+        if remainder.strip():
+            yield remainder
+
+    def _decode(self, chunk: bytes) -> list:
+        try:
+            records = self._backend.decode_lines(chunk)
+        except Exception:
+            self._raise_decode_error(chunk)
+        self._lines_before += chunk.count(b"\n")
+        self.records_read += len(records)
+        return records
+
+    def _raise_decode_error(self, chunk: bytes):
+        for offset, line in enumerate(chunk.split(b"\n"), start=1):
+            if not line.strip():
+                continue
+            try:
+                json.loads(line)
+            except ValueError as exc:
+                raise JsonlDecodeError(self._lines_before + offset, line, exc) from exc
+        raise JsonlDecodeError(self._lines_before + 1, chunk[:200], ValueError("backend rejected chunk"))
+
+    def iter_batches(self) -> Iterator[list]:
+        """Listas de dicts, uma por bloco lido."""
+        for chunk in self.iter_chunks():
+            records = self._decode(chunk)
+            if records:
+                yield records
+
+    def iter_records(self) -> Iterator[dict]:
+        for batch in self.iter_batches():
+            yield from batch
+
+    def iter_tables(self, schema: Optional[pa.Schema] = None) -> Iterator[pa.Table]:
+        """Tabelas Arrow por bloco, decodificadas pelo parser C++ do pyarrow.
+
+        Com `schema`, os tipos sao fixos e so as colunas do schema sao lidas (campos
+        extras sao ignorados, ausentes viram null).
+        """
+        parse_options = None
+        if schema is not None:
+            parse_options = pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior="ignore")
+        read_options = pa_json.ReadOptions(block_size=max(self.chunk_size, 1024 * 1024))
+        for chunk in self.iter_chunks():
+            try:
+                table = pa_json.read_json(io.BytesIO(chunk), read_options=read_options, parse_options=parse_options)
+            except pa.ArrowInvalid:
+                self._raise_decode_error(chunk)
+            self._lines_before += chunk.count(b"\n")
+            self.records_read += table.num_rows
+            if schema is not None:
+                table = table.select(schema.names)
+            yield table
@@ -1,56 +1,139 @@
-﻿import os
+﻿import argparse
+import glob
+import io
+import os
 import random
-from datetime import datetime
+import unicodedata
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import partial
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from faker import Faker
 
-from src.generators.models import Customer, Account, AccountType
+from src.generators.account_index import (
+    build_account_index,
+    load_account_index,
+    read_account_columns,
+    write_account_index,
+)
+from src.generators.jsonl_reader import JsonlReader
+from src.generators.models import (
+    ACCOUNT_ARROW_SCHEMA,
+    ARROW_SCHEMAS,
+    CUSTOMER_ARROW_SCHEMA,
+    Account,
+    AccountType,
+    Customer,
+)
 from src.generators.utils import (
-    build_s3_client,
+    METRICS,
+    OUTPUT_FORMATS,
+    IngestionLedger,
+    append_catalog,
+    derive_batch_id,
+    derive_partition_seed,
+    discover_keys,
     ensure_bucket_exists,
+    file_content_hash,
+    fixed_width_to_arrow,
     get_logger,
+    get_object_with_retry,
+    get_shared_s3_client,
+    instrumented_run,
     load_minio_settings,
+    load_output_format,
+    map_shards,
+    random_uuid4_bytes,
+    read_run_manifest,
+    records_to_table,
+    resolve_master_seed,
+    split_evenly,
+    time_range,
     upload_file_with_retry,
-    write_jsonl_atomic,
+    write_records_atomic,
+    write_run_manifest,
     write_to_dlq,
 )
 
 
 logger = get_logger(__name__)
 
-faker = Faker("pt_BR")
 NUM_CUSTOMERS = 100
+HISTORY_DAYS = 2 * 365
+RISK_PROFILES = ["LOW", "MEDIUM", "HIGH"]
+EMAIL_CHANGE_RATE = 0.25
+ENGINES = ("batch", "row")
+SECOND_ACCOUNT_RATE = 0.2
+MAX_OPENING_BALANCE = 15000
+ACCOUNT_TYPES = [account_type.value for account_type in AccountType]
+# Sorteios do Faker feitos uma vez por shard; os nomes pt_BR do Faker cabem nesses pools
+NAME_POOL_SIZE = 4096
+DOMAIN_POOL_SIZE = 64
+# Pesos dos digitos verificadores do CPF (10..2 sobre 9 digitos, 11..2 sobre 10)
+CPF_FIRST_WEIGHTS = np.arange(10, 1, -1)
+CPF_SECOND_WEIGHTS = np.arange(11, 1, -1)
+# Posicoes dos 11 digitos em "XXX.XXX.XXX-XX"
+CPF_DIGIT_POSITIONS = np.r_[0:3, 4:7, 8:11, 12:14]
+
+
+@dataclass(frozen=True)
+class CustomerShard:
+    shard: int
+    num_customers: int
+    seed: int
+    run_id: str
+    output_format: str
+    as_of: datetime
+    engine: str = "row"
+    skip_ingested: bool = False
+
 
+def _seeded_uuid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
 
-def generate_customer_data():
-    """Gera uma lista de clientes e suas respectivas contas."""
+
+def generate_customer_data(num_customers=NUM_CUSTOMERS, seed=None, as_of=None):
+    """Gera uma lista de clientes e suas respectivas contas (reprodutivel com `seed` + `as_of`)."""
     customers = []
     accounts = []
 
-    logger.info("Generating %s customers and linked accounts...", NUM_CUSTOMERS)
+    rnd = random.Random(seed)
+    faker = Faker("pt_BR")
+    faker.seed_instance(seed)
+    as_of = as_of or datetime.now()
+    history_start = as_of - timedelta(days=HISTORY_DAYS)
+
+    logger.info("Generating %s customers and linked accounts...", num_customers)
 
-    for _ in range(NUM_CUSTOMERS):
-        created_date = faker.date_time_between(start_date="-2y", end_date="now")
+    for _ in range(num_customers):
+        created_date = faker.date_time_between(start_date=history_start, end_date=as_of)
 
         cust = Customer(
+            id=_seeded_uuid(rnd),
             first_name=faker.first_name(),
             last_name=faker.last_name(),
             email=faker.email(),
             cpf=faker.cpf(),
             created_at=created_date,
             updated_at=created_date,
-            risk_profile=random.choice(["LOW", "MEDIUM", "HIGH"]),
+            risk_profile=rnd.choice(["LOW", "MEDIUM", "HIGH"]),
         )
         customers.append(cust.model_dump(mode="json"))
 
-        num_accounts = random.choices([1, 2], weights=[0.8, 0.2])[0]
+        num_accounts = rnd.choices([1, 2], weights=[0.8, 0.2])[0]
 
         for _ in range(num_accounts):
-            acc_type = random.choice(list(AccountType))
+            acc_type = rnd.choice(list(AccountType))
             acc = Account(
+                id=_seeded_uuid(rnd),
                 customer_id=cust.id,
                 account_number=str(faker.random_number(digits=6, fix_len=True)),
-                balance=round(random.uniform(0, 15000), 2),
+                balance=round(rnd.uniform(0, 15000), 2),
                 account_type=acc_type,
                 created_at=created_date,
             )
@@ -59,31 +142,450 @@ def generate_customer_data():
     return customers, accounts
 
 
-def save_and_upload(data, entity_name, s3_client, bucket_name):
-    """Salva localmente em JSONL e sobe para o MinIO com retry."""
-    filename = f"{entity_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jsonl"
+def _faker_pool(draw, size: int) -> pa.Array:
+    return pa.array(np.unique([draw() for _ in range(size)]))
+
+
+def _email_slug(names: pa.Array) -> pa.Array:
+    """Nome -> parte local de e-mail: sem acentos, minusculo, so letras e digitos."""
+    slugs = [
+        "".join(ch for ch in unicodedata.normalize("NFKD", name).lower() if ch.isascii() and ch.isalnum())
+        for name in names.to_pylist()
+    ]
+    return pa.array(slugs)
+
+
+def cpf_check_digits(base: np.ndarray) -> np.ndarray:
+    """Completa CPFs (matriz n x 9 de digitos) com os dois verificadores -> n x 11."""
+    first = (base @ CPF_FIRST_WEIGHTS * 10) % 11 % 10
+    with_first = np.column_stack([base, first])
+    second = (with_first @ CPF_SECOND_WEIGHTS * 10) % 11 % 10
+    return np.column_stack([with_first, second])
+
+
+def random_cpfs(rng: np.random.Generator, size: int) -> pa.Array:
+    """CPFs validos formatados (XXX.XXX.XXX-XX), como o `faker.cpf()`, montados em bytes."""
+    digits = cpf_check_digits(rng.integers(0, 10, size=(size, 9)))
+    out = np.full((size, 14), ord("."), dtype=np.uint8)
+    out[:, 11] = ord("-")
+    out[:, CPF_DIGIT_POSITIONS] = digits + ord("0")
+    return fixed_width_to_arrow(out.view("S14").ravel())
+
+
+def validate_master_sample(customers: pa.Table, accounts: pa.Table, sample_size: int, rng: np.random.Generator) -> int:
+    """Valida com os modelos pydantic apenas uma amostra de clientes e de contas."""
+    checked = 0
+    for table, model in ((customers, Customer), (accounts, Account)):
+        if sample_size <= 0 or table.num_rows == 0:
+            continue
+        picked = np.sort(rng.choice(table.num_rows, size=min(sample_size, table.num_rows), replace=False))
+        for row in table.take(picked).to_pylist():
+            model(**row)
+        checked += len(picked)
+    return checked
+
+
+def generate_customer_columns(num_customers=NUM_CUSTOMERS, seed=None, as_of=None, validation_sample=10):
+    """Engine colunar de `generate_customer_data`: devolve (clientes, contas) como tabelas Arrow.
+
+    Faker so sorteia os pools de nomes e dominios; CPFs, e-mails, UUIDs e o split 80/20 de
+    contas sao operacoes sobre arrays. Reprodutivel com `seed` + `as_of`, mas nao gera os
+    mesmos valores da engine por linha. Apenas `validation_sample` linhas de cada tabela
+    passam pelos modelos pydantic.
+    """
+    data_rng, sample_rng = (np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(2))
+    faker = Faker("pt_BR")
+    faker.seed_instance(seed)
+    as_of = as_of or datetime.now()
+    history_start = np.datetime64(as_of - timedelta(days=HISTORY_DAYS), "s")
+
+    logger.info("Generating %s customers and linked accounts (batch engine)...", num_customers)
+
+    first_names = _faker_pool(faker.first_name, NAME_POOL_SIZE)
+    last_names = _faker_pool(faker.last_name, NAME_POOL_SIZE)
+    domains = _faker_pool(faker.free_email_domain, DOMAIN_POOL_SIZE)
+    first_idx = data_rng.integers(0, len(first_names), num_customers)
+    last_idx = data_rng.integers(0, len(last_names), num_customers)
+
+    emails = pc.binary_join_element_wise(
+        _email_slug(first_names).take(first_idx),
+        ".",
+        _email_slug(last_names).take(last_idx),
+        pc.cast(pa.array(data_rng.integers(1, 1000, num_customers)), pa.string()),
+        "@",
+        domains.take(data_rng.integers(0, len(domains), num_customers)),
+        "",
+    )
+    offsets = data_rng.integers(0, HISTORY_DAYS * 24 * 60 * 60, num_customers).astype("timedelta64[s]")
+    created_at = pa.array((history_start + offsets).astype("datetime64[us]"), pa.timestamp("us"))
+    customer_ids = fixed_width_to_arrow(random_uuid4_bytes(data_rng, num_customers))
+
+    customers = pa.Table.from_arrays(
+        [
+            customer_ids,
+            first_names.take(first_idx),
+            last_names.take(last_idx),
+            emails,
+            random_cpfs(data_rng, num_customers),
+            created_at,
+            created_at,
+            pa.array(RISK_PROFILES).take(data_rng.integers(0, len(RISK_PROFILES), num_customers)),
+        ],
+        schema=CUSTOMER_ARROW_SCHEMA,
+    )
+
+    owner = np.repeat(np.arange(num_customers), 1 + (data_rng.random(num_customers) < SECOND_ACCOUNT_RATE))
+    num_accounts = len(owner)
+    accounts = pa.Table.from_arrays(
+        [
+            fixed_width_to_arrow(random_uuid4_bytes(data_rng, num_accounts)),
+            customer_ids.take(owner),
+            pc.cast(pa.array(data_rng.integers(100_000, 1_000_000, num_accounts)), pa.string()),
+            pa.repeat("0001", num_accounts),
+            pa.array(np.round(data_rng.uniform(0, MAX_OPENING_BALANCE, num_accounts), 2)),
+            pa.array(ACCOUNT_TYPES).take(data_rng.integers(0, len(ACCOUNT_TYPES), num_accounts)),
+            created_at.take(owner),
+            pa.repeat("ACTIVE", num_accounts),
+        ],
+        schema=ACCOUNT_ARROW_SCHEMA,
+    )
+
+    validate_master_sample(customers, accounts, validation_sample, sample_rng)
+    return customers, accounts
+
+
+def save_and_upload(
+    data, entity_name, s3_client, bucket_name, output_format="parquet", run_id=None, shard=None, ledger=None
+) -> dict:
+    """Salva localmente (Parquet ou JSONL) e sobe para o MinIO com retry (s3_client=None: so local).
+
+    Retorna a entrada do arquivo para o manifesto e o catalogo. Com `ledger`, um arquivo com
+    o mesmo conteudo de um lote ja catalogado nao sobe: a entrada aponta para o objeto
+    existente (`skipped`).
+    """
+    run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S")
+    part_suffix = "" if shard is None else f"_part-{shard:05d}"
+    filename = f"{entity_name}_{run_id}{part_suffix}.{output_format}"
     local_path = os.path.join("data", filename)
     s3_key = f"{entity_name}/{filename}"
 
-    logger.info("Saving %s records for %s...", len(data), entity_name)
+    logger.info("Saving %s records for %s as %s...", len(data), entity_name, output_format)
+
+    write_records_atomic(data, local_path, output_format, ARROW_SCHEMAS[entity_name])
+    entry = {
+        "key": s3_key,
+        "rows": len(data),
+        **catalog_fields(data, entity_name, local_path),
+        "content_hash": file_content_hash(local_path),
+    }
+    ingested = ledger.find(entry["content_hash"]) if ledger is not None else None
+    if ingested is not None:
+        logger.info("Skipping %s: same content already ingested as %s.", s3_key, ingested["key"])
+        return {**IngestionLedger.entry(ingested), "skipped": True}
 
-    write_jsonl_atomic(data, local_path)
+    if s3_client is None:
+        return entry
 
     try:
         upload_file_with_retry(s3_client, local_path, bucket_name, s3_key, logger)
         logger.info("Upload completed.")
     except Exception as exc:
-        write_to_dlq(local_path, f"upload_failed:{exc}", logger)
+        write_to_dlq(local_path, f"upload_failed:{exc}", logger, key=s3_key)
         raise
+    return entry
+
+
+def update_account_index(account_keys, s3_client, bucket_name, run_id):
+    """Incorpora as contas recem-gravadas ao indice de IDs (`_index/accounts/`)."""
+    previous = load_account_index(s3_client, bucket_name, logger)
+    new_accounts = [read_account_columns(os.path.join("data", os.path.basename(key))) for key in account_keys]
+    index = build_account_index(new_accounts, previous)
+    return write_account_index(s3_client, bucket_name, index, run_id, logger)
+
+
+def catalog_fields(data, entity_name, local_path) -> dict:
+    """Tamanho e faixa de tempo do arquivo gravado (clientes por `updated_at`, contas por `created_at`)."""
+    column = "updated_at" if entity_name == "customers" else "created_at"
+    min_ts, max_ts = time_range(records_to_table(data, ARROW_SCHEMAS[entity_name]).column(column))
+    return {"bytes": os.path.getsize(local_path), "min_ts": min_ts, "max_ts": max_ts}
+
+
+def append_master_catalog(s3_client, bucket_name, run_id, entries) -> None:
+    for entity_name in ("customers", "accounts"):
+        files = [entry for entry in entries if entry["entity"] == entity_name and not entry.get("skipped")]
+        append_catalog(s3_client, bucket_name, entity_name, run_id, files, logger)
+
+
+def run_customer_shard(spec: CustomerShard, client_factory=None, bucket_name=None) -> list:
+    """Gera e grava um shard de clientes/contas; roda dentro de um processo do pool."""
+    generate = generate_customer_columns if spec.engine == "batch" else generate_customer_data
+    with METRICS.span("generate") as span:
+        customers, accounts = generate(spec.num_customers, seed=spec.seed, as_of=spec.as_of)
+        span.rows = len(customers) + len(accounts)
+    s3_client = client_factory() if client_factory else None
+    scope = f"{spec.seed}:{spec.engine}:{spec.num_customers}:{spec.as_of.isoformat()}"
+
+    entries = []
+    for entity_name, data in (("customers", customers), ("accounts", accounts)):
+        ledger = IngestionLedger.load(s3_client, bucket_name, entity_name) if spec.skip_ingested else None
+        entry = save_and_upload(
+            data, entity_name, s3_client, bucket_name, spec.output_format, run_id=spec.run_id, shard=spec.shard, ledger=ledger
+        )
+        entries.append(
+            {
+                "entity": entity_name,
+                "shard": spec.shard,
+                "seed": spec.seed,
+                **entry,
+                "batch_id": derive_batch_id(scope, entity_name, spec.as_of.date(), spec.shard),
+            }
+        )
+    return entries
+
+
+def build_customer_specs(
+    num_customers, workers, master_seed, run_id, output_format, as_of, engine="row", skip_ingested=False
+) -> list:
+    """Um shard por worker; a seed de cada um depende so de (seed mestre, as_of, shard)."""
+    return [
+        CustomerShard(
+            shard,
+            size,
+            derive_partition_seed(master_seed, "customers", as_of.date(), shard),
+            run_id,
+            output_format,
+            as_of,
+            engine,
+            skip_ingested,
+        )
+        for shard, size in enumerate(split_evenly(num_customers, workers))
+    ]
+
+
+def generate_sharded(
+    num_customers,
+    workers,
+    master_seed=None,
+    output_format="parquet",
+    settings=None,
+    as_of=None,
+    engine="row",
+):
+    """Divide os clientes em `workers` shards (um processo cada) e grava o manifesto da execucao.
+
+    `as_of` padrao e a meia-noite de hoje: reexecutar no mesmo dia com a mesma seed gera os
+    mesmos arquivos, que nao sobem de novo (hash ja no catalogo).
+    """
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    as_of = as_of or datetime.combine(date.today(), time.min)
+    entropy = resolve_master_seed(master_seed)
+    specs = build_customer_specs(num_customers, workers, entropy, run_id, output_format, as_of, engine, skip_ingested=True)
+
+    logger.info("Generating %s customers in %s shard(s) (master seed %s)...", num_customers, workers, entropy)
+    client_factory = partial(get_shared_s3_client, settings) if settings else None
+    bucket_name = settings.bucket if settings else None
+    results = map_shards(
+        partial(run_customer_shard, client_factory=client_factory, bucket_name=bucket_name), specs, workers
+    )
+
+    files = [entry for shard_entries in results for entry in shard_entries]
+    s3_client = client_factory() if client_factory else None
+    # Contas de arquivos pulados ja estao no indice da execucao que os gravou
+    index_pointer = update_account_index(
+        [entry["key"] for entry in files if entry["entity"] == "accounts" and not entry.get("skipped")],
+        s3_client,
+        bucket_name,
+        run_id,
+    )
+
+    manifest = {
+        "run_id": run_id,
+        "master_seed": entropy,
+        "workers": workers,
+        "customers": num_customers,
+        "output_format": output_format,
+        "engine": engine,
+        "as_of": as_of.isoformat(),
+        "files": files,
+        "account_index": index_pointer["key"],
+    }
+    append_master_catalog(s3_client, bucket_name, run_id, files)
+    write_run_manifest(s3_client, bucket_name, "master_data", run_id, manifest, logger)
+    return manifest
+
+
+def regenerate_shards(manifest: dict, shards, settings=None) -> list:
+    """Regera so os shards pedidos de uma carga completa, sobrescrevendo os mesmos arquivos.
+
+    As contas regeradas sao identicas as originais, entao o indice de contas nao muda.
+    """
+    specs = build_customer_specs(
+        manifest["customers"],
+        manifest["workers"],
+        manifest["master_seed"],
+        manifest["run_id"],
+        manifest["output_format"],
+        datetime.fromisoformat(manifest["as_of"]),
+        # Manifestos anteriores a engine batch foram gerados por linha
+        manifest.get("engine", "row"),
+    )
+    specs = [spec for spec in specs if spec.shard in set(shards)]
+    logger.info("Regenerating %s shard(s) of run %s...", len(specs), manifest["run_id"])
+    client_factory = partial(get_shared_s3_client, settings) if settings else None
+    bucket_name = settings.bucket if settings else None
+    results = map_shards(
+        partial(run_customer_shard, client_factory=client_factory, bucket_name=bucket_name), specs, len(specs)
+    )
+    entries = [entry for shard_entries in results for entry in shard_entries]
+    append_master_catalog(client_factory() if client_factory else None, bucket_name, manifest["run_id"], entries)
+    return entries
+
+
+def _read_customer_file(path_or_body, name: str) -> pa.Table:
+    schema = ARROW_SCHEMAS["customers"]
+    if name.endswith(".parquet"):
+        return records_to_table(pq.read_table(path_or_body), schema)
+    tables = list(JsonlReader(path_or_body).iter_tables(schema=schema))
+    return pa.concat_tables(tables) if tables else schema.empty_table()
+
+
+def read_landing_customers(s3_client=None, bucket_name=None) -> pa.Table:
+    """Le todos os arquivos de clientes (cargas completas e deltas); sem s3_client, le `data/`."""
+    tables = []
+    if s3_client is None:
+        for path in sorted(glob.glob(os.path.join("data", "customers_*"))):
+            if path.endswith((".parquet", ".jsonl")):
+                with open(path, "rb") as handle:
+                    tables.append(_read_customer_file(handle, path))
+    else:
+        for key in sorted(discover_keys(s3_client, bucket_name, "customers")):
+            body = get_object_with_retry(s3_client, bucket_name, key)["Body"]
+            source = io.BytesIO(body.read()) if key.endswith(".parquet") else body
+            tables.append(_read_customer_file(source, key))
+    return pa.concat_tables(tables) if tables else ARROW_SCHEMAS["customers"].empty_table()
+
+
+def latest_customer_versions(customers: pa.Table) -> pa.Table:
+    """Versao mais recente (maior `updated_at`) de cada cliente, a mesma regra do stg_customers."""
+    ordered = customers.sort_by([("id", "ascending"), ("updated_at", "descending")])
+    _, first = np.unique(ordered.column("id").to_numpy(zero_copy_only=False), return_index=True)
+    return ordered.take(first)
+
+
+def generate_customer_updates(customers: pa.Table, fraction: float, seed=None, as_of=None) -> pa.Table:
+    """Sorteia `fraction` dos clientes e devolve so as versoes alteradas, com `updated_at = as_of`.
+
+    Todo cliente sorteado troca de perfil de risco e ~25% deles tambem trocam de e-mail,
+    entao cada linha do delta muda o `row_hash` do stg_customers.
+    """
+    rng = np.random.default_rng(seed)
+    as_of = as_of or datetime.now()
+    size = int(round(customers.num_rows * fraction))
+    changed = customers.take(np.sort(rng.choice(customers.num_rows, size, replace=False)))
+
+    profile_index = pc.index_in(changed.column("risk_profile"), value_set=pa.array(RISK_PROFILES))
+    current = pc.fill_null(profile_index, 0).to_numpy()
+    new_profiles = np.array(RISK_PROFILES)[(current + rng.integers(1, len(RISK_PROFILES), size)) % len(RISK_PROFILES)]
+    emails = changed.column("email")
+    new_emails = pc.if_else(
+        pa.array(rng.random(size) < EMAIL_CHANGE_RATE), pc.utf8_replace_slice(emails, 0, 0, "novo."), emails
+    )
+
+    schema = changed.schema
+    for name, values in (
+        ("risk_profile", pa.array(new_profiles, pa.string())),
+        ("email", new_emails),
+        ("updated_at", pa.array(np.full(size, np.datetime64(as_of, "us")), schema.field("updated_at").type)),
+    ):
+        changed = changed.set_column(schema.get_field_index(name), name, values)
+    return changed
+
+
+def generate_delta(fraction, master_seed=None, output_format="parquet", settings=None, as_of=None):
+    """Grava um lote so com os clientes alterados (`customers_<run_id>_delta`), sem contas novas."""
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    as_of = as_of or datetime.now()
+    entropy = resolve_master_seed(master_seed)
+    seed = derive_partition_seed(entropy, "customers_delta", as_of.date())
+    s3_client = get_shared_s3_client(settings) if settings else None
+    bucket_name = settings.bucket if settings else None
+
+    current = latest_customer_versions(read_landing_customers(s3_client, bucket_name))
+    if not current.num_rows:
+        raise RuntimeError("No customers found. Run master_data.py first.")
+    updates = generate_customer_updates(current, fraction, seed=seed, as_of=as_of)
+    logger.info("Updating %s of %s customers (seed %s)...", updates.num_rows, current.num_rows, entropy)
+
+    entry = save_and_upload(updates, "customers", s3_client, bucket_name, output_format, run_id=f"{run_id}_delta")
+    key = entry["key"]
+    append_catalog(s3_client, bucket_name, "customers", run_id, [entry], logger)
+    manifest = {
+        "run_id": run_id,
+        "mode": "delta",
+        "master_seed": entropy,
+        "fraction": fraction,
+        "as_of": as_of.isoformat(),
+        "files": [{"entity": "customers", "key": key, "seed": seed, "rows": updates.num_rows}],
+    }
+    write_run_manifest(s3_client, bucket_name, "master_data", run_id, manifest, logger)
+    return manifest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera clientes e contas e envia para o Data Lake.")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help="Formato da landing zone (padrao: LANDING_FORMAT ou parquet).",
+    )
+    parser.add_argument("--customers", type=int, default=NUM_CUSTOMERS, help="Quantidade de clientes.")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="batch",
+        help="batch = engine colunar (milhoes de clientes); row = gerador original por linha (Faker + pydantic).",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processos (um shard de clientes por processo).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed mestre (reprodutivel por seed + workers).")
+    parser.add_argument(
+        "--delta",
+        type=float,
+        default=None,
+        metavar="FRACAO",
+        help="Em vez de uma carga completa, grava so atualizacoes de FRACAO dos clientes existentes (ex.: 0.01).",
+    )
+    parser.add_argument(
+        "--regenerate",
+        metavar="RUN_ID",
+        default=None,
+        help="Regera shards de uma carga completa anterior (seed e tamanhos vem do manifesto).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=int,
+        action="append",
+        default=[],
+        help="Shard a regerar com --regenerate; pode repetir.",
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    output_format = args.format or load_output_format()
     settings = load_minio_settings()
-    s3_client = build_s3_client(settings)
+    s3_client = get_shared_s3_client(settings)
 
     ensure_bucket_exists(s3_client, settings.bucket, logger)
 
-    customers_data, accounts_data = generate_customer_data()
-
-    save_and_upload(customers_data, "customers", s3_client, settings.bucket)
-    save_and_upload(accounts_data, "accounts", s3_client, settings.bucket)
+    with instrumented_run(logger):
+        if args.regenerate:
+            if not args.shard:
+                raise SystemExit("--regenerate precisa de pelo menos um --shard.")
+            manifest = read_run_manifest(s3_client, settings.bucket, "master_data", args.regenerate)
+            regenerate_shards(manifest, args.shard, settings)
+        elif args.delta is not None:
+            generate_delta(args.delta, args.seed, output_format, settings)
+        else:
+            generate_sharded(args.customers, args.workers, args.seed, output_format, settings, engine=args.engine)
@@ -4,6 +4,8 @@ from typing import Optional
 from uuid import UUID, uuid4
 import random
 
+import pyarrow as pa
+
 # Enum para status da conta
 from enum import Enum
 
@@ -48,4 +50,43 @@ class Transaction(BaseModel):
     transaction_date: datetime
     status: str = "COMPLETED"
     # Campos extras para enriquecer analytics
-    counterparty_bank: str = "INTERNAL" # Se for outro banco, geramos nome aleatório
\ No newline at end of file
+    counterparty_bank: str = "INTERNAL" # Se for outro banco, geramos nome aleatório
+
+# Schemas Arrow equivalentes aos modelos (colunas tipadas no Parquet da landing zone)
+CUSTOMER_ARROW_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("first_name", pa.string()),
+    ("last_name", pa.string()),
+    ("email", pa.string()),
+    ("cpf", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("updated_at", pa.timestamp("us")),
+    ("risk_profile", pa.string()),
+])
+
+ACCOUNT_ARROW_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("customer_id", pa.string()),
+    ("account_number", pa.string()),
+    ("agency", pa.string()),
+    ("balance", pa.float64()),
+    ("account_type", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("status", pa.string()),
+])
+
+TRANSACTION_ARROW_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("account_id", pa.string()),
+    ("amount", pa.float64()),
+    ("transaction_type", pa.string()),
+    ("transaction_date", pa.timestamp("us")),
+    ("status", pa.string()),
+    ("counterparty_bank", pa.string()),
+])
+
+ARROW_SCHEMAS = {
+    "customers": CUSTOMER_ARROW_SCHEMA,
+    "accounts": ACCOUNT_ARROW_SCHEMA,
+    "transactions": TRANSACTION_ARROW_SCHEMA,
+}
@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.generators.transaction_generator import (
+    build_transaction_columns,
+    columns_to_record_batch,
+    columns_to_records,
+    load_existing_account_ids,
+    partition_key,
+)
+from src.generators.utils import (
+    METRICS,
+    OUTPUT_FORMATS,
+    UploadManager,
+    append_catalog,
+    content_hash,
+    encode_jsonl,
+    get_logger,
+    get_shared_s3_client,
+    instrumented_run,
+    load_minio_settings,
+    load_output_format,
+    put_object_with_retry,
+    resolve_master_seed,
+)
+from src.generators.workload import DEFAULT_PROFILE, WORKLOAD_PROFILES, AccountSampler, get_profile
+
+logger = get_logger(__name__)
+
+WATERMARK_KEY = "_watermarks/transactions_realtime.json"
+LAG_WINDOW = 1000
+
+
+class RateController:
+    """Quantas transacoes emitir agora para manter `target_rate` por segundo.
+
+    O alvo e cumulativo (target_rate * tempo decorrido): um tick atrasado e compensado
+    no seguinte, limitado a `max_burst` linhas para nao gerar lotes gigantes.
+    """
+
+    def __init__(self, target_rate: float, max_burst: Optional[int] = None, clock=time.monotonic):
+        self.target_rate = target_rate
+        self.max_burst = max_burst or max(1, int(target_rate))
+        self.clock = clock
+        self.started = clock()
+        self.emitted = 0
+
+    def due(self) -> int:
+        behind = int(self.target_rate * (self.clock() - self.started)) - self.emitted
+        return max(0, min(behind, self.max_burst))
+
+    def record(self, rows: int) -> None:
+        self.emitted += rows
+
+
+class WatermarkTracker:
+    """Watermark = maior `transaction_date` tal que todos os lotes ate ele ja estao na landing zone.
+
+    Os uploads terminam fora de ordem; o watermark so avanca pelo prefixo de lotes concluidos.
+    """
+
+    def __init__(self):
+        self._batches = {}
+        self._next = 0
+        self.watermark: Optional[datetime] = None
+
+    def register(self, seq: int, max_event: datetime) -> None:
+        self._batches[seq] = [max_event, False]
+
+    def complete(self, seq: int) -> None:
+        self._batches[seq][1] = True
+        while self._next in self._batches and self._batches[self._next][1]:
+            self.watermark = self._batches.pop(self._next)[0]
+            self._next += 1
+
+
+@dataclass
+class RealtimeReport:
+    target_rate: float
+    emitted: int = 0
+    uploaded_rows: int = 0
+    objects: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    watermark: Optional[datetime] = None
+    lags: deque = field(default_factory=lambda: deque(maxlen=LAG_WINDOW))
+
+    @property
+    def achieved_rate(self) -> float:
+        return self.emitted / self.seconds if self.seconds else 0.0
+
+    def lag_percentile(self, q: float) -> float:
+        """Lag ponta a ponta (evento -> objeto na landing zone), em segundos, nos ultimos lotes."""
+        return float(np.percentile(self.lags, q)) if self.lags else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "target_rate": self.target_rate,
+            "achieved_rate": round(self.achieved_rate, 1),
+            "emitted": self.emitted,
+            "uploaded_rows": self.uploaded_rows,
+            "objects": self.objects,
+            "failed": self.failed,
+            "lag_p50_s": round(self.lag_percentile(50), 3),
+            "lag_p95_s": round(self.lag_percentile(95), 3),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+
+def serialize_batch(columns: dict, output_format: str) -> bytes:
+    with METRICS.span("serialize", rows=len(columns["id"])) as span:
+        if output_format == "parquet":
+            sink = io.BytesIO()
+            pq.write_table(pa.Table.from_batches([columns_to_record_batch(columns)]), sink, compression="zstd")
+            payload = sink.getvalue()
+        else:
+            payload = encode_jsonl(columns_to_records(columns))
+        span.bytes = len(payload)
+    return payload
+
+
+def write_watermark(s3_client, bucket: str, run_id: str, report: RealtimeReport) -> None:
+    """Grava o watermark corrente em `data/_watermarks/` e no S3 (sobrescrito a cada relatorio)."""
+    payload = json.dumps({"run_id": run_id, "updated_at": datetime.now().isoformat(), **report.as_dict()}, indent=2)
+    local_path = os.path.join("data", WATERMARK_KEY)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    temp_path = f"{local_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        handle.write(payload)
+    os.replace(temp_path, local_path)
+    if s3_client is not None:
+        put_object_with_retry(s3_client, bucket, WATERMARK_KEY, payload.encode("utf-8"))
+
+
+class RealtimeGenerator:
+    """Emite transacoes continuamente a `target_rate`/s e sobe micro-lotes para a landing zone.
+
+    Um lote fecha ao atingir `max_batch_rows`, apos `max_batch_seconds` ou na virada do dia
+    (cada objeto cai inteiro em uma particao dt=YYYY-MM-DD). Os uploads rodam no pool do
+    UploadManager, com no maximo `max_in_flight` lotes pendentes.
+
+    `clock` e `sleep` (corrotina que recebe `tick`) trocam o relogio monotonic e a espera
+    entre ticks; com um relogio simulado a execucao e deterministica (usado nos testes).
+    """
+
+    def __init__(
+        self,
+        account_ids,
+        s3_client,
+        bucket_name: str,
+        target_rate: float = 5000,
+        max_batch_rows: int = 50_000,
+        max_batch_seconds: float = 5.0,
+        output_format: str = "parquet",
+        profile: str = DEFAULT_PROFILE,
+        seed: Optional[int] = None,
+        tick: float = 0.1,
+        report_interval: float = 10.0,
+        max_in_flight: int = 8,
+        shard: int = 0,
+        clock=time.monotonic,
+        sleep=None,
+    ):
+        self.accounts = np.asarray(account_ids, dtype=object)
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.max_batch_rows = max_batch_rows
+        self.max_batch_seconds = max_batch_seconds
+        self.output_format = output_format
+        self.tick = tick
+        self.report_interval = report_interval
+        self.max_in_flight = max_in_flight
+        self.shard = shard
+        self.clock = clock
+        self.sleep = sleep
+        self.run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.master_seed = resolve_master_seed(seed)
+        self.rng = np.random.default_rng(np.random.SeedSequence(self.master_seed))
+        self.sampler = AccountSampler(len(self.accounts), get_profile(profile).zipf_exponent, self.master_seed, shard)
+        self.controller: Optional[RateController] = None
+        self.tracker = WatermarkTracker()
+        self.report = RealtimeReport(target_rate)
+        self._pending, self._pending_rows, self._batch_started = [], 0, clock()
+        self._clock_origin, self._wall_origin = clock(), datetime.now()
+        self._seq = 0
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+        self._catalog_entries = []
+
+    def _now(self) -> datetime:
+        """Hora do evento derivada de `clock`, ancorada no inicio da execucao."""
+        return self._wall_origin + timedelta(seconds=self.clock() - self._clock_origin)
+
+    async def _wait(self, stop: asyncio.Event) -> None:
+        if self.sleep is not None:
+            await self.sleep(self.tick)
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=self.tick)
+        except asyncio.TimeoutError:
+            pass
+
+    def _emit(self, start: datetime, end: datetime) -> None:
+        rows = self.controller.due()
+        if not rows:
+            return
+        with METRICS.span("generate", rows=rows):
+            columns = build_transaction_columns(self.accounts, start, rows, self.rng, sampler=self.sampler)
+        span = max(int((end - start) / timedelta(microseconds=1)), 1)
+        offsets = np.sort(self.rng.integers(0, span, size=rows)).astype("timedelta64[us]")
+        columns["transaction_date"] = np.datetime64(start, "us") + offsets
+        self.controller.record(rows)
+        self.report.emitted += rows
+        self._pending.append(columns)
+        self._pending_rows += rows
+
+    async def _flush(self, uploads: UploadManager) -> None:
+        if not self._pending_rows:
+            self._batch_started = self.clock()
+            return
+        columns = {name: np.concatenate([batch[name] for batch in self._pending]) for name in self._pending[0]}
+        rows = self._pending_rows
+        self._pending, self._pending_rows, self._batch_started = [], 0, self.clock()
+
+        first_event = columns["transaction_date"][0].astype(datetime)
+        last_event = columns["transaction_date"][-1].astype(datetime)
+        key = partition_key(first_event.date(), self.run_id, self.output_format, self.shard, self._seq)
+        seq, self._seq = self._seq, self._seq + 1
+        self.tracker.register(seq, last_event)
+        payload = serialize_batch(columns, self.output_format)
+
+        await self._in_flight.acquire()
+        upload = asyncio.wrap_future(uploads.submit(payload, key))
+        entry = {
+            "key": key,
+            "rows": rows,
+            "bytes": len(payload),
+            "min_ts": first_event.isoformat(),
+            "max_ts": last_event.isoformat(),
+            "content_hash": content_hash(payload),
+        }
+        task = asyncio.ensure_future(self._track(upload, seq, entry, first_event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _track(self, upload, seq: int, entry: dict, first_event: datetime) -> None:
+        try:
+            sent = await upload
+        finally:
+            self._in_flight.release()
+        # Lote na DLQ tambem libera o watermark: o replay da DLQ e feito a parte
+        self.tracker.complete(seq)
+        self.report.watermark = self.tracker.watermark
+        if sent:
+            self.report.objects += 1
+            self.report.uploaded_rows += entry["rows"]
+            self._catalog_entries.append(entry)
+            self.report.lags.append((self._now() - first_event).total_seconds())
+        else:
+            self.report.failed += 1
+
+    def _log_report(self) -> None:
+        summary = self.report.as_dict()
+        logger.info(
+            "Realtime: %.0f/%s tx/s, %s rows in %s objects, lag p50 %.2fs p95 %.2fs, watermark %s",
+            summary["achieved_rate"],
+            summary["target_rate"],
+            summary["uploaded_rows"],
+            summary["objects"],
+            summary["lag_p50_s"],
+            summary["lag_p95_s"],
+            summary["watermark"],
+        )
+        write_watermark(self.s3_client, self.bucket_name, self.run_id, self.report)
+        # Um segmento de catalogo por relatorio, nao por micro-lote
+        entries, self._catalog_entries = self._catalog_entries, []
+        append_catalog(self.s3_client, self.bucket_name, "transactions", self.run_id, entries, logger)
+
+    async def run(self, duration: Optional[float] = None, stop: Optional[asyncio.Event] = None) -> RealtimeReport:
+        """Roda ate `duration` segundos ou ate `stop` ser sinalizado; sempre descarrega o ultimo lote."""
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.controller = RateController(self.report.target_rate, max_burst=self.max_batch_rows, clock=self.clock)
+        stop = stop or asyncio.Event()
+        started = self._batch_started = self._clock_origin = self.clock()
+        self._wall_origin = datetime.now()
+        last_report = started
+        last_tick = self._now()
+        logger.info("Streaming transactions at %s tx/s (run %s)...", self.report.target_rate, self.run_id)
+
+        with UploadManager(self.s3_client, self.bucket_name, logger, max_pending=self.max_in_flight * 2) as uploads:
+            try:
+                while not stop.is_set() and (duration is None or self.clock() - started < duration):
+                    await self._wait(stop)
+                    now = self._now()
+                    if now.date() != last_tick.date():
+                        await self._flush(uploads)
+                        last_tick = datetime.combine(now.date(), datetime.min.time())
+                    self._emit(last_tick, now)
+                    last_tick = now
+
+                    if (
+                        self._pending_rows >= self.max_batch_rows
+                        or self.clock() - self._batch_started >= self.max_batch_seconds
+                    ):
+                        await self._flush(uploads)
+                    if self.clock() - last_report >= self.report_interval:
+                        self.report.seconds = self.clock() - started
+                        self._log_report()
+                        last_report = self.clock()
+            finally:
+                await self._flush(uploads)
+                if self._tasks:
+                    await asyncio.gather(*self._tasks)
+
+        self.report.seconds = self.clock() - started
+        self._log_report()
+        return self.report
+
+
+async def run_until_signal(generator: RealtimeGenerator, duration: Optional[float] = None) -> RealtimeReport:
+    """Roda o gerador e para com SIGINT/SIGTERM descarregando o lote pendente."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    return await generator.run(duration, stop)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera transacoes continuamente (modo realtime) para o Data Lake.")
+    parser.add_argument("--rate", type=float, default=5000, help="Transacoes por segundo (alvo).")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos de execucao (padrao: ate Ctrl+C).")
+    parser.add_argument("--batch-rows", type=int, default=50_000, help="Fecha o micro-lote com N linhas.")
+    parser.add_argument("--batch-seconds", type=float, default=5.0, help="Fecha o micro-lote apos N segundos.")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Lotes enviando ao mesmo tempo.")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Segundos entre relatorios/watermark.")
+    parser.add_argument("--profile", choices=sorted(WORKLOAD_PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    settings = load_minio_settings()
+    s3_client = get_shared_s3_client(settings)
+    generator = RealtimeGenerator(
+        load_existing_account_ids(s3_client, settings.bucket),
+        s3_client,
+        settings.bucket,
+        target_rate=args.rate,
+        max_batch_rows=args.batch_rows,
+        max_batch_seconds=args.batch_seconds,
+        output_format=args.format or load_output_format(),
+        profile=args.profile,
+        seed=args.seed,
+        report_interval=args.report_interval,
+        max_in_flight=args.max_in_flight,
+    )
+    with instrumented_run(logger):
+        report = asyncio.run(run_until_signal(generator, args.duration))
+    logger.info("Stopped: %s", report.as_dict())
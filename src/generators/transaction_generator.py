@@ -1,27 +1,62 @@
-﻿import os
+﻿import argparse
+import io
+import os
 import random
-from datetime import datetime, timedelta
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from typing import Iterable, Iterator, Optional
 
-from faker import Faker
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-from src.generators.models import Transaction, TransactionType
+from src.generators.account_index import load_account_index, read_account_index_pointer
+from src.generators.jsonl_reader import JsonlReader
+from src.generators.models import TRANSACTION_ARROW_SCHEMA, Transaction, TransactionType
 from src.generators.utils import (
-    build_s3_client,
+    DEFAULT_ROW_GROUP_SIZE,
+    METRICS,
+    OUTPUT_FORMATS,
+    IngestionLedger,
+    S3MultipartWriter,
+    UploadManager,
+    append_catalog,
+    content_hash,
+    derive_batch_id,
+    derive_partition_seed,
+    discover_keys,
+    encode_jsonl,
+    file_content_hash,
     get_logger,
-    iter_jsonl_streaming,
-    list_objects_with_retry,
+    get_shared_s3_client,
+    instrumented_run,
     load_minio_settings,
-    upload_file_with_retry,
-    write_jsonl_atomic,
-    write_to_dlq,
+    load_output_format,
+    map_shards,
+    random_uuid4_array,
+    read_run_manifest,
+    resolve_master_seed,
+    time_range,
+    write_records_atomic,
+    write_run_manifest,
     get_object_with_retry,
 )
+from src.generators.workload import (
+    DEFAULT_PROFILE,
+    MAX_BATCH_ROWS,
+    WORKLOAD_PROFILES,
+    AccountSampler,
+    WorkloadProfile,
+    get_profile,
+)
 
 
 logger = get_logger(__name__)
 
-faker = Faker("pt_BR")
-
 EXTERNAL_BANKS = [
     "Banco do Brasil",
     "Itau Unibanco",
@@ -35,31 +70,90 @@ EXTERNAL_BANKS = [
     "Neon",
 ]
 
+INTERNAL_BANK = "LuisBank"
+TRANSACTION_TYPES = np.array([t.value for t in TransactionType])
+PIX_IN_INDEX = int(np.flatnonzero(TRANSACTION_TYPES == TransactionType.PIX_IN.value)[0])
+EXTERNAL_BANKS_ARRAY = np.array(EXTERNAL_BANKS)
+SECONDS_PER_DAY = 24 * 60 * 60
+# Mesmo criterio do movement_type em fct_transactions
+IS_INFLOW_TYPE = np.isin(TRANSACTION_TYPES, [TransactionType.PIX_IN.value, TransactionType.TED_IN.value])
+DECLINED_STATUS = "DECLINED"
+ACCOUNT_BALANCE_SCHEMA = pa.schema([("id", pa.string()), ("balance", pa.float64())])
+
+
+def _read_account_columns(s3_client, bucket_name: str, key: str, schema: pa.Schema) -> pa.Table:
+    obj = get_object_with_retry(s3_client, bucket_name, key)
+
+    if key.endswith(".parquet"):
+        return pq.read_table(io.BytesIO(obj["Body"].read()), columns=schema.names).cast(schema)
+
+    reader = JsonlReader(obj["Body"])
+    tables = list(reader.iter_tables(schema=schema))
+    logger.info("Decoded %s (%.1f MB) with pyarrow.json.", key, reader.bytes_read / 1024 / 1024)
+    if not tables:
+        return schema.empty_table()
+    return pa.concat_tables(tables)
 
-def load_existing_account_ids(s3_client, bucket_name: str):
-    """Baixa o arquivo de contas mais recente do MinIO para pegar IDs validos."""
+
+def _read_account_ids(s3_client, bucket_name: str, key: str) -> list:
+    table = _read_account_columns(s3_client, bucket_name, key, pa.schema([("id", pa.string())]))
+    return table.column("id").drop_null().to_pylist()
+
+
+def load_existing_account_ids(s3_client, bucket_name: str, index_key: Optional[str] = None):
+    """Carrega os IDs de contas a partir do indice `_index/accounts/` (cache local por ETag).
+
+    `index_key` fixa uma versao do indice (a registrada no manifesto de uma execucao).
+    Sem indice (landing zone anterior ao indice), cai na leitura dos arquivos de contas
+    da execucao mais recente.
+    """
     logger.info("Loading existing accounts from Data Lake...")
-    response = list_objects_with_retry(s3_client, bucket_name, "accounts/")
-    if "Contents" not in response:
-        raise RuntimeError("No accounts found. Run master_data.py first.")
+    index = load_account_index(s3_client, bucket_name, logger, key=index_key)
+    if index is not None:
+        account_ids = index.column("id").to_numpy()
+        logger.info("Loaded %s accounts from index.", len(account_ids))
+        return account_ids
 
-    last_file = sorted(response["Contents"], key=lambda x: x["Key"])[-1]["Key"]
-    logger.info("Reading file: %s", last_file)
+    logger.warning("Account index not found; falling back to reading account files.")
+    keys = sorted(discover_keys(s3_client, bucket_name, "accounts"))
+    if not keys:
+        raise RuntimeError("No accounts found. Run master_data.py first.")
 
-    obj = get_object_with_retry(s3_client, bucket_name, last_file)
+    # accounts/accounts_<run_id>[_part-NNNNN].<formato>: todos os shards da ultima execucao
+    run_prefix = keys[-1].split("_part-")[0].rsplit(".", 1)[0]
+    run_files = [key for key in keys if key.startswith(run_prefix)]
 
     account_ids = []
-    for record in iter_jsonl_streaming(obj["Body"]):
-        if "id" in record:
-            account_ids.append(record["id"])
+    for key in run_files:
+        logger.info("Reading file: %s", key)
+        account_ids.extend(_read_account_ids(s3_client, bucket_name, key))
 
     logger.info("Loaded %s accounts.", len(account_ids))
     return account_ids
 
 
-def generate_transactions(account_ids, days_history=60):
-    """Gera transacoes retroativas dia a dia."""
+def load_opening_balances(s3_client, bucket_name: str, account_ids) -> np.ndarray:
+    """Saldo inicial (`balance` do cadastro) de cada conta, alinhado a `account_ids`.
+
+    O indice de contas so guarda id/customer_id, entao le id/balance dos arquivos de contas
+    vivos; um id repetido fica com o arquivo mais recente. Contas sem cadastro comecam em zero.
+    """
+    keys = sorted(discover_keys(s3_client, bucket_name, "accounts"), reverse=True)
+    tables = [_read_account_columns(s3_client, bucket_name, key, ACCOUNT_BALANCE_SCHEMA) for key in keys]
+    accounts = pa.concat_tables(tables) if tables else ACCOUNT_BALANCE_SCHEMA.empty_table()
+    # index_in devolve a primeira ocorrencia, que e a do arquivo mais recente
+    ids = pa.array(np.asarray(account_ids, dtype=object), type=pa.string())
+    balances = pc.take(accounts.column("balance"), pc.index_in(ids, value_set=accounts.column("id")))
+    if balances.null_count:
+        logger.warning("%s account(s) without a balance in the account files; starting them at zero.", balances.null_count)
+    logger.info("Loaded opening balances for %s accounts.", len(ids))
+    return pc.fill_null(balances, 0.0).to_numpy()
+
+
+def generate_transactions(account_ids, days_history=60, seed=None):
+    """Gera transacoes retroativas dia a dia (reprodutivel com `seed`)."""
     transactions = []
+    rnd = random.Random(seed)
     start_date = datetime.now() - timedelta(days=days_history)
 
     logger.info("Generating transactions for the last %s days...", days_history)
@@ -67,28 +161,29 @@ def generate_transactions(account_ids, days_history=60):
     for day in range(days_history):
         current_date = start_date + timedelta(days=day)
 
-        base_volume = random.randint(50, 200)
+        base_volume = rnd.randint(50, 200)
         daily_volume = int(base_volume * 1.5) if current_date.day <= 10 else base_volume
 
         for _ in range(daily_volume):
-            acc_id = random.choice(account_ids)
-            t_type = random.choice(list(TransactionType))
+            acc_id = rnd.choice(account_ids)
+            t_type = rnd.choice(list(TransactionType))
 
             if t_type == "PIX_IN":
-                amount = round(random.uniform(10, 5000), 2)
+                amount = round(rnd.uniform(10, 5000), 2)
             else:
-                amount = round(random.uniform(5, 2000), 2)
+                amount = round(rnd.uniform(5, 2000), 2)
 
-            is_internal = random.random() > 0.7
-            bank = "LuisBank" if is_internal else random.choice(EXTERNAL_BANKS)
+            is_internal = rnd.random() > 0.7
+            bank = "LuisBank" if is_internal else rnd.choice(EXTERNAL_BANKS)
 
             txn_date = current_date + timedelta(
-                hours=random.randint(0, 23),
-                minutes=random.randint(0, 59),
-                seconds=random.randint(0, 59),
+                hours=rnd.randint(0, 23),
+                minutes=rnd.randint(0, 59),
+                seconds=rnd.randint(0, 59),
             )
 
             txn = Transaction(
+                id=str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
                 account_id=acc_id,
                 amount=amount,
                 transaction_type=t_type,
@@ -101,27 +196,769 @@ def generate_transactions(account_ids, days_history=60):
     return transactions
 
 
-def save_and_upload(data, s3_client, bucket_name: str):
-    filename = f"transactions_{datetime.now().strftime('%Y%m%d%H%M%S')}.jsonl"
-    local_path = os.path.join("data", filename)
-    s3_key = f"transactions/{filename}"
+class BalanceTracker:
+    """Saldo corrente (em centavos) das contas de um shard, carregado de um lote para o outro.
+
+    Saidas (OUTFLOW) maiores que o saldo disponivel sao cortadas ao saldo; sem saldo algum a
+    transacao sai DECLINED com o valor original e nao mexe no saldo, que e o que o ledger do
+    dbt (so transacoes COMPLETED) enxerga. O saldo nunca fica negativo.
+    """
+
+    def __init__(self, opening_balances):
+        balances = np.round(np.asarray(opening_balances, dtype=np.float64) * 100)
+        self.cents = np.maximum(balances, 0).astype(np.int64)
+
+    @property
+    def balances(self) -> np.ndarray:
+        return self.cents / 100
+
+    def settle(self, account_idx: np.ndarray, offsets: np.ndarray, amount: np.ndarray, is_inflow: np.ndarray) -> tuple:
+        """Aplica um lote em ordem (conta, horario) e devolve (amount, status) ajustados.
+
+        Por conta, o saldo segue b = max(b + x, 0): com S a soma corrente a partir do saldo
+        de abertura, b = S - min(0, minimo corrente de S). Soma e minimo correntes saem de
+        cumsum/minimum.accumulate sobre o lote inteiro, sem laco por linha.
+        """
+        size = len(amount)
+        status = np.full(size, "COMPLETED")
+        if size == 0:
+            return amount, status
+
+        # Chave unica (conta, segundo do dia): um argsort estavel sai bem mais barato que o lexsort
+        order = np.argsort(account_idx.astype(np.int64) * SECONDS_PER_DAY + offsets.astype(np.int64), kind="stable")
+        accounts = account_idx[order]
+        cents = np.round(amount[order] * 100).astype(np.int64)
+        delta = np.where(is_inflow[order], cents, -cents)
+        is_start = np.r_[True, accounts[1:] != accounts[:-1]]
+        starts = np.flatnonzero(is_start)
+        group = np.cumsum(is_start) - 1
+
+        running = np.cumsum(delta)
+        before_group = running[starts] - delta[starts]
+        uncut = self.cents[accounts[starts]][group] + running - before_group[group]
+        # Corte acumulado da conta = -min(0, minimo corrente de S). O deslocamento por grupo
+        # (maior que a amplitude de S) impede que o minimo de uma conta vaze para a seguinte.
+        floor = np.minimum(uncut, 0)
+        spacing = int(-floor.min()) + 1
+        cut = -(np.minimum.accumulate(floor - group * spacing) + group * spacing)
+        clipped = np.diff(cut, prepend=0)
+        clipped[starts] = cut[starts]
+
+        settled = cents - clipped
+        ends = np.r_[starts[1:] - 1, size - 1]
+        self.cents[accounts[ends]] = uncut[ends] + cut[ends]
+
+        declined = settled == 0
+        adjusted = amount.copy()
+        adjusted[order] = np.where(declined, cents, settled) / 100
+        status[order[declined]] = DECLINED_STATUS
+        return adjusted, status
+
+
+def build_transaction_columns(
+    account_ids: np.ndarray,
+    day_start: datetime,
+    size: int,
+    rng: np.random.Generator,
+    profile: Optional[WorkloadProfile] = None,
+    sampler: Optional[AccountSampler] = None,
+    balances: Optional[BalanceTracker] = None,
+) -> dict:
+    """Sorteia `size` transacoes de um dia como colunas NumPy (mesmas distribuicoes do gerador por linha).
+
+    `profile` define a curva intradiaria e `sampler` o skew por conta; sem eles, horario e
+    conta sao uniformes. Com `balances`, as saidas respeitam o saldo das contas (ver
+    `BalanceTracker`); os sorteios sao os mesmos, so os valores/status mudam.
+    """
+    type_idx = rng.integers(0, len(TRANSACTION_TYPES), size=size)
+    is_pix_in = type_idx == PIX_IN_INDEX
+    amount = np.round(
+        rng.uniform(np.where(is_pix_in, 10.0, 5.0), np.where(is_pix_in, 5000.0, 2000.0)),
+        2,
+    )
+
+    is_internal = rng.random(size) > 0.7
+    bank = np.where(
+        is_internal,
+        INTERNAL_BANK,
+        EXTERNAL_BANKS_ARRAY[rng.integers(0, len(EXTERNAL_BANKS_ARRAY), size=size)],
+    )
+
+    if profile is None:
+        offsets = rng.integers(0, SECONDS_PER_DAY, size=size)
+    else:
+        offsets = profile.draw_offsets(rng, size)
+    offsets = offsets.astype("timedelta64[s]")
+
+    ids = random_uuid4_array(rng, size)
+    if sampler is None:
+        account_idx = rng.integers(0, len(account_ids), size=size)
+    else:
+        account_idx = sampler.sample(rng, size)
+
+    status = np.full(size, "COMPLETED")
+    if balances is not None:
+        amount, status = balances.settle(account_idx, offsets, amount, IS_INFLOW_TYPE[type_idx])
+
+    return {
+        "id": ids,
+        "account_id": account_ids[account_idx],
+        "amount": amount,
+        "transaction_type": TRANSACTION_TYPES[type_idx],
+        "transaction_date": np.datetime64(day_start, "us") + offsets,
+        "status": status,
+        "counterparty_bank": bank,
+    }
+
+
+def validate_sample(columns: dict, sample_size: int, rng: np.random.Generator) -> int:
+    """Valida com o modelo pydantic apenas uma amostra das linhas do lote."""
+    total = len(columns["id"])
+    if sample_size <= 0 or total == 0:
+        return 0
+
+    picked = rng.choice(total, size=min(sample_size, total), replace=False)
+    for i in picked:
+        row = {name: values[i] for name, values in columns.items()}
+        row["transaction_date"] = row["transaction_date"].astype(datetime)
+        Transaction(**row)
+    return len(picked)
+
+
+def history_dates(days_history: int, as_of: Optional[date] = None) -> list:
+    """Dias de particao gerados por uma execucao: os `days_history` dias anteriores a `as_of`."""
+    as_of = as_of or date.today()
+    return [as_of - timedelta(days=days_history - day) for day in range(days_history)]
+
+
+def iter_partition_batches(
+    account_ids,
+    partition_date: date,
+    master_seed: int,
+    shard: int = 0,
+    validation_sample=10,
+    volume_scale=1.0,
+    profile: Optional[WorkloadProfile] = None,
+    sampler: Optional[AccountSampler] = None,
+    max_batch_rows: int = MAX_BATCH_ROWS,
+    balances: Optional[BalanceTracker] = None,
+) -> Iterator[dict]:
+    """Gera os lotes colunares de uma particao (dia, shard) a partir da seed mestre.
+
+    A seed vem de `derive_partition_seed`, entao a particao nao depende dos outros dias:
+    regerar uma particao custa so o tamanho dela. Dias acima de `max_batch_rows` saem em
+    varios lotes, cada um com seu proprio Generator filho. `balances` e a excecao: o saldo
+    vem dos dias anteriores (ver `generate_transaction_batches`).
+    """
+    profile = profile or get_profile(DEFAULT_PROFILE)
+    accounts = np.asarray(account_ids, dtype=object)
+    if sampler is None:
+        sampler = AccountSampler(len(accounts), profile.zipf_exponent, master_seed, shard)
+
+    root = np.random.SeedSequence(derive_partition_seed(master_seed, "transactions", partition_date, shard))
+    volume_rng, sample_rng = (np.random.default_rng(child) for child in root.spawn(2))
+    # Dias alinhados a meia-noite: cada lote cai inteiro em uma particao dt=YYYY-MM-DD
+    day_start = datetime.combine(partition_date, time.min)
+    remaining = int(round(profile.daily_volume(partition_date, volume_rng) * volume_scale))
+
+    while True:
+        size = min(remaining, max_batch_rows)
+        data_rng = np.random.default_rng(root.spawn(1)[0])
+        with METRICS.span("generate", rows=size):
+            columns = build_transaction_columns(accounts, day_start, size, data_rng, profile, sampler, balances)
+            validate_sample(columns, validation_sample, sample_rng)
+        yield columns
+        remaining -= size
+        if remaining <= 0:
+            return
+
+
+def generate_partition(account_ids, partition_date: date, master_seed: int, shard: int = 0, **kwargs) -> dict:
+    """A particao inteira em um unico lote (ver `iter_partition_batches`)."""
+    batches = list(iter_partition_batches(account_ids, partition_date, master_seed, shard, **kwargs))
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+
+def generate_transaction_batches(
+    account_ids,
+    days_history=60,
+    seed=None,
+    validation_sample=10,
+    volume_scale=1.0,
+    shard=0,
+    as_of: Optional[date] = None,
+    partitions: Optional[Iterable[date]] = None,
+    profile: Optional[WorkloadProfile] = None,
+    max_batch_rows: int = MAX_BATCH_ROWS,
+    opening_balances=None,
+) -> Iterator[dict]:
+    """Gera transacoes retroativas em lotes colunares, dia a dia (ver `iter_partition_batches`).
+
+    `volume_scale` ajusta o volume diario quando o gerador roda sobre uma fatia das contas (shard);
+    `partitions` restringe a geracao a alguns dias (backfill de particoes especificas).
+    Com `opening_balances` (alinhado a `account_ids`) as saidas respeitam o saldo das contas;
+    o saldo de um dia depende dos anteriores, entao `partitions` regera o historico desde o
+    primeiro dia e so entrega os dias pedidos.
+    """
+    master_seed = resolve_master_seed(seed)
+    profile = profile or get_profile(DEFAULT_PROFILE)
+    accounts = np.asarray(account_ids, dtype=object)
+    sampler = AccountSampler(len(accounts), profile.zipf_exponent, master_seed, shard)
+    dates = list(partitions) if partitions else history_dates(days_history, as_of)
+    balances = BalanceTracker(opening_balances) if opening_balances is not None else None
+    wanted = set(dates)
+    if balances is not None and partitions:
+        dates = [day for day in history_dates(days_history, as_of) if day <= max(wanted)]
+
+    logger.info("Generating transaction batches for %s day(s) (profile %s)...", len(dates), profile.name)
+
+    for partition_date in dates:
+        batches = iter_partition_batches(
+            accounts,
+            partition_date,
+            master_seed,
+            shard,
+            validation_sample,
+            volume_scale,
+            profile=profile,
+            sampler=sampler,
+            max_batch_rows=max_batch_rows,
+            balances=balances,
+        )
+        if partition_date in wanted:
+            yield from batches
+        else:
+            # Dia anterior aos pedidos: gerado so para levar o saldo adiante
+            for _ in batches:
+                pass
+
+
+def columns_to_records(columns: dict) -> list:
+    """Converte um lote colunar para a mesma forma de `model_dump(mode="json")`."""
+    serialized = {name: values.tolist() for name, values in columns.items()}
+    serialized["transaction_date"] = np.datetime_as_string(
+        columns["transaction_date"], unit="us"
+    ).tolist()
+    names = list(serialized)
+    return [dict(zip(names, row)) for row in zip(*serialized.values())]
+
+
+def columns_to_record_batch(columns: dict) -> pa.RecordBatch:
+    arrays = []
+    for field in TRANSACTION_ARROW_SCHEMA:
+        array = pa.array(columns[field.name], type=field.type)
+        # Colunas numpy unicode grandes viram ChunkedArray na conversao
+        arrays.append(array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array)
+    return pa.RecordBatch.from_arrays(arrays, schema=TRANSACTION_ARROW_SCHEMA)
+
+
+def partition_key(partition_date: date, run_id: str, output_format: str, shard: int = 0, chunk: int = 0) -> str:
+    """Chave Hive-style: transactions/dt=YYYY-MM-DD/part-<shard>-<chunk>-<run_id>.<formato>.
+
+    A engine batch passa o `batch_id` no lugar do run_id: a chave fica deterministica e
+    uma reexecucao sobrescreve o mesmo objeto em vez de criar outro.
+    """
+    return (
+        f"transactions/dt={partition_date.isoformat()}/"
+        f"part-{shard:05d}-{chunk:05d}-{run_id}.{output_format}"
+    )
+
+
+def batch_partition_date(columns: dict) -> date:
+    return columns["transaction_date"][0].astype("datetime64[D]").item()
+
+
+def save_and_upload(data, s3_client, bucket_name: str, output_format: str = "parquet"):
+    """Agrupa os registros por dia de transacao e sobe as particoes em paralelo com retry.
+
+    Particoes com conteudo identico a um lote ja catalogado (mesmo `content_hash`) nao sobem.
+    """
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    ledger = IngestionLedger.load(s3_client, bucket_name, "transactions")
+    partitions = defaultdict(list)
+    for record in data:
+        partitions[date.fromisoformat(record["transaction_date"][:10])].append(record)
+
+    logger.info("Saving %s transactions as %s in %s partitions...", len(data), output_format, len(partitions))
+
+    files, entries = [], []
+    for partition_date, records in sorted(partitions.items()):
+        s3_key = partition_key(partition_date, run_id, output_format)
+        local_path = os.path.join("data", s3_key)
+        write_records_atomic(records, local_path, output_format, TRANSACTION_ARROW_SCHEMA)
+        digest = file_content_hash(local_path)
+        if ledger.find(digest) is not None:
+            logger.info("Skipping %s: same content already ingested as %s.", s3_key, ledger.find(digest)["key"])
+            continue
+        files.append((local_path, s3_key))
+        dates = sorted(record["transaction_date"] for record in records)
+        entries.append(
+            {
+                "key": s3_key,
+                "rows": len(records),
+                "bytes": os.path.getsize(local_path),
+                "min_ts": dates[0],
+                "max_ts": dates[-1],
+                "content_hash": digest,
+            }
+        )
+
+    report = UploadManager(s3_client, bucket_name, logger).upload_many(files)
+    if report.failed:
+        raise RuntimeError(f"{len(report.failed)} partition(s) sent to DLQ: {report.dlq_paths}")
+    append_catalog(s3_client, bucket_name, "transactions", run_id, entries, logger)
+    logger.info("Upload completed.")
+
+
+def _write_parquet_stream(batches, sink, row_group_size: int) -> int:
+    """Escreve lotes no sink como Parquet zstd, agrupando-os em row groups de ~row_group_size linhas."""
+    total = 0
+    pending, pending_rows = [], 0
+    with pq.ParquetWriter(sink, TRANSACTION_ARROW_SCHEMA, compression="zstd") as writer:
+        for columns in batches:
+            batch = columns_to_record_batch(columns)
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            total += batch.num_rows
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+                pending, pending_rows = [], 0
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+    return total
+
+
+def stream_and_upload(
+    batches,
+    s3_client,
+    bucket_name: str,
+    output_format: str = "parquet",
+    max_in_flight: int = 4,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    run_id: str = None,
+    shard: int = 0,
+    batch_scope: Optional[str] = None,
+    ledger: Optional[IngestionLedger] = None,
+) -> list:
+    """Envia cada lote diario para a sua particao (dt=YYYY-MM-DD) conforme e gerado (memoria constante).
+
+    Com `batch_scope` cada lote ganha um `batch_id` deterministico (ver `derive_batch_id`),
+    usado na chave; com `ledger`, lotes ja catalogados com hash nao sao enviados de novo.
+    Retorna uma entrada por lote (key, particao, linhas, bytes, hash) para o manifesto; os
+    pulados vem com `skipped` e a chave do objeto ja gravado.
+    """
+    run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S")
+    chunks_per_day = defaultdict(int)
+    entries = []
+    skipped = 0
+
+    logger.info("Streaming transactions to s3://%s/transactions/dt=*/ (shard %s)...", bucket_name, shard)
+    with UploadManager(s3_client, bucket_name, logger) as uploads:
+        for columns in batches:
+            if len(columns["id"]) == 0:
+                continue
+            partition_date = batch_partition_date(columns)
+            chunk = chunks_per_day[partition_date]
+            chunks_per_day[partition_date] += 1
+            batch_id = derive_batch_id(batch_scope, "transactions", partition_date, shard, chunk) if batch_scope else None
+            ingested = ledger.batch(batch_id, output_format) if ledger is not None else None
+            if ingested is not None:
+                # Ja gravado e catalogado por uma execucao anterior: nem serializa nem sobe
+                entry = IngestionLedger.entry(ingested)
+                entries.append({**entry, "partition": partition_date.isoformat(), "shard": shard, "skipped": True})
+                METRICS.increment("batches_skipped")
+                skipped += 1
+                continue
+            s3_key = partition_key(partition_date, batch_id or run_id, output_format, shard, chunk)
+
+            with S3MultipartWriter(
+                s3_client,
+                bucket_name,
+                s3_key,
+                logger,
+                max_in_flight=max_in_flight,
+                line_aligned=output_format == "jsonl",
+                uploads=uploads,
+            ) as writer:
+                # As partes sobem em background; o span mede serializar e entregar ao writer
+                with METRICS.span("serialize") as span:
+                    if output_format == "parquet":
+                        rows = _write_parquet_stream([columns], writer, row_group_size)
+                    else:
+                        records = columns_to_records(columns)
+                        writer.write(encode_jsonl(records))
+                        rows = len(records)
+                    span.rows, span.bytes = rows, writer.bytes_written
+
+            min_ts, max_ts = time_range(columns["transaction_date"])
+            entries.append(
+                {
+                    "key": s3_key,
+                    "partition": partition_date.isoformat(),
+                    "shard": shard,
+                    "rows": rows,
+                    "bytes": writer.bytes_written,
+                    "min_ts": min_ts,
+                    "max_ts": max_ts,
+                    "batch_id": batch_id,
+                    "content_hash": writer.content_hash,
+                }
+            )
+
+    if uploads.report.failed:
+        raise RuntimeError(f"{len(uploads.report.failed)} partition(s) sent to DLQ: {uploads.report.dlq_paths}")
+
+    total = sum(entry["rows"] for entry in entries if not entry.get("skipped"))
+    logger.info(
+        "Upload completed (%s transactions in %s partitions, %s batch(es) already ingested).",
+        total,
+        len(chunks_per_day),
+        skipped,
+    )
+    return entries
+
+
+@dataclass(frozen=True)
+class TransactionShard:
+    shard: int
+    account_ids: tuple
+    volume_scale: float
+    master_seed: int
+    run_id: str
+    days_history: int
+    output_format: str
+    as_of: date
+    partitions: tuple = ()
+    profile: str = DEFAULT_PROFILE
+    daily_volume: Optional[int] = None
+    batch_keys: bool = False
+    skip_ingested: bool = False
+    opening_balances: Optional[tuple] = None
+
+
+def shard_batch_scope(spec: TransactionShard) -> str:
+    """Entradas que definem o conteudo dos lotes de um shard (ver `derive_batch_id`).
+
+    O formato fica de fora: o mesmo lote em JSONL ou Parquet tem o mesmo ID, e o
+    `IngestionLedger` procura o lote por (`batch_id`, formato).
+    """
+    accounts = content_hash("\n".join(spec.account_ids).encode("utf-8"))
+    scope = f"{spec.master_seed}:{spec.profile}:{spec.daily_volume}:{spec.volume_scale!r}:{accounts}"
+    if spec.opening_balances is not None:
+        # Saldos mudam valores e status dos lotes; sem eles o escopo fica o de antes
+        scope += ":" + content_hash(np.asarray(spec.opening_balances, dtype=np.float64).tobytes())
+    return scope
+
+
+def run_transaction_shard(spec: TransactionShard, client_factory, bucket_name: str) -> list:
+    """Gera e envia as transacoes de uma faixa de contas; roda dentro de um processo do pool."""
+    s3_client = client_factory()
+    ledger = IngestionLedger.load(s3_client, bucket_name, "transactions") if spec.skip_ingested else None
+    batches = generate_transaction_batches(
+        list(spec.account_ids),
+        days_history=spec.days_history,
+        seed=spec.master_seed,
+        volume_scale=spec.volume_scale,
+        shard=spec.shard,
+        as_of=spec.as_of,
+        partitions=spec.partitions,
+        profile=get_profile(spec.profile, spec.daily_volume),
+        opening_balances=spec.opening_balances,
+    )
+    entries = stream_and_upload(
+        batches,
+        s3_client,
+        bucket_name,
+        spec.output_format,
+        run_id=spec.run_id,
+        shard=spec.shard,
+        batch_scope=shard_batch_scope(spec) if spec.batch_keys else None,
+        ledger=ledger,
+    )
+    for entry in entries:
+        entry["seed"] = derive_partition_seed(
+            spec.master_seed, "transactions", date.fromisoformat(entry["partition"]), spec.shard
+        )
+    return entries
+
+
+def build_shard_specs(
+    account_ids,
+    workers: int,
+    master_seed: int,
+    run_id: str,
+    days_history: int,
+    output_format: str,
+    as_of: date,
+    partitions: tuple = (),
+    profile: str = DEFAULT_PROFILE,
+    daily_volume: Optional[int] = None,
+    batch_keys: bool = False,
+    skip_ingested: bool = False,
+    opening_balances=None,
+) -> list:
+    """Divide as contas ordenadas em `workers` faixas contiguas (as mesmas para o mesmo conjunto de contas).
+
+    Cada conta fica num shard so, entao o saldo (`opening_balances`, alinhado a `account_ids`)
+    e estado local do shard.
+    """
+    ordered = sorted(account_ids)
+    slices = np.array_split(np.asarray(ordered, dtype=object), workers)
+    balance_of = dict(zip(account_ids, opening_balances)) if opening_balances is not None else None
+    return [
+        TransactionShard(
+            shard=shard,
+            account_ids=tuple(account_slice),
+            volume_scale=len(account_slice) / len(ordered),
+            master_seed=master_seed,
+            run_id=run_id,
+            days_history=days_history,
+            output_format=output_format,
+            as_of=as_of,
+            partitions=partitions,
+            profile=profile,
+            daily_volume=daily_volume,
+            batch_keys=batch_keys,
+            skip_ingested=skip_ingested,
+            opening_balances=tuple(balance_of[account] for account in account_slice) if balance_of else None,
+        )
+        for shard, account_slice in enumerate(slices)
+    ]
+
+
+def generate_sharded(
+    account_ids,
+    workers: int,
+    client_factory,
+    bucket_name: str,
+    days_history: int = 60,
+    master_seed=None,
+    output_format: str = "parquet",
+    as_of: Optional[date] = None,
+    account_index: Optional[str] = None,
+    profile: str = DEFAULT_PROFILE,
+    daily_volume: Optional[int] = None,
+    opening_balances=None,
+) -> dict:
+    """Divide as contas em faixas contiguas (uma por processo) e grava o manifesto da execucao.
+
+    O manifesto guarda tudo o que `regenerate_partitions` precisa para refazer uma particao.
+    A ingestao e idempotente: as chaves vem do `batch_id` e lotes ja catalogados sao
+    pulados, entao reexecutar com a mesma seed (ou depois de uma falha) nao duplica dados.
+    `opening_balances` (alinhado a `account_ids`) liga o modo que respeita saldos.
+    """
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    as_of = as_of or date.today()
+    entropy = resolve_master_seed(master_seed)
+    specs = build_shard_specs(
+        account_ids,
+        workers,
+        entropy,
+        run_id,
+        days_history,
+        output_format,
+        as_of,
+        profile=profile,
+        daily_volume=daily_volume,
+        batch_keys=True,
+        skip_ingested=True,
+        opening_balances=opening_balances,
+    )
+
+    logger.info("Generating transactions in %s shard(s) (master seed %s)...", workers, entropy)
+    results = map_shards(
+        partial(run_transaction_shard, client_factory=client_factory, bucket_name=bucket_name), specs, workers
+    )
+
+    manifest = {
+        "run_id": run_id,
+        "master_seed": entropy,
+        "workers": workers,
+        "days_history": days_history,
+        "as_of": as_of.isoformat(),
+        "output_format": output_format,
+        "profile": profile,
+        "daily_volume": daily_volume,
+        "account_index": account_index,
+        "key_scheme": "batch_id",
+        "respect_balances": opening_balances is not None,
+        "files": [entry for shard_entries in results for entry in shard_entries],
+    }
+    s3_client = client_factory()
+    uploaded = [entry for entry in manifest["files"] if not entry.get("skipped")]
+    if len(uploaded) < len(manifest["files"]):
+        logger.info("%s of %s batch(es) already ingested.", len(manifest["files"]) - len(uploaded), len(manifest["files"]))
+    append_catalog(s3_client, bucket_name, "transactions", run_id, uploaded, logger)
+    write_run_manifest(s3_client, bucket_name, "transactions", run_id, manifest, logger)
+    return manifest
+
+
+def regenerate_partitions(
+    manifest: dict,
+    account_ids,
+    partitions: Iterable[date],
+    client_factory,
+    bucket_name: str,
+    shards: Optional[Iterable[int]] = None,
+    opening_balances=None,
+) -> list:
+    """Regera so as particoes (dias) pedidas de uma execucao, sobrescrevendo os mesmos objetos.
+
+    `account_ids` precisa ser o mesmo conjunto de contas da execucao original (o indice
+    registrado em `manifest["account_index"]`), senao as faixas por shard mudam. Execucoes
+    que respeitaram saldos pedem os mesmos `opening_balances`. Sem `shards` (vazio ou None)
+    todos os shards sao regerados.
+    """
+    if manifest.get("respect_balances") and opening_balances is None:
+        raise ValueError(f"Run {manifest['run_id']} respected account balances; pass opening_balances to regenerate it.")
+    partitions = tuple(sorted(set(partitions)))
+    specs = build_shard_specs(
+        account_ids,
+        manifest["workers"],
+        manifest["master_seed"],
+        manifest["run_id"],
+        manifest["days_history"],
+        manifest["output_format"],
+        date.fromisoformat(manifest["as_of"]),
+        partitions,
+        profile=manifest.get("profile", DEFAULT_PROFILE),
+        daily_volume=manifest.get("daily_volume"),
+        # Manifestos anteriores ao batch_id usam o run_id na chave
+        batch_keys=manifest.get("key_scheme") == "batch_id",
+        opening_balances=opening_balances if manifest.get("respect_balances") else None,
+    )
+    if shards:
+        specs = [spec for spec in specs if spec.shard in set(shards)]
+
+    logger.info("Regenerating %s partition(s) x %s shard(s) of run %s...", len(partitions), len(specs), manifest["run_id"])
+    results = map_shards(
+        partial(run_transaction_shard, client_factory=client_factory, bucket_name=bucket_name), specs, len(specs)
+    )
+    entries = [entry for shard_entries in results for entry in shard_entries]
+    # Mesmas chaves da execucao original: a linha nova do catalogo substitui a antiga
+    append_catalog(client_factory(), bucket_name, "transactions", manifest["run_id"], entries, logger)
+    return entries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera transacoes sinteticas e envia para o Data Lake.")
+    parser.add_argument("--days", type=int, default=60, help="Dias de historico a gerar.")
+    parser.add_argument(
+        "--engine",
+        choices=["batch", "row"],
+        default="batch",
+        help="batch = engine vetorizada com upload em streaming; row = gerador original por linha.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed mestre da engine batch.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processos da engine batch (um shard de contas por processo).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help="Formato da landing zone (padrao: LANDING_FORMAT ou parquet).",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(WORKLOAD_PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Perfil de carga da engine batch (volume, sazonalidade e skew por conta).",
+    )
+    parser.add_argument(
+        "--daily-volume",
+        type=int,
+        default=None,
+        help="Volume base por dia (+-10%%), sobrescrevendo o do perfil.",
+    )
+    parser.add_argument(
+        "--as-of",
+        type=date.fromisoformat,
+        default=None,
+        help="Dia de referencia (YYYY-MM-DD); o historico termina no dia anterior. Padrao: hoje.",
+    )
+    parser.add_argument(
+        "--regenerate",
+        metavar="RUN_ID",
+        default=None,
+        help="Regera particoes de uma execucao anterior (seed, shards e contas vem do manifesto).",
+    )
+    parser.add_argument(
+        "--partition",
+        type=date.fromisoformat,
+        action="append",
+        default=[],
+        help="Dia (YYYY-MM-DD) a regerar com --regenerate; pode repetir.",
+    )
+    parser.add_argument(
+        "--shard",
+        type=int,
+        action="append",
+        default=[],
+        help="Restringe --regenerate a estes shards; pode repetir (padrao: todos).",
+    )
+    parser.add_argument(
+        "--respect-balances",
+        action="store_true",
+        help="Engine batch: saidas nao deixam a conta negativa (parte do saldo inicial do cadastro).",
+    )
+    return parser.parse_args(argv)
 
-    logger.info("Saving %s transactions...", len(data))
-    write_jsonl_atomic(data, local_path)
 
-    try:
-        upload_file_with_retry(s3_client, local_path, bucket_name, s3_key, logger)
-        logger.info("Upload completed.")
-    except Exception as exc:
-        write_to_dlq(local_path, f"upload_failed:{exc}", logger)
-        raise
+def run_regeneration(args, settings, s3_client) -> list:
+    manifest = read_run_manifest(s3_client, settings.bucket, "transactions", args.regenerate)
+    if not args.partition:
+        raise SystemExit("--regenerate precisa de pelo menos um --partition.")
+    if not manifest.get("account_index"):
+        logger.warning("Manifest has no account index; using the latest one (shards may differ).")
+    ids = load_existing_account_ids(s3_client, settings.bucket, manifest.get("account_index"))
+    balances = load_opening_balances(s3_client, settings.bucket, ids) if manifest.get("respect_balances") else None
+    return regenerate_partitions(
+        manifest,
+        ids,
+        args.partition,
+        partial(get_shared_s3_client, settings),
+        settings.bucket,
+        shards=args.shard,
+        opening_balances=balances,
+    )
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    output_format = args.format or load_output_format()
     settings = load_minio_settings()
-    s3_client = build_s3_client(settings)
+    s3_client = get_shared_s3_client(settings)
 
-    ids = load_existing_account_ids(s3_client, settings.bucket)
-    if ids:
-        txns = generate_transactions(ids)
-        save_and_upload(txns, s3_client, settings.bucket)
+    with instrumented_run(logger):
+        if args.regenerate:
+            run_regeneration(args, settings, s3_client)
+        else:
+            pointer = read_account_index_pointer(s3_client, settings.bucket)
+            ids = load_existing_account_ids(s3_client, settings.bucket)
+            if len(ids):
+                if args.engine == "row":
+                    if args.respect_balances:
+                        logger.warning("--respect-balances only applies to the batch engine; ignoring it.")
+                    txns = generate_transactions(ids, days_history=args.days, seed=args.seed)
+                    save_and_upload(txns, s3_client, settings.bucket, output_format)
+                else:
+                    generate_sharded(
+                        ids,
+                        args.workers,
+                        partial(get_shared_s3_client, settings),
+                        settings.bucket,
+                        days_history=args.days,
+                        master_seed=args.seed,
+                        output_format=output_format,
+                        as_of=args.as_of,
+                        account_index=pointer["key"] if pointer else None,
+                        profile=args.profile,
+                        daily_volume=args.daily_volume,
+                        opening_balances=(
+                            load_opening_balances(s3_client, settings.bucket, ids) if args.respect_balances else None
+                        ),
+                    )
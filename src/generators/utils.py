@@ -1,15 +1,45 @@
-﻿import json
+﻿import cProfile
+import hashlib
+import io
+import json
 import logging
 import os
 import shutil
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Iterable, Iterator
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, Optional, Sequence
 
 import boto3
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, before_sleep_log
 
+from src.generators.jsonl_reader import JsonlReader
+
+
+# Byte -> dois digitos hex ASCII em um uint16 (little-endian: o primeiro digito no byte baixo)
+_HEX_PAIRS = np.frombuffer("".join(f"{i:02x}" for i in range(256)).encode("ascii"), dtype="<u2")
+# (inicio no UUID, fim no UUID, inicio nos 32 digitos hex) de cada grupo 8-4-4-4-12
+_UUID_GROUPS = ((0, 8, 0), (9, 13, 8), (14, 18, 12), (19, 23, 16), (24, 36, 20))
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024  # S3 exige >= 5 MiB por parte (exceto a ultima)
+DEFAULT_ROW_GROUP_SIZE = 256_000
+DEFAULT_LIST_WORKERS = 16
+OUTPUT_FORMATS = ("parquet", "jsonl")
+
 
 @dataclass(frozen=True)
 class MinioSettings:
@@ -47,22 +77,241 @@ def load_minio_settings() -> MinioSettings:
     )
 
 
-def build_s3_client(settings: MinioSettings):
+def load_output_format() -> str:
+    output_format = os.getenv("LANDING_FORMAT", "parquet").lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"LANDING_FORMAT must be one of {OUTPUT_FORMATS}, got '{output_format}'.")
+    return output_format
+
+
+def build_s3_client(settings: MinioSettings, max_pool_connections: int = 10):
     return boto3.client(
         "s3",
         endpoint_url=settings.endpoint,
         aws_access_key_id=settings.access_key,
         aws_secret_access_key=settings.secret_key,
+        config=Config(max_pool_connections=max_pool_connections),
+    )
+
+
+_SHARED_CLIENTS = {}
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+
+def get_shared_s3_client(settings: MinioSettings, max_pool_connections: Optional[int] = None):
+    """Cliente boto3 unico por processo (clientes sao thread-safe) com pool de conexoes configuravel.
+
+    A chave inclui o PID: processos filhos de um ProcessPoolExecutor criam o proprio cliente.
+    """
+    pool_size = max_pool_connections or int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+    cache_key = (os.getpid(), settings, pool_size)
+    with _SHARED_CLIENTS_LOCK:
+        if cache_key not in _SHARED_CLIENTS:
+            _SHARED_CLIENTS[cache_key] = build_s3_client(settings, max_pool_connections=pool_size)
+        return _SHARED_CLIENTS[cache_key]
+
+
+def build_transfer_config(
+    part_size_mb: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> TransferConfig:
+    """TransferConfig do boto3 (tamanho de parte e threads por arquivo), ajustavel por env."""
+    part_size = (part_size_mb or int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "16"))) * 1024 * 1024
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=max_concurrency or int(os.getenv("S3_MAX_CONCURRENCY", "4")),
     )
 
 
+@dataclass
+class SpanStats:
+    count: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class Span:
+    """Medicao em andamento; `rows`/`bytes` podem ser preenchidos dentro do bloco."""
+
+    name: str
+    rows: int = 0
+    bytes: int = 0
+
+
+class MetricsRegistry:
+    """Metricas agregadas do processo: spans (tempo, linhas, bytes) e contadores.
+
+    Spans medem as etapas quentes (generate, serialize, write, s3.*, dashboard.query);
+    contadores guardam retries por chamada S3 e hits/misses do cache do dashboard.
+    `write` grava JSON ou, para caminhos `.prom`, texto no formato do Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_write = None
+        self.spans = defaultdict(SpanStats)
+        self.counters = defaultdict(float)
+
+    @contextmanager
+    def span(self, name: str, rows: int = 0, bytes: int = 0):
+        handle = Span(name, rows, bytes)
+        failed = False
+        start = time.perf_counter()
+        try:
+            yield handle
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.spans[name]
+                stats.count += 1
+                stats.errors += failed
+                stats.seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                stats.rows += handle.rows
+                stats.bytes += handle.bytes
+
+    def increment(self, name: str, label: str = "", value: float = 1) -> None:
+        with self._lock:
+            self.counters[(name, label)] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "spans": {name: asdict(stats) for name, stats in sorted(self.spans.items())},
+                "counters": [
+                    {"name": name, "label": label, "value": value}
+                    for (name, label), value in sorted(self.counters.items())
+                ],
+            }
+
+    def merge(self, snapshot: dict) -> None:
+        """Soma as metricas de outro processo (ver `map_shards`)."""
+        with self._lock:
+            for name, values in snapshot["spans"].items():
+                stats = self.spans[name]
+                for attr in ("count", "errors", "seconds", "rows", "bytes"):
+                    setattr(stats, attr, getattr(stats, attr) + values[attr])
+                stats.max_seconds = max(stats.max_seconds, values["max_seconds"])
+            for counter in snapshot["counters"]:
+                self.counters[(counter["name"], counter["label"])] += counter["value"]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def to_prometheus(self, prefix: str = "luisbank") -> str:
+        snapshot = self.snapshot()
+        lines = []
+        for attr, kind in (
+            ("count", "counter"),
+            ("errors", "counter"),
+            ("seconds", "counter"),
+            ("max_seconds", "gauge"),
+            ("rows", "counter"),
+            ("bytes", "counter"),
+        ):
+            metric = f"{prefix}_span_{attr}" + ("_total" if kind == "counter" else "")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, values in snapshot["spans"].items():
+                lines.append(f'{metric}{{span="{name}"}} {values[attr]}')
+        for counter in snapshot["counters"]:
+            lines.append(f'{prefix}_{counter["name"]}_total{{label="{counter["label"]}"}} {counter["value"]}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name}={values['seconds']:.2f}s/{values['count']}x" for name, values in self.snapshot()["spans"].items()
+        )
+
+    def write(self, path: Optional[str] = None, min_interval: float = 0) -> Optional[str]:
+        """Grava as metricas em `path` (padrao: env METRICS_PATH); sem caminho, nao faz nada.
+
+        Seguro entre threads: as gravacoes sao serializadas e cada uma usa um temporario
+        proprio. Com `min_interval`, pula a gravacao se a anterior foi ha menos segundos.
+        """
+        path = path or os.getenv("METRICS_PATH")
+        if not path:
+            return None
+        with self._write_lock:
+            now = time.monotonic()
+            if min_interval and self._last_write is not None and now - self._last_write < min_interval:
+                return None
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                if path.endswith(".prom"):
+                    handle.write(self.to_prometheus())
+                else:
+                    json.dump(self.snapshot(), handle, indent=2)
+            os.replace(temp_path, path)
+            self._last_write = now
+        return path
+
+
+METRICS = MetricsRegistry()
+
+
+@contextmanager
+def profiling(path: Optional[str] = None):
+    """cProfile do bloco, gravado em `path` (padrao: env PROFILE_PATH) no formato pstats.
+
+    Abra com `python -m pstats` ou snakeviz; para amostragem sem overhead use py-spy
+    (`py-spy record -o perfil.svg -- python -m ...`), que nao precisa desta flag.
+    """
+    path = path or os.getenv("PROFILE_PATH")
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.dump_stats(path)
+
+
+@contextmanager
+def instrumented_run(logger: logging.Logger):
+    """Envolve o `__main__` de um job: perfil opcional e metricas gravadas ao final."""
+    with profiling():
+        try:
+            yield METRICS
+        finally:
+            path = METRICS.write()
+            logger.info("Stage timings: %s", METRICS.summary())
+            if path:
+                logger.info("Metrics written to %s", path)
+
+
 def _retry(logger: logging.Logger):
+    log_retry = before_sleep_log(logger, logging.WARNING)
+
+    def before_sleep(retry_state):
+        # Conta tentativas e espera do backoff por chamada (ex.: "upload_file"), que o
+        # span da tentativa nao ve
+        op = retry_state.fn.__name__.replace("_with_retry", "")
+        METRICS.increment("s3_retries", op)
+        METRICS.increment("s3_retry_wait_seconds", op, retry_state.next_action.sleep)
+        log_retry(retry_state)
+
     return retry(
         reraise=True,
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type(Exception),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
+        before_sleep=before_sleep,
     )
 
 
@@ -80,51 +329,952 @@ def ensure_bucket_exists(s3_client, bucket_name: str, logger: logging.Logger) ->
 
 
 @_retry(get_logger(__name__))
-def upload_file_with_retry(s3_client, local_path: str, bucket: str, key: str, logger: logging.Logger) -> None:
+def upload_file_with_retry(
+    s3_client,
+    local_path: str,
+    bucket: str,
+    key: str,
+    logger: logging.Logger,
+    transfer_config: Optional[TransferConfig] = None,
+) -> None:
     logger.info("Uploading to s3://%s/%s", bucket, key)
-    s3_client.upload_file(local_path, bucket, key)
+    with METRICS.span("s3.upload_file", bytes=os.path.getsize(local_path)):
+        s3_client.upload_file(local_path, bucket, key, Config=transfer_config)
 
 
 @_retry(get_logger(__name__))
-def list_objects_with_retry(s3_client, bucket: str, prefix: str):
-    return s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix)
+def upload_bytes_with_retry(
+    s3_client,
+    payload: bytes,
+    bucket: str,
+    key: str,
+    transfer_config: Optional[TransferConfig] = None,
+) -> None:
+    threshold = transfer_config.multipart_threshold if transfer_config else DEFAULT_PART_SIZE
+    with METRICS.span("s3.upload_bytes", bytes=len(payload)):
+        if len(payload) < threshold:
+            s3_client.put_object(Bucket=bucket, Key=key, Body=payload)
+        else:
+            s3_client.upload_fileobj(io.BytesIO(payload), bucket, key, Config=transfer_config)
+
+
+@_retry(get_logger(__name__))
+def list_objects_with_retry(
+    s3_client,
+    bucket: str,
+    prefix: str,
+    continuation_token: Optional[str] = None,
+    delimiter: Optional[str] = None,
+):
+    """Uma pagina do `list_objects_v2` (ate 1000 chaves); ver `iter_object_pages` para o prefixo inteiro."""
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    if continuation_token:
+        kwargs["ContinuationToken"] = continuation_token
+    if delimiter:
+        kwargs["Delimiter"] = delimiter
+    with METRICS.span("s3.list_objects") as span:
+        response = s3_client.list_objects_v2(**kwargs)
+        span.rows = response.get("KeyCount", 0)
+    return response
+
+
+def iter_object_pages(s3_client, bucket: str, prefix: str, delimiter: Optional[str] = None) -> Iterator[dict]:
+    """Todas as paginas do prefixo, seguindo o `NextContinuationToken` (retry por pagina)."""
+    token = None
+    while True:
+        response = list_objects_with_retry(s3_client, bucket, prefix, token, delimiter)
+        yield response
+        if not response.get("IsTruncated"):
+            return
+        token = response["NextContinuationToken"]
+
+
+def list_all_objects(s3_client, bucket: str, prefix: str) -> list:
+    """Todos os objetos do prefixo (`Contents` de todas as paginas)."""
+    return [item for page in iter_object_pages(s3_client, bucket, prefix) for item in page.get("Contents", [])]
+
+
+def list_common_prefixes(s3_client, bucket: str, prefix: str, delimiter: str = "/") -> list:
+    """Subprefixos diretos (ex.: `transactions/dt=2025-01-01/`) de `prefix`."""
+    return [
+        item["Prefix"]
+        for page in iter_object_pages(s3_client, bucket, prefix, delimiter)
+        for item in page.get("CommonPrefixes", [])
+    ]
+
+
+def list_objects_parallel(s3_client, bucket: str, prefixes: Sequence[str], workers: Optional[int] = None) -> list:
+    """Lista varios prefixos ao mesmo tempo (cada um paginado), na ordem de `prefixes`.
+
+    O custo de listar e a latencia por pagina; com N prefixos em paralelo a descoberta cai
+    para ~paginas/N idas ao S3. O cliente boto3 e compartilhado entre as threads.
+    """
+    workers = workers or int(os.getenv("S3_LIST_WORKERS", DEFAULT_LIST_WORKERS))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(prefixes) or 1))) as pool:
+        pages = pool.map(partial(list_all_objects, s3_client, bucket), prefixes)
+        return [item for objects in pages for item in objects]
+
+
+def list_partitioned_objects(s3_client, bucket: str, prefix: str, workers: Optional[int] = None) -> list:
+    """Lista um prefixo particionado (ex.: `transactions/`) com uma listagem por particao em paralelo.
+
+    Objetos soltos direto em `prefix` (fora de subprefixos) tambem entram.
+    """
+    loose, partitions = [], []
+    for page in iter_object_pages(s3_client, bucket, prefix, "/"):
+        loose.extend(page.get("Contents", []))
+        partitions.extend(item["Prefix"] for item in page.get("CommonPrefixes", []))
+    return loose + list_objects_parallel(s3_client, bucket, partitions, workers)
 
 
 @_retry(get_logger(__name__))
 def get_object_with_retry(s3_client, bucket: str, key: str):
-    return s3_client.get_object(Bucket=bucket, Key=key)
+    with METRICS.span("s3.get_object") as span:
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+        span.bytes = response.get("ContentLength", 0)
+    return response
+
+
+@_retry(get_logger(__name__))
+def put_object_with_retry(s3_client, bucket: str, key: str, body: bytes) -> None:
+    with METRICS.span("s3.put_object", bytes=len(body)):
+        s3_client.put_object(Bucket=bucket, Key=key, Body=body)
+
+
+@_retry(get_logger(__name__))
+def copy_object_with_retry(s3_client, bucket: str, source_key: str, key: str) -> None:
+    s3_client.copy_object(Bucket=bucket, Key=key, CopySource={"Bucket": bucket, "Key": source_key})
+
+
+@_retry(get_logger(__name__))
+def delete_objects_with_retry(s3_client, bucket: str, keys: Sequence[str]) -> None:
+    """Apaga ate 1000 chaves por chamada (limite do DeleteObjects)."""
+    for start in range(0, len(keys), 1000):
+        batch = [{"Key": key} for key in keys[start:start + 1000]]
+        s3_client.delete_objects(Bucket=bucket, Delete={"Objects": batch, "Quiet": True})
+
+
+@_retry(get_logger(__name__))
+def create_multipart_upload_with_retry(s3_client, bucket: str, key: str) -> str:
+    return s3_client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+
+
+@_retry(get_logger(__name__))
+def upload_part_with_retry(s3_client, bucket: str, key: str, upload_id: str, part_number: int, body: bytes) -> str:
+    with METRICS.span("s3.upload_part", bytes=len(body)):
+        response = s3_client.upload_part(
+            Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )
+    return response["ETag"]
+
+
+@_retry(get_logger(__name__))
+def complete_multipart_upload_with_retry(s3_client, bucket: str, key: str, upload_id: str, parts: list) -> None:
+    s3_client.complete_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+    )
+
+
+def random_uuid4_bytes(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Gera `size` UUIDs v4 como array de bytes fixos (`S36`) a partir de um Generator seedado."""
+    raw = rng.integers(0, 256, size=(size, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    hexed = _HEX_PAIRS[raw].view(np.uint8)
+    out = np.full((size, 36), ord("-"), dtype=np.uint8)
+    for start, end, offset in _UUID_GROUPS:
+        out[:, start:end] = hexed[:, offset:offset + end - start]
+    return out.view("S36").ravel()
+
+
+def random_uuid4_array(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Gera `size` UUIDs v4 (como str) de uma vez a partir de um Generator seedado."""
+    return random_uuid4_bytes(rng, size).astype("U36")
+
+
+def fixed_width_to_arrow(values: np.ndarray) -> pa.Array:
+    """Array de bytes ASCII de largura fixa (`S<n>`) -> string Arrow, sem passar por objetos Python.
+
+    Os offsets sao calculados (largura constante) e os bytes reaproveitados como buffer de
+    dados; cerca de 10x mais rapido que `pa.array` sobre `U<n>`.
+    """
+    values = np.ascontiguousarray(values)
+    width = values.dtype.itemsize
+    offsets = np.arange(0, width * (len(values) + 1), width, dtype=np.int64)
+    array = pa.Array.from_buffers(pa.large_string(), len(values), [None, pa.py_buffer(offsets), pa.py_buffer(values)])
+    return array.cast(pa.string())
+
+
+def derive_partition_seed(master_seed: int, entity: str, partition: date, shard: int = 0) -> int:
+    """Seed de uma particao (entidade, data, shard) derivada apenas da seed mestre.
+
+    Nao depende da ordem de geracao: qualquer particao pode ser regerada sozinha, em
+    tempo proporcional ao seu tamanho.
+    """
+    spawn_key = (zlib.crc32(entity.encode("utf-8")), partition.toordinal(), shard)
+    return int(np.random.SeedSequence(master_seed, spawn_key=spawn_key).generate_state(1)[0])
+
+
+def derive_batch_id(scope: str, entity: str, partition: date, shard: int = 0, chunk: int = 0) -> str:
+    """ID deterministico de um lote: as mesmas entradas (`scope`) geram os mesmos IDs.
+
+    `scope` resume o que define o conteudo do lote (seed mestre, perfil, contas do shard);
+    reexecutar com as mesmas entradas reproduz os IDs e, portanto, as mesmas chaves no S3.
+    """
+    token = f"{scope}|{entity}|{partition.isoformat()}|{shard}|{chunk}"
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def content_hash(payload) -> str:
+    """Hash do conteudo serializado de um lote (blake2b de 128 bits, hex)."""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def file_content_hash(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """`content_hash` de um arquivo local, lido em blocos."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(partial(handle.read, chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve_master_seed(master_seed: Optional[int]) -> int:
+    """Seed mestre da execucao; sem seed, sorteia uma entropia que vai para o manifesto."""
+    return np.random.SeedSequence(master_seed).entropy
+
+
+def split_evenly(total: int, parts: int) -> list:
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def _task_with_metrics(task: Callable, spec):
+    METRICS.reset()
+    result = task(spec)
+    return result, METRICS.snapshot()
+
+
+def map_shards(task: Callable, specs: Sequence, workers: int) -> list:
+    """Executa `task(spec)` para cada shard em um ProcessPoolExecutor (inline se workers == 1).
+
+    As metricas de cada processo filho voltam junto com o resultado e sao somadas ao
+    `METRICS` do processo pai.
+    """
+    if workers <= 1:
+        return [task(spec) for spec in specs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = []
+        for result, snapshot in pool.map(partial(_task_with_metrics, task), specs):
+            METRICS.merge(snapshot)
+            results.append(result)
+        return results
+
+
+def write_run_manifest(s3_client, bucket: str, entity: str, run_id: str, manifest: dict, logger: logging.Logger) -> str:
+    """Grava o manifesto da execucao em `_manifests/<entity>/<run_id>.json` (local + S3)."""
+    s3_key = f"_manifests/{entity}/{run_id}.json"
+    local_path = os.path.join("data", s3_key)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    temp_path = f"{local_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, default=str)
+    os.replace(temp_path, local_path)
+
+    if s3_client is not None:
+        upload_file_with_retry(s3_client, local_path, bucket, s3_key, logger)
+    logger.info("Run manifest written: %s", s3_key)
+    return s3_key
+
+
+def read_run_manifest(s3_client, bucket: str, entity: str, run_id: str) -> dict:
+    """Le o manifesto de uma execucao (S3, ou `data/` se `s3_client` for None)."""
+    s3_key = f"_manifests/{entity}/{run_id}.json"
+    if s3_client is None:
+        with open(os.path.join("data", s3_key), encoding="utf-8") as handle:
+            return json.load(handle)
+    return json.loads(get_object_with_retry(s3_client, bucket, s3_key)["Body"].read())
+
+
+CATALOG_PREFIX = "_catalog"
+CATALOG_TOMBSTONE_DAYS = 7
+# Uma linha por objeto gravado (action="add"), apagado ("remove") ou absorvido por uma
+# compactacao ("compacted", guarda o lote de origem); vale a mais recente de cada chave
+CATALOG_ARROW_SCHEMA = pa.schema([
+    ("key", pa.string()),
+    ("entity", pa.string()),
+    ("partition", pa.date32()),
+    ("size", pa.int64()),
+    ("rows", pa.int64()),
+    ("min_ts", pa.timestamp("us")),
+    ("max_ts", pa.timestamp("us")),
+    ("run_id", pa.string()),
+    ("action", pa.string()),
+    ("recorded_at", pa.timestamp("us")),
+    ("batch_id", pa.string()),
+    ("content_hash", pa.string()),
+])
+
+
+def time_range(values) -> tuple:
+    """(min, max) em ISO 8601 de uma coluna de timestamps (array NumPy/Arrow), para o catalogo."""
+    if len(values) == 0:
+        return None, None
+    bounds = pc.min_max(pa.array(values) if isinstance(values, np.ndarray) else values).as_py()
+    return bounds["min"].isoformat(), bounds["max"].isoformat()
+
+
+def catalog_table(entity: str, run_id: str, entries: Sequence[dict], action: str = "add") -> pa.Table:
+    """Segmento do catalogo a partir de entradas de manifesto.
+
+    Campos usados: `key`, `bytes`, `rows`, `min_ts`, `max_ts`, `batch_id` e `content_hash`.
+    """
+    keys = [entry["key"] for entry in entries]
+    partitions = [key.split("dt=", 1)[1][:10] if "/dt=" in key else None for key in keys]
+    timestamps = {
+        name: pc.cast(pa.array([entry.get(name) for entry in entries], pa.string()), pa.timestamp("us"))
+        for name in ("min_ts", "max_ts")
+    }
+    size = len(entries)
+    return pa.table(
+        {
+            "key": pa.array(keys, pa.string()),
+            "entity": pa.repeat(entity, size),
+            "partition": pc.cast(pa.array(partitions, pa.string()), pa.date32()),
+            "size": pa.array([entry.get("bytes") for entry in entries], pa.int64()),
+            "rows": pa.array([entry.get("rows") for entry in entries], pa.int64()),
+            **timestamps,
+            "run_id": pa.repeat(run_id, size),
+            "action": pa.repeat(action, size),
+            "recorded_at": pa.array([datetime.now()] * size, pa.timestamp("us")),
+            "batch_id": pa.array([entry.get("batch_id") for entry in entries], pa.string()),
+            "content_hash": pa.array([entry.get("content_hash") for entry in entries], pa.string()),
+        },
+        schema=CATALOG_ARROW_SCHEMA,
+    )
+
+
+def _catalog_segment_key(entity: str, name: str) -> str:
+    # Prefixo com timestamp: os segmentos listam em ordem de gravacao
+    return f"{CATALOG_PREFIX}/{entity}/{datetime.now():%Y%m%d%H%M%S%f}-{name}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _write_catalog_segment(s3_client, bucket: str, key: str, table: pa.Table, logger: logging.Logger) -> str:
+    local_path = os.path.join("data", key)
+    write_parquet_atomic(table, local_path, CATALOG_ARROW_SCHEMA)
+    if s3_client is not None:
+        with open(local_path, "rb") as handle:
+            put_object_with_retry(s3_client, bucket, key, handle.read())
+    return key
+
+
+def append_catalog(
+    s3_client,
+    bucket: str,
+    entity: str,
+    run_id: str,
+    entries: Sequence[dict],
+    logger: logging.Logger,
+    action: str = "add",
+) -> Optional[str]:
+    """Acrescenta um segmento `_catalog/<entity>/<...>.parquet` (local + S3); nunca reescreve os anteriores.
+
+    Leitores (`read_catalog`) e o dbt (source `landing_catalog`) descobrem os arquivos da
+    landing zone por aqui, sem listar o bucket.
+    """
+    if not entries:
+        return None
+    if s3_client is not None:
+        _seed_catalog(s3_client, bucket, entity, {entry["key"] for entry in entries}, logger)
+    key = _catalog_segment_key(entity, run_id)
+    _write_catalog_segment(s3_client, bucket, key, catalog_table(entity, run_id, entries, action), logger)
+    logger.info("Catalog updated: %s (%s %s).", key, len(entries), action)
+    return key
+
+
+def _seed_catalog(s3_client, bucket: str, entity: str, skip: set, logger: logging.Logger) -> Optional[str]:
+    """Antes do primeiro segmento de `entity`, cataloga os objetos que ja estao na landing zone.
+
+    Sem isso, os objetos gravados antes do catalogo sumiriam para `discover_keys` (e para o
+    dbt) assim que o primeiro segmento existisse. Entram como `checkpoint_catalog` faz na
+    reconciliacao: so chave e tamanho.
+    """
+    if list_objects_with_retry(s3_client, bucket, f"{CATALOG_PREFIX}/{entity}/").get("KeyCount"):
+        return None
+    listed = list_partitioned_objects(s3_client, bucket, f"{entity}/")
+    existing = [{"key": item["Key"], "bytes": item["Size"]} for item in listed if item["Key"] not in skip]
+    if not existing:
+        return None
+    key = _write_catalog_segment(
+        s3_client, bucket, _catalog_segment_key(entity, "seed"), catalog_table(entity, "reconcile", existing), logger
+    )
+    logger.info("Catalog seeded: %s (%s object(s) already in the landing zone).", key, len(existing))
+    return key
+
+
+def _read_catalog_segments(s3_client, bucket: str, entity: str, workers: Optional[int] = None) -> tuple:
+    """(chaves dos segmentos, tabela com todas as linhas) do catalogo de `entity`."""
+    prefix = f"{CATALOG_PREFIX}/{entity}/"
+    if s3_client is None:
+        directory = os.path.join("data", prefix)
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        keys = sorted(prefix + name for name in names if name.endswith(".parquet"))
+        tables = [pq.read_table(os.path.join("data", key)) for key in keys]
+    else:
+        listed = list_all_objects(s3_client, bucket, prefix)
+        keys = sorted(item["Key"] for item in listed if item["Key"].endswith(".parquet"))
+
+        def fetch(key):
+            return pq.read_table(io.BytesIO(get_object_with_retry(s3_client, bucket, key)["Body"].read()))
+
+        workers = workers or int(os.getenv("S3_LIST_WORKERS", DEFAULT_LIST_WORKERS))
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(keys) or 1))) as pool:
+            tables = list(pool.map(fetch, keys))
+    if not tables:
+        return keys, CATALOG_ARROW_SCHEMA.empty_table()
+    return keys, pa.concat_tables([_conform_catalog(table) for table in tables])
+
+
+def _conform_catalog(table: pa.Table) -> pa.Table:
+    # Segmentos gravados antes de uma coluna existir ganham a coluna nula
+    columns = [
+        table.column(field.name) if field.name in table.column_names else pa.nulls(table.num_rows, field.type)
+        for field in CATALOG_ARROW_SCHEMA
+    ]
+    return pa.Table.from_arrays(columns, names=CATALOG_ARROW_SCHEMA.names).cast(CATALOG_ARROW_SCHEMA)
+
+
+def _latest_per_key(table: pa.Table) -> pa.Table:
+    if not table.num_rows:
+        return table
+    ordered = table.sort_by([("key", "ascending"), ("recorded_at", "descending")])
+    _, first = np.unique(ordered.column("key").to_numpy(zero_copy_only=False), return_index=True)
+    return ordered.take(first)
+
+
+def resolve_catalog(table: pa.Table) -> pa.Table:
+    """Estado atual: a linha mais recente (`recorded_at`) de cada chave, sem as removidas."""
+    latest = _latest_per_key(table)
+    return latest.filter(pc.equal(latest.column("action"), "add"))
+
+
+def read_catalog(s3_client, bucket: str, entity: str, workers: Optional[int] = None) -> pa.Table:
+    """Objetos vivos de `entity` segundo o catalogo (S3, ou `data/` se `s3_client` for None)."""
+    return resolve_catalog(_read_catalog_segments(s3_client, bucket, entity, workers)[1])
+
+
+def discover_keys(s3_client, bucket: str, entity: str) -> list:
+    """Chaves vivas de `entity`: pelo catalogo ou, sem catalogo (landing anterior a ele), listando tudo.
+
+    O primeiro `append_catalog` cataloga o que ja estava na landing zone, entao um catalogo
+    nao vazio cobre tambem os objetos anteriores a ele.
+    """
+    catalog = read_catalog(s3_client, bucket, entity)
+    if catalog.num_rows:
+        return catalog.column("key").to_pylist()
+    return [item["Key"] for item in list_partitioned_objects(s3_client, bucket, f"{entity}/")]
+
+
+def key_format(key: str) -> str:
+    """Formato de um objeto da landing zone pela extensao (`parquet`, `jsonl`)."""
+    return os.path.splitext(key)[1].lstrip(".")
+
+
+class IngestionLedger:
+    """Lotes ja ingeridos de uma entidade segundo o catalogo, por `batch_id` e por `content_hash`.
+
+    Vale so o que foi catalogado com hash (objeto gravado por completo), inclusive lotes
+    que uma compactacao juntou em outro arquivo. O `batch_id` nao depende do formato, entao
+    a busca por lote e por (`batch_id`, formato): um lote gravado so em JSONL nao conta para
+    uma execucao em Parquet, ja que o dbt le um formato por vez. Objetos sem hash
+    (reconciliados pela listagem ou anteriores ao hash) nao contam e voltam a ser enviados.
+    """
+
+    def __init__(self, catalog: pa.Table):
+        rows = catalog.filter(pc.is_valid(catalog.column("content_hash"))).to_pylist()
+        self.by_key = {row["key"]: row for row in rows}
+        self.by_batch = {(row["batch_id"], key_format(row["key"])): row for row in rows if row["batch_id"]}
+        self.by_hash = {row["content_hash"]: row for row in rows}
+
+    @classmethod
+    def load(cls, s3_client, bucket: str, entity: str) -> "IngestionLedger":
+        latest = _latest_per_key(_read_catalog_segments(s3_client, bucket, entity)[1])
+        return cls(latest.filter(pc.not_equal(latest.column("action"), "remove")))
+
+    def __len__(self) -> int:
+        return len(self.by_hash)
+
+    def batch(self, batch_id: Optional[str], output_format: str) -> Optional[dict]:
+        return self.by_batch.get((batch_id, output_format)) if batch_id else None
+
+    def find(self, digest: str) -> Optional[dict]:
+        return self.by_hash.get(digest)
+
+    @staticmethod
+    def entry(row: dict) -> dict:
+        """Linha do catalogo de volta no formato de entrada de manifesto (`catalog_table`)."""
+        bounds = {name: row[name].isoformat() if row[name] else None for name in ("min_ts", "max_ts")}
+        return {
+            "key": row["key"],
+            "rows": row["rows"],
+            "bytes": row["size"],
+            **bounds,
+            "batch_id": row["batch_id"],
+            "content_hash": row["content_hash"],
+        }
+
+
+def checkpoint_catalog(
+    s3_client,
+    bucket: str,
+    entity: str,
+    logger: logging.Logger,
+    listed: Optional[list] = None,
+) -> Optional[str]:
+    """Junta os segmentos do catalogo em um so e apaga os segmentos lidos.
+
+    As linhas sao copiadas com o `recorded_at` original e as remocoes dos ultimos
+    `CATALOG_TOMBSTONE_DAYS` dias continuam no checkpoint, entao um segmento gravado em
+    paralelo ao checkpoint continua valendo. Linhas `compacted` nunca expiram: sao a
+    memoria de lotes ja ingeridos (`IngestionLedger`). Com `listed` (listagem completa do prefixo da
+    entidade) o catalogo e reconciliado com o bucket: chaves sumidas saem e chaves fora do
+    catalogo entram so com o tamanho (linhas e timestamps nulos).
+    """
+    keys, table = _read_catalog_segments(s3_client, bucket, entity)
+    if len(keys) <= 1 and listed is None:
+        return keys[0] if keys else None
+
+    latest = _latest_per_key(table)
+    cutoff = datetime.now() - timedelta(days=CATALOG_TOMBSTONE_DAYS)
+    keep = pc.or_(pc.not_equal(latest.column("action"), "remove"), pc.greater(latest.column("recorded_at"), pa.scalar(cutoff)))
+    latest = latest.filter(keep)
+    if listed is not None:
+        present = {item["Key"]: item for item in listed}
+        in_bucket = [key in present for key in latest.column("key").to_pylist()]
+        latest = latest.filter(pc.or_(pa.array(in_bucket), pc.not_equal(latest.column("action"), "add")))
+        known = set(resolve_catalog(latest).column("key").to_pylist())
+        missing = [{"key": key, "bytes": item["Size"]} for key, item in present.items() if key not in known]
+        latest = pa.concat_tables([latest, catalog_table(entity, "reconcile", missing)])
+
+    key = _write_catalog_segment(s3_client, bucket, _catalog_segment_key(entity, "checkpoint"), latest, logger)
+    for old in keys:
+        if os.path.exists(os.path.join("data", old)):
+            os.remove(os.path.join("data", old))
+    if s3_client is not None and keys:
+        delete_objects_with_retry(s3_client, bucket, keys)
+    logger.info("Catalog checkpoint %s: %s segment(s), %s live object(s).", key, len(keys), resolve_catalog(latest).num_rows)
+    return key
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
 def write_jsonl_atomic(records: Iterable[dict], local_path: str) -> None:
     os.makedirs(os.path.dirname(local_path), exist_ok=True)
     temp_path = f"{local_path}.tmp"
+    if isinstance(records, pa.Table):
+        records = records.to_pylist()
     with open(temp_path, "w", encoding="utf-8") as handle:
         for record in records:
-            handle.write(json.dumps(record) + "\n")
+            handle.write(json.dumps(record, default=_json_default) + "\n")
     os.replace(temp_path, local_path)
 
 
-def iter_jsonl_streaming(body) -> Iterator[dict]:
-    try:
-        import ijson
-
-        for record in ijson.items(body, "", multiple_values=True):
-            if record is None:
-                continue
-            yield record
-    except Exception:
-        for line in body.iter_lines():
-            if not line:
-                continue
-            yield json.loads(line.decode("utf-8"))
-
-
-def write_to_dlq(local_path: str, reason: str, logger: logging.Logger) -> str:
-    dlq_dir = os.path.join("data", "dlq")
-    os.makedirs(dlq_dir, exist_ok=True)
+def records_to_table(records, schema: pa.Schema) -> pa.Table:
+    """Converte registros (dicts no formato `model_dump(mode="json")`) em tabela Arrow tipada."""
+    if isinstance(records, pa.Table):
+        return records.select(schema.names).cast(schema)
+    rows = list(records)
+    if not rows:
+        return schema.empty_table()
+    return pa.Table.from_pylist(rows).select(schema.names).cast(schema)
+
+
+def write_parquet_atomic(
+    records,
+    local_path: str,
+    schema: pa.Schema,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> None:
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    temp_path = f"{local_path}.tmp"
+    pq.write_table(
+        records_to_table(records, schema),
+        temp_path,
+        compression="zstd",
+        row_group_size=row_group_size,
+    )
+    os.replace(temp_path, local_path)
+
+
+def write_records_atomic(records, local_path: str, output_format: str, schema: pa.Schema) -> None:
+    """Grava os registros no formato da landing zone (`parquet` ou `jsonl`) com temp + rename."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    with METRICS.span("write", rows=len(records) if hasattr(records, "__len__") else 0) as span:
+        if output_format == "parquet":
+            write_parquet_atomic(records, local_path, schema)
+        else:
+            write_jsonl_atomic(records, local_path)
+        span.bytes = os.path.getsize(local_path)
+
+
+def encode_jsonl(records: Iterable[dict]) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+def iter_jsonl_streaming(body, backend: Optional[str] = None) -> Iterator[dict]:
+    """Itera registros JSONL de um stream com o decoder mais rapido instalado (ver jsonl_reader)."""
+    return JsonlReader(body, backend=backend).iter_records()
+
+
+DLQ_DIR = os.path.join("data", "dlq")
+# Metadados de cada arquivo da DLQ (chave de destino, hash, motivo) para o replay
+DLQ_META_DIR = os.path.join("data", "dlq_meta")
+
+
+def _dlq_path(name: str) -> str:
+    os.makedirs(DLQ_DIR, exist_ok=True)
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    dlq_name = f"{os.path.basename(local_path)}.{timestamp}.dlq"
-    dlq_path = os.path.join(dlq_dir, dlq_name)
+    return os.path.join(DLQ_DIR, f"{name}.{timestamp}.dlq")
+
+
+def dlq_meta_path(dlq_path: str) -> str:
+    return os.path.join(DLQ_META_DIR, f"{os.path.basename(dlq_path)}.json")
+
+
+def _write_dlq_meta(dlq_path: str, reason: str, digest: str, key: Optional[str], object_key: Optional[str]) -> None:
+    os.makedirs(DLQ_META_DIR, exist_ok=True)
+    meta = {
+        "key": key,
+        "object_key": object_key or key,
+        "content_hash": digest,
+        "reason": reason,
+        "failed_at": datetime.now().isoformat(),
+    }
+    with open(dlq_meta_path(dlq_path), "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, indent=2)
+
+
+def write_to_dlq(local_path: str, reason: str, logger: logging.Logger, key: Optional[str] = None) -> str:
+    """Copia o arquivo para a DLQ; com `key` (destino no S3) o lote pode ser reenviado (`src.generators.dlq`)."""
+    dlq_path = _dlq_path(os.path.basename(local_path))
     shutil.copy2(local_path, dlq_path)
+    _write_dlq_meta(dlq_path, reason, file_content_hash(dlq_path), key, key)
     logger.error("Written to DLQ (%s): %s", reason, dlq_path)
     return dlq_path
+
+
+def write_bytes_to_dlq(
+    payload: bytes,
+    name: str,
+    reason: str,
+    logger: logging.Logger,
+    key: Optional[str] = None,
+    object_key: Optional[str] = None,
+) -> str:
+    """Grava os bytes na DLQ; `object_key` e o objeto de origem quando `key` e so uma parte dele."""
+    dlq_path = _dlq_path(name)
+    with open(dlq_path, "wb") as handle:
+        handle.write(payload)
+    _write_dlq_meta(dlq_path, reason, content_hash(payload), key, object_key)
+    logger.error("Written to DLQ (%s): %s", reason, dlq_path)
+    return dlq_path
+
+
+def dlq_part_key(key: str, part_number: int) -> str:
+    """Destino do replay de uma parte perdida: um objeto novo ao lado do original (mesma particao)."""
+    stem, extension = os.path.splitext(key)
+    return f"{stem}.part{part_number:05d}{extension}"
+
+
+@dataclass
+class UploadReport:
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    failed: list = field(default_factory=list)
+    dlq_paths: list = field(default_factory=list)
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+class UploadManager:
+    """Sobe muitos arquivos em paralelo a partir de um pool de threads limitado.
+
+    Aceita caminhos locais ou bytes; cada arquivo tem retry proprio (tenacity) e, se
+    esgotar as tentativas, vai para a DLQ. `submit` bloqueia quando ha `max_pending`
+    arquivos na fila (backpressure). Use um cliente com `max_pool_connections` >=
+    `max_workers * transfer_config.max_concurrency` (ver `get_shared_s3_client`).
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        logger: logging.Logger,
+        max_workers: Optional[int] = None,
+        transfer_config: Optional[TransferConfig] = None,
+        max_pending: Optional[int] = None,
+    ):
+        max_workers = max_workers or int(os.getenv("S3_UPLOAD_WORKERS", "8"))
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.logger = logger
+        self.transfer_config = transfer_config or build_transfer_config()
+        self.report = UploadReport()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers * 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+        self._started = time.perf_counter()
+
+    def submit(self, source, key: str) -> Future:
+        """Enfileira `source` (caminho local ou bytes) para s3://bucket/key.
+
+        O Future resolve para True (enviado) ou False (foi para a DLQ).
+        """
+        self._slots.acquire()
+        future = self._executor.submit(self._upload, source, key)
+        future.add_done_callback(lambda _: self._slots.release())
+        # Em execucoes longas (modo realtime) so os uploads pendentes ficam na lista
+        self._futures = [pending for pending in self._futures if not pending.done()]
+        self._futures.append(future)
+        return future
+
+    def _upload(self, source, key: str) -> bool:
+        is_path = isinstance(source, str)
+        size = os.path.getsize(source) if is_path else len(source)
+        try:
+            # Span do arquivo inteiro, com tentativas e backoff (os spans s3.* medem cada tentativa)
+            with METRICS.span("upload", bytes=size):
+                if is_path:
+                    upload_file_with_retry(
+                        self.s3_client, source, self.bucket, key, self.logger, self.transfer_config
+                    )
+                else:
+                    upload_bytes_with_retry(self.s3_client, source, self.bucket, key, self.transfer_config)
+        except Exception as exc:
+            reason = f"upload_failed:{exc}"
+            if is_path:
+                dlq_path = write_to_dlq(source, reason, self.logger, key=key)
+            else:
+                dlq_path = write_bytes_to_dlq(source, key.replace("/", "_"), reason, self.logger, key=key)
+            with self._lock:
+                self.report.failed.append(key)
+                self.report.dlq_paths.append(dlq_path)
+            return False
+        with self._lock:
+            self.report.files += 1
+            self.report.bytes += size
+        return True
+
+    def upload_many(self, items: Iterable[tuple]) -> UploadReport:
+        for source, key in items:
+            self.submit(source, key)
+        return self.close()
+
+    def close(self) -> UploadReport:
+        for future in self._futures:
+            future.result()
+        self._executor.shutdown(wait=True)
+        self.report.seconds = time.perf_counter() - self._started
+        self.logger.info(
+            "Uploaded %s file(s), %.1f MB in %.2fs (%.1f MB/s), %s failed.",
+            self.report.files,
+            self.report.bytes / 1024 / 1024,
+            self.report.seconds,
+            self.report.mb_per_s,
+            len(self.report.failed),
+        )
+        return self.report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """Arquivo de escrita que sobe partes para o S3 (multipart) conforme sao produzidas.
+
+    A memoria fica limitada a ~part_size * (max_in_flight + 1): `write` bloqueia enquanto
+    houver `max_in_flight` partes pendentes (backpressure). Objetos menores que uma parte
+    sobem com um unico PUT (em background se `uploads` for informado). Cada parte tem retry proprio;
+    se esgotar as tentativas, os bytes da parte vao para a DLQ. Com `line_aligned=True`
+    (JSONL escrito em lotes de linhas completas) o objeto e concluido sem as partes
+    perdidas, que podem ser reenviadas como objetos proprios (`dlq_part_key`); caso
+    contrario o upload e abortado. `content_hash` e o hash de todos os bytes escritos.
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        logger: logging.Logger,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_in_flight: int = 4,
+        line_aligned: bool = True,
+        uploads: Optional[UploadManager] = None,
+    ):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.logger = logger
+        self.part_size = part_size
+        self.line_aligned = line_aligned
+        self.uploads = uploads
+        self.bytes_written = 0
+        self.failed_parts = []
+        self.dlq_paths = []
+        self._buffer = bytearray()
+        self._digest = hashlib.blake2b(digest_size=16)
+        self._upload_id = None
+        self._part_number = 0
+        self._futures = {}
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    @property
+    def content_hash(self) -> str:
+        return self._digest.hexdigest()
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._digest.update(data)
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._flush_part()
+        return len(data)
+
+    def _flush_part(self) -> None:
+        if not self._buffer:
+            return
+        if self._upload_id is None:
+            self._upload_id = create_multipart_upload_with_retry(self.s3_client, self.bucket, self.key)
+
+        payload = bytes(self._buffer)
+        self._buffer.clear()
+        self._part_number += 1
+
+        self._slots.acquire()
+        future = self._executor.submit(self._upload_part, self._part_number, payload)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures[self._part_number] = future
+
+    def _upload_part(self, part_number: int, payload: bytes):
+        try:
+            return upload_part_with_retry(
+                self.s3_client, self.bucket, self.key, self._upload_id, part_number, payload
+            )
+        except Exception as exc:
+            self.failed_parts.append(part_number)
+            self.dlq_paths.append(
+                write_bytes_to_dlq(
+                    payload,
+                    f"{os.path.basename(self.key)}.part{part_number:05d}",
+                    f"upload_part_failed:{exc}",
+                    self.logger,
+                    # Parte de JSONL alinhada a linhas e reenviavel; de Parquet nao (objeto abortado)
+                    key=dlq_part_key(self.key, part_number) if self.line_aligned else None,
+                    object_key=self.key,
+                )
+            )
+            return None
+
+    def _wait_parts(self) -> list:
+        parts = []
+        for part_number, future in sorted(self._futures.items()):
+            etag = future.result()
+            if etag is not None:
+                parts.append({"PartNumber": part_number, "ETag": etag})
+        return parts
+
+    def abort(self) -> None:
+        self._executor.shutdown(wait=True)
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            self.logger.warning("Multipart upload aborted: s3://%s/%s", self.bucket, self.key)
+        super().close()
+
+    def _put_small_object(self) -> None:
+        """Objeto menor que uma parte: um unico PUT em vez de create/upload_part/complete."""
+        payload = bytes(self._buffer)
+        self._buffer.clear()
+        if self.uploads is not None:
+            # Upload assincrono: retry/DLQ ficam a cargo do UploadManager
+            self.uploads.submit(payload, self.key)
+            super().close()
+            return
+        try:
+            put_object_with_retry(self.s3_client, self.bucket, self.key, payload)
+        except Exception as exc:
+            self.dlq_paths.append(
+                write_bytes_to_dlq(
+                    payload, os.path.basename(self.key), f"upload_failed:{exc}", self.logger, key=self.key
+                )
+            )
+            raise
+        finally:
+            super().close()
+        self.logger.debug("Upload completed: s3://%s/%s (%s bytes)", self.bucket, self.key, self.bytes_written)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._upload_id is None:
+            self._executor.shutdown(wait=True)
+            if self._buffer:
+                self._put_small_object()
+            else:
+                super().close()
+            return
+
+        self._flush_part()
+        parts = self._wait_parts()
+        self._executor.shutdown(wait=True)
+
+        if not parts or (self.failed_parts and not self.line_aligned):
+            self.abort()
+            raise RuntimeError(f"Multipart upload failed for s3://{self.bucket}/{self.key}")
+
+        complete_multipart_upload_with_retry(self.s3_client, self.bucket, self.key, self._upload_id, parts)
+        super().close()
+
+        if self.failed_parts:
+            raise RuntimeError(
+                f"{len(self.failed_parts)} part(s) of s3://{self.bucket}/{self.key} sent to DLQ: "
+                f"{self.dlq_paths}"
+            )
+        self.logger.info(
+            "Multipart upload completed: s3://%s/%s (%s parts, %s bytes)",
+            self.bucket,
+            self.key,
+            len(parts),
+            self.bytes_written,
+        )
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return False
+        self.close()
+        return False
@@ -0,0 +1,125 @@
+import zlib
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+SECONDS_PER_HOUR = 60 * 60
+MAX_BATCH_ROWS = 1_000_000
+
+# Curva intradiaria de PIX/TED: madrugada quase parada, picos no almoco e no fim do expediente
+RETAIL_HOURLY_WEIGHTS = (
+    0.4, 0.25, 0.15, 0.1, 0.1, 0.2, 0.6, 1.5, 3.0, 4.5, 5.5, 6.0,
+    7.0, 6.5, 5.5, 5.5, 6.0, 6.5, 7.5, 7.0, 5.5, 4.0, 2.5, 1.2,
+)
+# Segunda..domingo
+RETAIL_WEEKDAY_FACTORS = (1.05, 1.0, 1.0, 1.0, 1.2, 0.85, 0.6)
+
+
+@dataclass(frozen=True)
+class WorkloadProfile:
+    """Distribuicao de volume e atividade de um dia de transacoes.
+
+    `zipf_exponent` = 0 sorteia contas uniformemente; acima de 0 a conta de rank k
+    recebe peso 1 / k**s (poucas contas "quentes" concentram o volume).
+    """
+
+    name: str
+    min_daily: int
+    max_daily: int
+    zipf_exponent: float = 0.0
+    hourly_weights: Optional[tuple] = None
+    weekday_factors: tuple = (1.0,) * 7
+    month_start_days: int = 10
+    month_start_factor: float = 1.5
+    payday_days: tuple = ()
+    payday_factor: float = 1.0
+
+    def daily_volume(self, day: date, rng: np.random.Generator) -> int:
+        base = int(rng.integers(self.min_daily, self.max_daily + 1))
+        factor = self.weekday_factors[day.weekday()]
+        if day.day <= self.month_start_days:
+            factor *= self.month_start_factor
+        if day.day in self.payday_days:
+            factor *= self.payday_factor
+        return int(base * factor)
+
+    def with_daily_volume(self, daily_volume: int) -> "WorkloadProfile":
+        """Mesmo perfil com volume base de ~`daily_volume` linhas/dia (+-10%)."""
+        return replace(self, min_daily=int(daily_volume * 0.9), max_daily=int(daily_volume * 1.1))
+
+    def draw_offsets(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """Segundos desde a meia-noite, seguindo a curva intradiaria (uniforme se nao houver)."""
+        if self.hourly_weights is None:
+            return rng.integers(0, 24 * SECONDS_PER_HOUR, size=size)
+        cdf = np.cumsum(self.hourly_weights, dtype=float)
+        hours = np.searchsorted(cdf / cdf[-1], rng.random(size), side="right")
+        return hours * SECONDS_PER_HOUR + rng.integers(0, SECONDS_PER_HOUR, size=size)
+
+
+WORKLOAD_PROFILES = {
+    # Distribuicao original: 50-200 transacoes/dia, contas uniformes, +50% ate o dia 10
+    "toy": WorkloadProfile("toy", 50, 200),
+    "retail": WorkloadProfile(
+        "retail",
+        200_000,
+        300_000,
+        zipf_exponent=1.1,
+        hourly_weights=RETAIL_HOURLY_WEIGHTS,
+        weekday_factors=RETAIL_WEEKDAY_FACTORS,
+        month_start_factor=1.1,
+        payday_days=(5, 20),
+        payday_factor=2.5,
+    ),
+    "stress": WorkloadProfile(
+        "stress",
+        18_000_000,
+        22_000_000,
+        zipf_exponent=1.2,
+        hourly_weights=RETAIL_HOURLY_WEIGHTS,
+        weekday_factors=RETAIL_WEEKDAY_FACTORS,
+        month_start_factor=1.1,
+        payday_days=(5, 20),
+        payday_factor=2.5,
+    ),
+}
+DEFAULT_PROFILE = "toy"
+
+
+def get_profile(name: str, daily_volume: Optional[int] = None) -> WorkloadProfile:
+    try:
+        profile = WORKLOAD_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown workload profile: {name}") from None
+    return profile.with_daily_volume(daily_volume) if daily_volume else profile
+
+
+class AccountSampler:
+    """Sorteia indices de contas segundo o `zipf_exponent` do perfil.
+
+    O rank e sorteado pela inversa da CDF continua de x**-s (O(1) por linha, sem
+    busca binaria) e mapeado para a conta por uma permutacao que depende so de
+    (seed mestre, shard): as mesmas contas sao "quentes" em todos os dias.
+    """
+
+    def __init__(self, num_accounts: int, zipf_exponent: float, master_seed: int, shard: int = 0):
+        self.num_accounts = num_accounts
+        self.zipf_exponent = zipf_exponent
+        self._accounts_by_rank = None
+        if zipf_exponent > 0:
+            rank_seed = np.random.SeedSequence(master_seed, spawn_key=(zlib.crc32(b"account_activity"), shard))
+            self._accounts_by_rank = np.random.default_rng(rank_seed).permutation(num_accounts)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        if self._accounts_by_rank is None:
+            return rng.integers(0, self.num_accounts, size=size)
+        u = rng.random(size)
+        upper = self.num_accounts + 1.0
+        if self.zipf_exponent == 1.0:
+            ranks = upper ** u
+        else:
+            power = 1.0 - self.zipf_exponent
+            ranks = ((upper ** power - 1.0) * u + 1.0) ** (1.0 / power)
+        ranks = np.minimum(ranks.astype(np.int64) - 1, self.num_accounts - 1)
+        return self._accounts_by_rank[ranks]
@@ -0,0 +1,79 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from benchmarks.bench_dashboard_queries import BUILD_FACT, BUILD_ROLLUP
+from src.generators.master_data import generate_customer_data
+from src.generators.models import ARROW_SCHEMAS
+from src.generators.transaction_generator import columns_to_record_batch, generate_partition, partition_key
+from src.generators.utils import write_records_atomic
+from src.generators.workload import get_profile
+
+LANDING_AS_OF = date(2025, 3, 1)
+LANDING_DAYS = 30
+LANDING_CUSTOMERS = 2_000
+LANDING_DAILY_VOLUME = 10_000
+WAREHOUSE_ROWS = 2_000_000
+WAREHOUSE_DAYS = 365
+WAREHOUSE_FIRST_DAY = date(2025, 1, 1)
+
+
+@pytest.fixture(scope="session")
+def customer_data():
+    return generate_customer_data(LANDING_CUSTOMERS, seed=7)
+
+
+@pytest.fixture(scope="session")
+def account_ids(customer_data):
+    return [account["id"] for account in customer_data[1]]
+
+
+@pytest.fixture(scope="session")
+def landing_dir(tmp_path_factory, customer_data, account_ids):
+    """Landing zone local (Parquet, layout dt=) com o mesmo formato que os geradores sobem."""
+    root = tmp_path_factory.mktemp("landing")
+    customers, accounts = customer_data
+    for entity, records in (("customers", customers), ("accounts", accounts)):
+        write_records_atomic(records, str(root / entity / f"{entity}_perf.parquet"), "parquet", ARROW_SCHEMAS[entity])
+
+    profile = get_profile("retail", LANDING_DAILY_VOLUME)
+    for offset in range(LANDING_DAYS):
+        day = LANDING_AS_OF - timedelta(days=offset + 1)
+        columns = generate_partition(account_ids, day, master_seed=7, profile=profile)
+        path = root / partition_key(day, "perf", "parquet")
+        path.parent.mkdir(parents=True)
+        pq.write_table(pa.Table.from_batches([columns_to_record_batch(columns)]), str(path), compression="zstd")
+    return root
+
+
+@pytest.fixture(scope="session")
+def warehouse_path(tmp_path_factory):
+    """Warehouse DuckDB com fct_transactions sintetica e o rollup do dashboard."""
+    path = tmp_path_factory.mktemp("warehouse") / "luisbank.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute(BUILD_FACT.format(first_day=WAREHOUSE_FIRST_DAY, days=WAREHOUSE_DAYS, rows=WAREHOUSE_ROWS))
+    con.execute(BUILD_ROLLUP)
+    con.close()
+    return str(path)
+
+
+@pytest.fixture
+def throughput(benchmark):
+    """Registra linhas/s (pela media) no JSON do benchmark; chamar depois da medicao.
+
+    Com `--benchmark-disable` nao ha estatisticas e so o volume e registrado.
+    """
+
+    def record(rows: int, unit: str = "rows") -> None:
+        benchmark.extra_info[unit] = rows
+        if benchmark.stats is not None:
+            benchmark.extra_info[f"{unit}_per_s"] = rows / benchmark.stats.stats.mean
+
+    return record
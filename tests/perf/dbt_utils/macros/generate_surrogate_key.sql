@@ -0,0 +1,8 @@
+{% macro generate_surrogate_key(field_list) %}
+    {%- set fields = [] -%}
+    {%- for field in field_list -%}
+        {%- do fields.append("coalesce(cast(" ~ field ~ " as varchar), '_dbt_utils_surrogate_key_null_')") -%}
+        {%- if not loop.last %}{%- do fields.append("'-'") -%}{%- endif -%}
+    {%- endfor -%}
+    md5(cast(concat({{ fields | join(', ') }}) as varchar))
+{%- endmacro %}
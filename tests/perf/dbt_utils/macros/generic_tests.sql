@@ -0,0 +1,17 @@
+{% test expression_is_true(model, expression, column_name=None) %}
+
+select *
+from {{ model }}
+where not({{ column_name if column_name is not none else '' }} {{ expression }})
+
+{% endtest %}
+
+
+{% test unique_combination_of_columns(model, combination_of_columns, quote_columns=false) %}
+
+select {{ combination_of_columns | join(', ') }}
+from {{ model }}
+group by {{ combination_of_columns | join(', ') }}
+having count(*) > 1
+
+{% endtest %}
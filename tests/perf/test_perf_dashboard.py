@@ -0,0 +1,49 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.dashboard.db import DuckDBConnectionManager
+from src.dashboard.downsampling import density_bins, lttb_points, minmax_points, risk_outliers
+
+pytestmark = pytest.mark.perf
+
+TYPES = ["PIX_IN", "PIX_OUT", "TED_IN", "TED_OUT", "BOLETO_PAY"]
+LAST_DAY = date(2025, 12, 31)
+WIDTH = 1200
+
+KPI_QUERY = """
+    SELECT sum(total_amount), sum(txn_count), sum(over_5k_count), sum(over_1k_count)
+    FROM main.agg_daily_by_type
+    WHERE transaction_day >= ? AND transaction_day < ?
+    AND transaction_type IN (SELECT * FROM UNNEST(?))
+"""
+
+
+@pytest.fixture(scope="module")
+def query(warehouse_path):
+    manager = DuckDBConnectionManager(warehouse_path)
+    yield manager.query_arrow
+    manager.close()
+
+
+@pytest.mark.parametrize("days", [30, 365])
+def test_kpi_rollup(benchmark, query, days):
+    params = [LAST_DAY - timedelta(days=days - 1), LAST_DAY + timedelta(days=1), TYPES]
+    result = benchmark(query, KPI_QUERY, params)
+    assert result.num_rows == 1
+
+
+@pytest.mark.parametrize(
+    "function, size",
+    [(minmax_points, WIDTH // 2), (lttb_points, WIDTH), (risk_outliers, None), (density_bins, None)],
+    ids=["minmax", "lttb", "outliers", "density"],
+)
+@pytest.mark.parametrize("days", [30, 365])
+def test_scatter_downsampling(benchmark, throughput, query, function, size, days):
+    args = (query, LAST_DAY - timedelta(days=days - 1), LAST_DAY, TYPES) + ((size,) if size else ())
+    table = benchmark(function, *args)
+    throughput(table.num_rows, unit="points")
@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+pytestmark = pytest.mark.perf
+
+DBT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "dbt_project"))
+VENDORED_DBT_UTILS = os.path.join(os.path.dirname(__file__), "dbt_utils")
+
+PROFILE = """
+luisbank:
+  target: perf
+  outputs:
+    perf:
+      type: duckdb
+      path: '{path}'
+"""
+
+
+def project_dir(tmp_path) -> str:
+    """O projeto dbt com `dbt deps` feito; sem ele, uma copia com os macros do dbt_utils vendorizados.
+
+    Assim os casos do dbt rodam numa maquina offline.
+    """
+    if os.path.isdir(os.path.join(DBT_DIR, "dbt_packages", "dbt_utils")):
+        return DBT_DIR
+    project = tmp_path / "dbt_project"
+    shutil.copytree(DBT_DIR, project, ignore=shutil.ignore_patterns("target", "logs", "dbt_packages"))
+    shutil.copytree(VENDORED_DBT_UTILS, project / "dbt_packages" / "dbt_utils")
+    return str(project)
+
+
+@pytest.fixture
+def dbt(landing_dir, tmp_path, monkeypatch):
+    """Roda comandos dbt no projeto real contra a landing local, sem rede nem MinIO."""
+    runner = pytest.importorskip("dbt.cli.main").dbtRunner()
+
+    # Perfil sem httpfs: o INSTALL da extensao precisaria de rede
+    (tmp_path / "profiles.yml").write_text(PROFILE.format(path=tmp_path / "warehouse.duckdb"))
+    monkeypatch.setenv("LANDING_ROOT", str(landing_dir))
+    monkeypatch.setenv("LANDING_FORMAT", "parquet")
+    flags = [
+        "--project-dir", project_dir(tmp_path), "--profiles-dir", str(tmp_path),
+        "--target-path", str(tmp_path / "target"), "--log-path", str(tmp_path / "logs"),
+    ]
+
+    def invoke(*args):
+        result = runner.invoke(list(args) + flags)
+        assert result.success, result.exception
+        return result
+
+    invoke.warehouse = tmp_path / "warehouse.duckdb"
+    return invoke
+
+
+def test_dbt_build_full(benchmark, dbt):
+    def reset():
+        dbt.warehouse.unlink(missing_ok=True)
+
+    benchmark.pedantic(dbt, args=("build",), setup=reset, rounds=2, warmup_rounds=1)
+
+
+def test_dbt_run_incremental(benchmark, dbt):
+    dbt("build")
+    benchmark.pedantic(dbt, args=("run", "--select", "fct_transactions+"), rounds=3)
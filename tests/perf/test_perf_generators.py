@@ -0,0 +1,44 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.generators.master_data import generate_customer_columns, generate_customer_data
+from src.generators.transaction_generator import generate_partition, generate_transactions
+from src.generators.workload import get_profile
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.mark.parametrize("num_customers", [100, 1_000, 5_000])
+def test_generate_customer_data(benchmark, throughput, num_customers):
+    customers, accounts = benchmark.pedantic(
+        generate_customer_data, args=(num_customers,), kwargs={"seed": 1}, rounds=3
+    )
+    throughput(len(customers) + len(accounts))
+
+
+@pytest.mark.parametrize("num_customers", [100_000, 1_000_000])
+def test_generate_customer_columns(benchmark, throughput, num_customers):
+    customers, accounts = benchmark.pedantic(
+        generate_customer_columns, args=(num_customers,), kwargs={"seed": 1}, rounds=3
+    )
+    throughput(customers.num_rows + accounts.num_rows)
+
+
+@pytest.mark.parametrize("days", [7, 30, 90])
+def test_generate_transactions_row_engine(benchmark, throughput, account_ids, days):
+    transactions = benchmark.pedantic(generate_transactions, args=(account_ids, days), kwargs={"seed": 1}, rounds=3)
+    throughput(len(transactions))
+
+
+@pytest.mark.parametrize("daily_volume", [100_000, 1_000_000])
+def test_generate_partition_batch_engine(benchmark, throughput, account_ids, daily_volume):
+    profile = get_profile("retail", daily_volume)
+    columns = benchmark.pedantic(
+        generate_partition, args=(account_ids, date(2025, 3, 3), 1), kwargs={"profile": profile}, rounds=3
+    )
+    throughput(len(columns["id"]))
@@ -0,0 +1,101 @@
+import io
+import os
+import sys
+from datetime import date
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.generators.jsonl_reader import available_backends
+from src.generators.transaction_generator import columns_to_records, generate_partition
+from src.generators.utils import (
+    UploadManager,
+    encode_jsonl,
+    get_logger,
+    iter_jsonl_streaming,
+    list_all_objects,
+    list_objects_with_retry,
+    list_partitioned_objects,
+    write_jsonl_atomic,
+)
+from src.generators.workload import get_profile
+
+pytestmark = pytest.mark.perf
+
+logger = get_logger(__name__)
+BUCKET = "landing-zone"
+
+
+@pytest.fixture(scope="module")
+def records(account_ids):
+    columns = generate_partition(account_ids, date(2025, 3, 3), 1, profile=get_profile("retail", 50_000))
+    return columns_to_records(columns)
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_write_jsonl_atomic(benchmark, throughput, records, tmp_path):
+    path = str(tmp_path / "transactions.jsonl")
+    benchmark.pedantic(write_jsonl_atomic, args=(records, path), rounds=3)
+    throughput(len(records))
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_iter_jsonl_streaming(benchmark, throughput, records, backend):
+    payload = encode_jsonl(records)
+
+    def decode():
+        return sum(1 for _ in iter_jsonl_streaming(io.BytesIO(payload), backend=backend))
+
+    assert benchmark.pedantic(decode, rounds=3) == len(records)
+    throughput(len(payload), unit="bytes")
+
+
+def test_upload_manager_moto(benchmark, throughput, s3):
+    payloads = [(os.urandom(64 * 1024), f"bench/part-{i:05d}.bin") for i in range(200)]
+
+    def upload():
+        with UploadManager(s3, BUCKET, logger, max_workers=8) as uploads:
+            for payload, key in payloads:
+                uploads.submit(payload, key)
+        return uploads.report
+
+    report = benchmark.pedantic(upload, rounds=3)
+    assert report.files == len(payloads) and not report.failed
+    throughput(sum(len(payload) for payload, _ in payloads), unit="bytes")
+
+
+def _put_keys(s3, count, partitions=1):
+    for i in range(count):
+        day = date(2025, 1, 1 + i % partitions).isoformat()
+        s3.put_object(Bucket=BUCKET, Key=f"transactions/dt={day}/part-{i:05d}.parquet", Body=b"")
+
+
+def test_list_objects_moto(benchmark, throughput, s3):
+    _put_keys(s3, 1_000)
+    response = benchmark.pedantic(list_objects_with_retry, args=(s3, BUCKET, "transactions/"), rounds=5)
+    assert response["KeyCount"] == 1_000
+    throughput(1_000, unit="keys")
+
+
+def test_list_objects_paginated_moto(benchmark, throughput, s3):
+    _put_keys(s3, 5_000)
+    objects = benchmark.pedantic(list_all_objects, args=(s3, BUCKET, "transactions/"), rounds=5)
+    assert len(objects) == 5_000
+    throughput(5_000, unit="keys")
+
+
+def test_list_partitioned_objects_moto(benchmark, throughput, s3):
+    _put_keys(s3, 5_000, partitions=20)
+    objects = benchmark.pedantic(list_partitioned_objects, args=(s3, BUCKET, "transactions/"), rounds=5)
+    assert len(objects) == 5_000
+    throughput(5_000, unit="keys")
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import boto3
+import pyarrow as pa
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.account_index import build_account_index, load_account_index, write_account_index
+from src.generators.master_data import generate_sharded
+from src.generators.transaction_generator import load_existing_account_ids
+from src.generators.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def test_index_accumulates_accounts_across_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = generate_sharded(20, workers=2, master_seed=1)
+    second = generate_sharded(10, workers=1, master_seed=2)
+
+    index = load_account_index(None, None, logger)
+    ids = index.column("id").to_pylist()
+    total = sum(f["rows"] for m in (first, second) for f in m["files"] if f["entity"] == "accounts")
+    assert len(ids) == total == len(set(ids))
+    assert ids == sorted(ids)
+    assert second["account_index"].startswith("_index/accounts/")
+
+
+def test_build_index_keeps_newest_customer_for_duplicate_ids():
+    previous = pa.table({"id": ["a", "b"], "customer_id": ["c1", "c2"]})
+    new = pa.table({"id": ["b", "c"], "customer_id": ["c9", "c3"]})
+    index = build_account_index([new], previous)
+    assert index.to_pydict() == {"id": ["a", "b", "c"], "customer_id": ["c1", "c9", "c3"]}
+
+
+@mock_aws
+def test_transaction_loader_uses_index_with_etag_cache(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    index = build_account_index([pa.table({"id": ["a2", "a1"], "customer_id": ["c2", "c1"]})])
+    write_account_index(s3, "landing-zone", index, "20250101000000", logger)
+
+    assert list(load_existing_account_ids(s3, "landing-zone")) == ["a1", "a2"]
+    with caplog.at_level("INFO"):
+        assert list(load_existing_account_ids(s3, "landing-zone")) == ["a1", "a2"]
+    assert "Account index cache hit" in caplog.text
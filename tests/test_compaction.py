@@ -0,0 +1,112 @@
+import io
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import pyarrow as pa
+import pyarrow.parquet as pq
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.compaction import (
+    compact_bin,
+    compacted_key,
+    plan_compaction,
+    resume_pending_compactions,
+    run_compaction,
+)
+from src.generators.utils import read_catalog, read_run_manifest, write_run_manifest
+
+NOW = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+
+
+def _obj(key, size, minutes_ago=120):
+    return {"Key": key, "Size": size, "LastModified": NOW - timedelta(minutes=minutes_ago)}
+
+
+def _put_parts(s3, directory, parts, rows=50):
+    for part in range(parts):
+        columns = {"id": [f"{directory}-{part}-{i}" for i in range(rows)]}
+        if part:
+            # Arquivos antigos sem a coluna nova: a compactacao unifica os schemas
+            columns["amount"] = [float(i) for i in range(rows)]
+        buffer = io.BytesIO()
+        pq.write_table(pa.table(columns), buffer)
+        s3.put_object(Bucket="landing-zone", Key=f"{directory}/part-{part:05d}.parquet", Body=buffer.getvalue())
+
+
+def _partition_rows(s3, prefix):
+    keys = [item["Key"] for item in s3.list_objects_v2(Bucket="landing-zone", Prefix=prefix).get("Contents", [])]
+    tables = [pq.read_table(io.BytesIO(s3.get_object(Bucket="landing-zone", Key=key)["Body"].read())) for key in keys]
+    return keys, sorted(row["id"] for table in tables for row in table.to_pylist())
+
+
+def test_plan_groups_small_objects_per_directory():
+    objects = [
+        _obj("transactions/dt=2025-01-01/part-00000.parquet", 40),
+        _obj("transactions/dt=2025-01-01/part-00001.parquet", 40),
+        _obj("transactions/dt=2025-01-01/part-00002.parquet", 40),
+        _obj("transactions/dt=2025-01-02/part-00000.parquet", 40),
+        _obj("transactions/dt=2025-01-02/part-00001.parquet", 40, minutes_ago=5),
+        _obj("customers/customers_1.parquet", 60),
+        _obj("customers/customers_2.parquet", 10),
+        _obj("customers/customers_2.jsonl", 10),
+    ]
+    bins = plan_compaction(objects, "parquet", target_bytes=100, min_age=timedelta(minutes=60), now=NOW)
+
+    assert [(b.directory, len(b.sources)) for b in bins] == [("transactions/dt=2025-01-01", 2)]
+    assert compacted_key(bins[0].directory, "20250301", 0, "parquet") == (
+        "transactions/dt=2025-01-01/compacted-00000-20250301.parquet"
+    )
+    assert compacted_key("accounts", "20250301", 1, "parquet") == "accounts/accounts_20250301_compacted_part-00001.parquet"
+
+
+@mock_aws
+def test_run_compaction_swaps_partitions_without_losing_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    for day in ("2025-02-27", "2025-02-28"):
+        _put_parts(s3, f"transactions/dt={day}", 3)
+    prefix = "transactions/dt=2025-02-28/"
+    before_keys, before_rows = _partition_rows(s3, prefix)
+
+    manifest = run_compaction(s3, "landing-zone", "parquet", entities=("transactions",), min_age=timedelta(0), archive=True)
+
+    after_keys, after_rows = _partition_rows(s3, prefix)
+    assert len(before_keys) == 3 and after_keys == [f"{prefix}compacted-00000-{manifest['run_id']}.parquet"]
+    assert after_rows == before_rows
+    assert read_run_manifest(s3, "landing-zone", "compaction", manifest["run_id"])["status"] == "committed"
+    assert not s3.list_objects_v2(Bucket="landing-zone", Prefix="_compaction/").get("Contents")
+    archived = s3.list_objects_v2(Bucket="landing-zone", Prefix=f"_archive/{manifest['run_id']}/{prefix}")["Contents"]
+    assert len(archived) == 3
+    catalog = read_catalog(s3, "landing-zone", "transactions")
+    assert sorted(catalog.column("key").to_pylist()) == sorted(entry["key"] for entry in manifest["outputs"])
+    assert len(s3.list_objects_v2(Bucket="landing-zone", Prefix="_catalog/transactions/")["Contents"]) == 1
+
+
+@mock_aws
+def test_pending_manifest_is_rolled_forward(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    _put_parts(s3, "transactions/dt=2025-02-28", 2)
+    objects = s3.list_objects_v2(Bucket="landing-zone", Prefix="transactions/")["Contents"]
+    (compaction_bin,) = plan_compaction(objects, "parquet", min_age=timedelta(0))
+    key = compacted_key(compaction_bin.directory, "r1", 0, "parquet")
+    entry = compact_bin(s3, "landing-zone", compaction_bin, key, "r1", "parquet")
+    # Simula uma queda depois de publicar o arquivo e apagar so um dos originais
+    write_run_manifest(s3, "landing-zone", "compaction", "r1", {
+        "run_id": "r1", "status": "pending", "archive": False, "outputs": [entry],
+    }, logging.getLogger(__name__))
+    s3.copy_object(Bucket="landing-zone", Key=key, CopySource={"Bucket": "landing-zone", "Key": entry["staging_key"]})
+    s3.delete_object(Bucket="landing-zone", Key=entry["sources"][0])
+
+    (resumed,) = resume_pending_compactions(s3, "landing-zone")
+
+    keys, rows = _partition_rows(s3, f"{compaction_bin.directory}/")
+    assert resumed["status"] == "committed" and keys == [key]
+    assert len(rows) == entry["rows"]
@@ -0,0 +1,98 @@
+﻿import os
+import sys
+import threading
+import time
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dashboard.db import DuckDBConnectionManager
+
+
+def _make_db(path):
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE t AS SELECT range AS n FROM range(1000)")
+    con.close()
+
+
+def test_threads_share_connection_with_own_cursors(tmp_path):
+    db_path = tmp_path / "wh.duckdb"
+    _make_db(db_path)
+    manager = DuckDBConnectionManager(str(db_path))
+    results, cursors = [], set()
+
+    def worker():
+        results.append(manager.query_arrow("SELECT sum(n) AS total FROM t WHERE n < ?", [500]))
+        cursors.add(id(manager._local.cursor))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(r, pa.Table) and r["total"][0].as_py() == 124750 for r in results)
+    assert len(cursors) == 4
+    manager.close()
+
+
+def test_idle_connection_is_released_for_writers(tmp_path):
+    db_path = tmp_path / "wh.duckdb"
+    _make_db(db_path)
+    manager = DuckDBConnectionManager(str(db_path), idle_timeout=0.05)
+    version = manager.version()
+    assert manager.query_arrow("SELECT count(*) AS c FROM t")["c"][0].as_py() == 1000
+
+    time.sleep(0.3)
+    assert not manager.is_open
+
+    writer = duckdb.connect(str(db_path))
+    writer.execute("INSERT INTO t VALUES (1000)")
+    writer.close()
+    assert manager.version() != version
+    assert manager.query_arrow("SELECT count(*) AS c FROM t")["c"][0].as_py() == 1001
+    manager.close()
+
+
+def test_copy_to_writes_files_without_temp_leftovers(tmp_path):
+    db_path = tmp_path / "wh.duckdb"
+    _make_db(db_path)
+    manager = DuckDBConnectionManager(str(db_path))
+
+    csv_path = manager.copy_to("SELECT n FROM t WHERE n % 2 = 0", str(tmp_path / "even.csv"))
+    parquet_path = manager.copy_to("SELECT n FROM t", str(tmp_path / "all.parquet"), "parquet")
+
+    with open(csv_path, encoding="utf-8") as handle:
+        assert handle.readline().strip() == "n" and sum(1 for _ in handle) == 500
+    assert pq.read_table(parquet_path).num_rows == 1000
+    assert sorted(os.listdir(tmp_path)) == ["all.parquet", "even.csv", "wh.duckdb"]
+    manager.close()
+
+
+def test_concurrent_copies_to_the_same_path_do_not_collide(tmp_path):
+    db_path = tmp_path / "wh.duckdb"
+    _make_db(db_path)
+    manager = DuckDBConnectionManager(str(db_path))
+    target = str(tmp_path / "export.parquet")
+    errors = []
+
+    def export():
+        try:
+            for _ in range(10):
+                manager.copy_to("SELECT n FROM t", target, "parquet")
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=export) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert pq.read_table(target).num_rows == 1000
+    assert sorted(os.listdir(tmp_path)) == ["export.parquet", "wh.duckdb"]
+    manager.close()
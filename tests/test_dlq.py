@@ -0,0 +1,66 @@
+import os
+import sys
+
+import boto3
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.dlq import replay_dlq
+from src.generators.utils import (
+    UploadManager,
+    append_catalog,
+    content_hash,
+    get_logger,
+    read_catalog,
+    upload_bytes_with_retry,
+    write_bytes_to_dlq,
+)
+
+logger = get_logger(__name__)
+
+PARTITION = "transactions/dt=2025-03-01"
+
+
+class FailingS3:
+    def put_object(self, Bucket, Key, Body):
+        raise ConnectionError("network down")
+
+
+def _dlq_names(tmp_path):
+    return sorted(os.listdir(tmp_path / "data" / "dlq"))
+
+
+@mock_aws
+def test_replay_uploads_only_missing_batches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(upload_bytes_with_retry.retry, "sleep", lambda _: None)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    delivered, missing = b'{"id": "a"}\n', b'{"id": "b"}\n{"id": "c"}\n'
+
+    # Lotes que esgotaram as tentativas
+    with UploadManager(FailingS3(), "landing-zone", logger) as uploads:
+        uploads.submit(delivered, f"{PARTITION}/part-00000-00000-aaaa.jsonl")
+        uploads.submit(missing, f"{PARTITION}/part-00000-00001-bbbb.jsonl")
+    assert len(uploads.report.failed) == 2
+    write_bytes_to_dlq(b"PAR1", "aborted.parquet", "upload_part_failed", logger)
+    # Uma reexecucao ja entregou `delivered` com outra chave
+    s3.put_object(Bucket="landing-zone", Key=f"{PARTITION}/part-00000-00000-rerun.jsonl", Body=delivered)
+    append_catalog(s3, "landing-zone", "transactions", "rerun", [
+        {"key": f"{PARTITION}/part-00000-00000-rerun.jsonl", "bytes": len(delivered), "content_hash": content_hash(delivered)},
+    ], logger)
+
+    report = replay_dlq(s3, "landing-zone")
+
+    assert report["replayed"] == [f"{PARTITION}/part-00000-00001-bbbb.jsonl"]
+    assert len(report["already_ingested"]) == 1 and len(report["unreplayable"]) == 1
+    body = s3.get_object(Bucket="landing-zone", Key=f"{PARTITION}/part-00000-00001-bbbb.jsonl")["Body"].read()
+    assert body == missing
+    assert not s3.list_objects_v2(Bucket="landing-zone", Prefix=f"{PARTITION}/part-00000-00000-aaaa").get("KeyCount")
+    catalog = {row["key"]: row for row in read_catalog(s3, "landing-zone", "transactions").to_pylist()}
+    assert catalog[f"{PARTITION}/part-00000-00001-bbbb.jsonl"]["content_hash"] == content_hash(missing)
+    assert catalog[f"{PARTITION}/part-00000-00001-bbbb.jsonl"]["rows"] == 2
+    # So o arquivo sem destino continua na DLQ; um novo replay nao reenvia nada
+    assert len(_dlq_names(tmp_path)) == 1 and _dlq_names(tmp_path)[0].startswith("aborted.parquet")
+    assert replay_dlq(s3, "landing-zone")["replayed"] == []
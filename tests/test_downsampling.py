@@ -0,0 +1,57 @@
+import os
+import sys
+from datetime import date
+
+import duckdb
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dashboard.downsampling import density_bins, lttb_indices, lttb_points, minmax_points, risk_outliers
+
+TYPES = ["PIX_IN", "PIX_OUT"]
+
+
+@pytest.fixture(scope="module")
+def query():
+    con = duckdb.connect()
+    con.execute(
+        """
+        CREATE TABLE fct_transactions AS
+        SELECT
+            (['PIX_IN', 'PIX_OUT'])[1 + (range % 2)] AS transaction_type,
+            timestamp '2025-01-01' + to_seconds(range * 7) AS transaction_at,
+            (range * 7919 % 4000)::double AS amount
+        FROM range(200000)
+        """
+    )
+    con.execute("UPDATE fct_transactions SET amount = 9000 WHERE transaction_at = timestamp '2025-01-01' + to_seconds(700000)")
+    yield lambda sql, params: con.execute(sql, params).arrow()
+    con.close()
+
+
+def test_lttb_indices_keep_endpoints_and_size():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    idx = lttb_indices(x, y, 100)
+    assert len(idx) == 100 and idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_reductions_are_bounded_and_keep_extremes(query):
+    start, end = date(2025, 1, 1), date(2025, 1, 17)
+    minmax = minmax_points(query, start, end, TYPES, 100)
+    lttb = lttb_points(query, start, end, TYPES, 100)
+    density = density_bins(query, start, end, TYPES, x_bins=50, y_bins=20)
+
+    assert minmax.num_rows <= 2 * 100 * len(TYPES)
+    assert lttb.num_rows <= 100 * len(TYPES)
+    assert density.num_rows <= 50 * 20
+    assert sum(density.column("transactions").to_pylist()) == 200000
+    assert max(minmax.column("amount").to_pylist()) == 9000
+
+
+def test_risk_outliers_always_returned(query):
+    outliers = risk_outliers(query, date(2025, 1, 1), date(2025, 1, 17), TYPES)
+    assert outliers.column("amount").to_pylist() == [9000]
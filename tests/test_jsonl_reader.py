@@ -0,0 +1,48 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.jsonl_reader import JsonlDecodeError, JsonlReader, available_backends
+from src.generators.models import TRANSACTION_ARROW_SCHEMA
+
+RECORDS = [
+    {
+        "id": f"t{i}", "account_id": f"a{i % 3}", "amount": i * 1.5, "transaction_type": "PIX_IN",
+        "transaction_date": f"2025-01-0{i % 9 + 1}T10:00:00.123456", "status": "COMPLETED",
+        "counterparty_bank": "Nubank",
+    }
+    for i in range(50)
+]
+PAYLOAD = b"".join(json.dumps(r).encode() + b"\n" for r in RECORDS)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backends_decode_across_chunk_boundaries(backend):
+    reader = JsonlReader(io.BytesIO(PAYLOAD), backend=backend, chunk_size=97)
+    records = list(reader.iter_records())
+    assert records == RECORDS
+    assert type(records[1]["amount"]) is float
+    assert reader.backend == backend
+    assert reader.bytes_read == len(PAYLOAD) and reader.records_read == len(RECORDS)
+
+
+def test_tables_use_explicit_schema():
+    reader = JsonlReader(io.BytesIO(PAYLOAD), chunk_size=1024)
+    tables = list(reader.iter_tables(schema=TRANSACTION_ARROW_SCHEMA))
+    assert len(tables) > 1
+    assert all(t.schema.equals(TRANSACTION_ARROW_SCHEMA) for t in tables)
+    assert sum(t.num_rows for t in tables) == len(RECORDS)
+    assert tables[0].column("transaction_date")[0].as_py().microsecond == 123456
+
+
+def test_decode_error_reports_line_without_switching_backend():
+    broken = PAYLOAD + b'{"id": "bad",\n' + PAYLOAD
+    reader = JsonlReader(io.BytesIO(broken), chunk_size=256)
+    with pytest.raises(JsonlDecodeError) as excinfo:
+        list(reader.iter_records())
+    assert excinfo.value.line_number == len(RECORDS) + 1
@@ -1,9 +1,24 @@
 ﻿import os
 import sys
+from datetime import datetime
+
+import pyarrow.parquet as pq
+import pytest
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.generators.master_data import generate_customer_data, NUM_CUSTOMERS
+from src.generators.models import ACCOUNT_ARROW_SCHEMA, CUSTOMER_ARROW_SCHEMA
+from src.generators.utils import read_catalog
+from src.generators.master_data import (
+    NUM_CUSTOMERS,
+    generate_customer_columns,
+    generate_customer_data,
+    generate_delta,
+    generate_sharded,
+    latest_customer_versions,
+    read_landing_customers,
+    regenerate_shards,
+)
 
 
 def test_customer_generation_counts():
@@ -18,3 +33,89 @@ def test_customer_fields_present():
     assert "email" in sample
     assert "cpf" in sample
     assert "risk_profile" in sample
+
+
+def _cpf_is_valid(cpf):
+    digits = [int(ch) for ch in cpf if ch.isdigit()]
+    for size in (9, 10):
+        total = sum(d * w for d, w in zip(digits[:size], range(size + 1, 1, -1)))
+        if digits[size] != (0 if total % 11 < 2 else 11 - total % 11):
+            return False
+    return len(digits) == 11
+
+
+def test_batch_engine_generates_valid_columns():
+    as_of = datetime(2025, 6, 1)
+    customers, accounts = generate_customer_columns(2000, seed=3, as_of=as_of, validation_sample=50)
+
+    assert customers.schema == CUSTOMER_ARROW_SCHEMA and accounts.schema == ACCOUNT_ARROW_SCHEMA
+    assert customers.num_rows == 2000 and 2200 < accounts.num_rows < 2600
+    assert all(_cpf_is_valid(cpf) for cpf in customers.column("cpf").to_pylist())
+    assert set(accounts.column("customer_id").to_pylist()) <= set(customers.column("id").to_pylist())
+    assert max(customers.column("created_at").to_pylist()) <= as_of
+    assert generate_customer_columns(2000, seed=3, as_of=as_of)[1].equals(accounts)
+
+
+def test_sharded_generation_is_reproducible(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    as_of = datetime(2025, 6, 1)
+
+    def run():
+        manifest = generate_sharded(50, workers=2, master_seed=123, as_of=as_of)
+        tables = [pq.read_table(os.path.join("data", os.path.basename(f["key"]))) for f in manifest["files"]]
+        return manifest, tables
+
+    first, first_tables = run()
+    second, second_tables = run()
+
+    assert [f["rows"] for f in first["files"] if f["entity"] == "customers"] == [25, 25]
+    assert [f["seed"] for f in first["files"]] == [f["seed"] for f in second["files"]]
+    assert all(a.equals(b) for a, b in zip(first_tables, second_tables))
+    customer_keys = [f["key"] for f in second["files"] if f["entity"] == "customers"]
+    # Mesmo conteudo: a segunda execucao aponta para os arquivos da primeira em vez de grava-los de novo
+    assert all(f["skipped"] for f in second["files"])
+    assert customer_keys == [f["key"] for f in first["files"] if f["entity"] == "customers"]
+    assert set(customer_keys) == set(read_catalog(None, None, "customers").column("key").to_pylist())
+
+
+def test_single_shard_regenerates_identically(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = generate_sharded(30, workers=3, master_seed=5, as_of=datetime(2025, 6, 1))
+    shard_files = [os.path.join("data", os.path.basename(f["key"])) for f in manifest["files"] if f["shard"] == 1]
+    original = [pq.read_table(path) for path in shard_files]
+    for path in shard_files:
+        os.remove(path)
+
+    entries = regenerate_shards(manifest, [1])
+
+    assert sorted(e["key"] for e in entries) == sorted(f["key"] for f in manifest["files"] if f["shard"] == 1)
+    assert all(pq.read_table(path).equals(table) for path, table in zip(shard_files, original))
+
+
+def test_batch_engine_shard_regenerates_identically(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = generate_sharded(40, workers=2, master_seed=9, as_of=datetime(2025, 6, 1), engine="batch")
+    assert manifest["engine"] == "batch"
+    shard_files = [os.path.join("data", os.path.basename(f["key"])) for f in manifest["files"] if f["shard"] == 0]
+    original = [pq.read_table(path) for path in shard_files]
+
+    regenerate_shards(manifest, [0])
+
+    assert all(pq.read_table(path).equals(table) for path, table in zip(shard_files, original))
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "jsonl"])
+def test_delta_emits_only_changed_customers(tmp_path, monkeypatch, output_format):
+    monkeypatch.chdir(tmp_path)
+    generate_sharded(40, workers=1, master_seed=7, output_format=output_format, as_of=datetime(2025, 6, 1))
+    before = latest_customer_versions(read_landing_customers()).to_pylist()
+
+    as_of = datetime(2025, 6, 2, 12, 0)
+    manifest = generate_delta(0.1, master_seed=7, output_format=output_format, as_of=as_of)
+    assert manifest["files"][0]["key"].endswith(f"_delta.{output_format}")
+
+    after = {row["id"]: row for row in latest_customer_versions(read_landing_customers()).to_pylist()}
+    changed = [row for row in before if after[row["id"]] != row]
+    assert len(after) == 40 and len(changed) == manifest["files"][0]["rows"] == 4
+    assert all(after[row["id"]]["updated_at"] == as_of for row in changed)
+    assert all(after[row["id"]]["risk_profile"] != row["risk_profile"] for row in changed)
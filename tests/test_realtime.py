@@ -0,0 +1,77 @@
+import asyncio
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.realtime import WATERMARK_KEY, RateController, RealtimeGenerator, WatermarkTracker
+
+ACCOUNT_IDS = [f"acc-{i}" for i in range(50)]
+
+
+class RecordingS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None, Delimiter=None):
+        contents = [{"Key": key, "Size": len(body)} for key, body in sorted(self.objects.items()) if key.startswith(Prefix)]
+        return {"KeyCount": len(contents), "Contents": contents, "IsTruncated": False}
+
+
+def test_rate_controller_catches_up_with_burst_limit():
+    now = [0.0]
+    controller = RateController(1000, max_burst=300, clock=lambda: now[0])
+    now[0] = 0.1
+    assert controller.due() == 100
+    controller.record(100)
+    now[0] = 1.0
+    assert controller.due() == 300
+
+
+def test_watermark_only_advances_over_completed_prefix():
+    tracker = WatermarkTracker()
+    for seq, minute in enumerate([1, 2, 3]):
+        tracker.register(seq, datetime(2025, 1, 1, 0, minute))
+    tracker.complete(1)
+    assert tracker.watermark is None
+    tracker.complete(0)
+    assert tracker.watermark == datetime(2025, 1, 1, 0, 2)
+
+
+def test_realtime_generator_emits_at_target_rate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = RecordingS3()
+    now = [0.0]
+
+    async def fake_sleep(seconds):
+        now[0] += seconds
+        await asyncio.sleep(0)
+
+    generator = RealtimeGenerator(
+        ACCOUNT_IDS, s3, "landing-zone", target_rate=2000, max_batch_seconds=0.25, output_format="jsonl",
+        seed=1, tick=0.125, report_interval=60, clock=lambda: now[0], sleep=fake_sleep,
+    )
+    report = asyncio.run(generator.run(duration=1.0))
+
+    data_keys = [key for key in s3.objects if key.startswith("transactions/")]
+    rows = sum(len(s3.objects[key].splitlines()) for key in data_keys)
+    assert rows == report.emitted == report.uploaded_rows == 2000
+    assert report.seconds == 1.0 and report.as_dict()["achieved_rate"] == 2000
+    # 8 ticks de 0.125s, lote fechado a cada 0.25s (+1 objeto se a execucao cruzar a meia-noite)
+    assert report.objects == len(data_keys) in (4, 5)
+    assert all(re.fullmatch(r"transactions/dt=\d{4}-\d{2}-\d{2}/part-00000-\d{5}-\d{14}\.jsonl", key) for key in data_keys)
+
+    watermark = json.loads(s3.objects[WATERMARK_KEY])
+    last_event = max(json.loads(line)["transaction_date"] for key in data_keys for line in s3.objects[key].splitlines())
+    assert watermark["watermark"] == last_event
+    catalog = [pq.read_table(io.BytesIO(body)) for key, body in s3.objects.items() if key.startswith("_catalog/transactions/")]
+    assert sorted(key for table in catalog for key in table.column("key").to_pylist()) == sorted(data_keys)
@@ -0,0 +1,202 @@
+import os
+import re
+import sys
+from datetime import date
+
+import boto3
+import numpy as np
+import pytest
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.transaction_generator import (
+    EXTERNAL_BANKS,
+    INTERNAL_BANK,
+    IS_INFLOW_TYPE,
+    TRANSACTION_TYPES,
+    columns_to_record_batch,
+    columns_to_records,
+    generate_partition,
+    generate_sharded,
+    generate_transaction_batches,
+    regenerate_partitions,
+    stream_and_upload,
+)
+
+ACCOUNT_IDS = [f"acc-{i}" for i in range(20)]
+
+
+def test_batch_engine_distributions():
+    batches = list(generate_transaction_batches(ACCOUNT_IDS, days_history=30, seed=7))
+    assert len(batches) == 30
+
+    amount = np.concatenate([b["amount"] for b in batches])
+    t_type = np.concatenate([b["transaction_type"] for b in batches])
+    bank = np.concatenate([b["counterparty_bank"] for b in batches])
+
+    pix_in = t_type == "PIX_IN"
+    assert amount[pix_in].min() >= 10 and amount[pix_in].max() <= 5000
+    assert amount[~pix_in].min() >= 5 and amount[~pix_in].max() <= 2000
+    assert set(bank) <= set(EXTERNAL_BANKS) | {INTERNAL_BANK}
+    assert 0.25 < np.mean(bank == INTERNAL_BANK) < 0.35
+    for b in batches:
+        assert 50 <= len(b["id"]) <= 300
+        assert set(b["account_id"]) <= set(ACCOUNT_IDS)
+
+
+def test_batch_engine_is_seeded_and_serializable():
+    first = next(generate_transaction_batches(ACCOUNT_IDS, days_history=1, seed=11))
+    again = next(generate_transaction_batches(ACCOUNT_IDS, days_history=1, seed=11))
+    assert list(first["id"]) == list(again["id"])
+
+    records = columns_to_records(first)
+    assert set(records[0]) == {
+        "id", "account_id", "amount", "transaction_type",
+        "transaction_date", "status", "counterparty_bank",
+    }
+    assert columns_to_record_batch(first).num_rows == len(records)
+
+
+class RecordingS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+
+def test_stream_and_upload_writes_one_hive_partition_per_day():
+    s3 = RecordingS3()
+    batches = list(generate_transaction_batches(ACCOUNT_IDS, days_history=5, seed=3))
+    entries = stream_and_upload(iter(batches), s3, "landing-zone", output_format="jsonl")
+
+    assert sum(e["rows"] for e in entries) == sum(len(b["id"]) for b in batches)
+    assert sorted(e["key"] for e in entries) == sorted(s3.objects)
+    for key, body in s3.objects.items():
+        assert re.fullmatch(r"transactions/dt=\d{4}-\d{2}-\d{2}/part-00000-00000-\d{14}\.jsonl", key)
+        partition_day = key.split("dt=")[1][:10]
+        assert all(line.startswith(b"{") for line in body.splitlines())
+        assert body.count(f'"transaction_date": "{partition_day}T'.encode()) == len(body.splitlines())
+
+
+def test_partition_can_be_generated_on_its_own():
+    batches = list(generate_transaction_batches(ACCOUNT_IDS, days_history=10, seed=5, as_of=date(2025, 3, 1)))
+    alone = generate_partition(ACCOUNT_IDS, date(2025, 2, 25), master_seed=5)
+
+    assert batches[6]["transaction_date"][0].astype("datetime64[D]").item() == date(2025, 2, 25)
+    assert list(alone["id"]) == list(batches[6]["id"])
+    assert list(alone["amount"]) == list(batches[6]["amount"])
+    other_shard = generate_partition(ACCOUNT_IDS, date(2025, 2, 25), master_seed=5, shard=1)
+    assert not set(other_shard["id"]) & set(alone["id"])
+
+
+@mock_aws
+def test_regenerate_partitions_rewrites_identical_objects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+
+    manifest = generate_sharded(
+        ACCOUNT_IDS, 1, lambda: s3, "landing-zone", days_history=4, master_seed=9, as_of=date(2025, 3, 1)
+    )
+    original = {f["key"]: s3.get_object(Bucket="landing-zone", Key=f["key"])["Body"].read() for f in manifest["files"]}
+    target = next(f for f in manifest["files"] if f["partition"] == "2025-02-26")
+    s3.delete_object(Bucket="landing-zone", Key=target["key"])
+
+    entries = regenerate_partitions(manifest, ACCOUNT_IDS, [date(2025, 2, 26)], lambda: s3, "landing-zone")
+
+    assert [e["key"] for e in entries] == [target["key"]]
+    assert entries[0]["seed"] == target["seed"]
+    assert s3.get_object(Bucket="landing-zone", Key=target["key"])["Body"].read() == original[target["key"]]
+
+
+@mock_aws
+def test_rerun_skips_ingested_batches_and_reuses_keys(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+
+    def run(output_format="parquet"):
+        return generate_sharded(
+            ACCOUNT_IDS, 1, lambda: s3, "landing-zone", days_history=3, master_seed=4, as_of=date(2025, 3, 1),
+            output_format=output_format,
+        )
+
+    def landing_keys():
+        listed = s3.list_objects_v2(Bucket="landing-zone", Prefix="transactions/").get("Contents", [])
+        return sorted(item["Key"] for item in listed)
+
+    first = run()
+    keys = landing_keys()
+    assert sorted(f["key"] for f in first["files"]) == keys
+    assert all(re.fullmatch(r"transactions/dt=[\d-]{10}/part-00000-00000-[0-9a-f]{16}\.parquet", key) for key in keys)
+
+    second = run()
+    assert all(f["skipped"] for f in second["files"])
+    assert [f["key"] for f in second["files"]] == [f["key"] for f in first["files"]]
+    assert landing_keys() == keys
+
+    # Os lotes existem so em Parquet: em JSONL sobem de novo, com o mesmo batch_id
+    in_jsonl = run("jsonl")
+    assert not any(f.get("skipped") for f in in_jsonl["files"])
+    assert [f["key"] for f in in_jsonl["files"]] == [f["key"].replace(".parquet", ".jsonl") for f in first["files"]]
+    assert all(f["skipped"] for f in run("jsonl")["files"])
+    keys = landing_keys()
+
+    # Queda antes do catalogo: a reexecucao sobe de novo, mas sobrescreve as mesmas chaves
+    for item in s3.list_objects_v2(Bucket="landing-zone", Prefix="_catalog/")["Contents"]:
+        s3.delete_object(Bucket="landing-zone", Key=item["Key"])
+    third = run()
+    assert not any(f.get("skipped") for f in third["files"])
+    assert [f["content_hash"] for f in third["files"]] == [f["content_hash"] for f in first["files"]]
+    assert landing_keys() == keys
+
+
+def test_respect_balances_never_overdraws_accounts():
+    opening = np.linspace(0, 2000, len(ACCOUNT_IDS))
+    kwargs = dict(days_history=5, seed=3, as_of=date(2025, 3, 1), max_batch_rows=60)
+    free = list(generate_transaction_batches(ACCOUNT_IDS, **kwargs))
+    bound = list(generate_transaction_batches(ACCOUNT_IDS, opening_balances=opening, **kwargs))
+
+    # Mesmos sorteios: so valor e status das saidas mudam
+    for a, b in zip(free, bound):
+        assert list(a["id"]) == list(b["id"]) and list(a["account_id"]) == list(b["account_id"])
+        assert np.all(b["amount"] <= a["amount"])
+    statuses = set(np.concatenate([b["status"] for b in bound]))
+    assert statuses == {"COMPLETED", "DECLINED"}
+
+    balance = dict(zip(ACCOUNT_IDS, np.round(opening * 100).astype(np.int64)))
+    inflow_types = set(TRANSACTION_TYPES[IS_INFLOW_TYPE])
+    for batch in bound:
+        for i in np.lexsort((batch["transaction_date"], batch["account_id"].astype(str))):
+            if batch["status"][i] != "COMPLETED":
+                continue
+            cents = int(round(batch["amount"][i] * 100))
+            balance[batch["account_id"][i]] += cents if batch["transaction_type"][i] in inflow_types else -cents
+            assert balance[batch["account_id"][i]] >= 0
+
+
+@mock_aws
+def test_regenerate_partition_with_balances_replays_previous_days(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    opening = np.full(len(ACCOUNT_IDS), 300.0)
+
+    manifest = generate_sharded(
+        ACCOUNT_IDS, 1, lambda: s3, "landing-zone", days_history=4, master_seed=9, as_of=date(2025, 3, 1),
+        opening_balances=opening,
+    )
+    assert manifest["respect_balances"]
+    target = next(f for f in manifest["files"] if f["partition"] == "2025-02-27")
+    original = s3.get_object(Bucket="landing-zone", Key=target["key"])["Body"].read()
+
+    with pytest.raises(ValueError):
+        regenerate_partitions(manifest, ACCOUNT_IDS, [date(2025, 2, 27)], lambda: s3, "landing-zone")
+    entries = regenerate_partitions(
+        manifest, ACCOUNT_IDS, [date(2025, 2, 27)], lambda: s3, "landing-zone", opening_balances=opening
+    )
+
+    assert [e["key"] for e in entries] == [target["key"]]
+    assert s3.get_object(Bucket="landing-zone", Key=target["key"])["Body"].read() == original
@@ -0,0 +1,274 @@
+﻿import bisect
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime
+
+import boto3
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.models import ACCOUNT_ARROW_SCHEMA
+from src.generators.utils import (
+    METRICS,
+    MetricsRegistry,
+    S3MultipartWriter,
+    UploadManager,
+    append_catalog,
+    build_transfer_config,
+    checkpoint_catalog,
+    discover_keys,
+    get_logger,
+    list_all_objects,
+    list_common_prefixes,
+    list_objects_with_retry,
+    list_partitioned_objects,
+    map_shards,
+    read_catalog,
+    upload_part_with_retry,
+    write_records_atomic,
+)
+
+logger = get_logger(__name__)
+
+
+class FakeMultipartS3:
+    def __init__(self, fail_parts=()):
+        self.fail_parts = set(fail_parts)
+        self.parts = {}
+        self.completed = None
+        self.aborted = False
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber in self.fail_parts:
+            raise ConnectionError("network down")
+        self.parts[PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload["Parts"]
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+
+
+def _chunks():
+    return [f'{{"day": {day}}}\n'.encode("utf-8") * 20 for day in range(10)]
+
+
+class FakeListingS3:
+    """list_objects_v2 em memoria, com paginas de `page_size` entradas (o token e a ultima chave lida)."""
+
+    def __init__(self, keys, page_size=1000):
+        self.keys = sorted(keys)
+        self.page_size = page_size
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None, Delimiter=None):
+        position = bisect.bisect_right(self.keys, ContinuationToken) if ContinuationToken else 0
+        candidates = [key for key in self.keys[position:] if key.startswith(Prefix)]
+        contents, prefixes, last = [], [], None
+        for key in candidates:
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                common = Prefix + rest.split(Delimiter)[0] + Delimiter
+                if prefixes and prefixes[-1]["Prefix"] == common:
+                    last = key
+                    continue
+                if len(contents) + len(prefixes) == self.page_size:
+                    break
+                prefixes.append({"Prefix": common})
+            else:
+                if len(contents) + len(prefixes) == self.page_size:
+                    break
+                contents.append({"Key": key, "Size": 0})
+            last = key
+        response = {"KeyCount": len(contents) + len(prefixes), "Contents": contents, "CommonPrefixes": prefixes}
+        response["IsTruncated"] = bool(candidates) and last != candidates[-1]
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = last
+        return response
+
+
+def test_multipart_writer_streams_parts_in_order():
+    s3 = FakeMultipartS3()
+    with S3MultipartWriter(s3, "bucket", "transactions/t.jsonl", logger, part_size=500, max_in_flight=2) as writer:
+        for chunk in _chunks():
+            writer.write(chunk)
+
+    assert [p["PartNumber"] for p in s3.completed] == sorted(s3.parts)
+    assert b"".join(s3.parts[n] for n in sorted(s3.parts)) == b"".join(_chunks())
+
+
+def test_multipart_writer_sends_failed_part_to_dlq(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(upload_part_with_retry.retry, "sleep", lambda _: None)
+    s3 = FakeMultipartS3(fail_parts={2})
+
+    with pytest.raises(RuntimeError, match="DLQ"):
+        with S3MultipartWriter(s3, "bucket", "transactions/t.jsonl", logger, part_size=500) as writer:
+            for chunk in _chunks():
+                writer.write(chunk)
+
+    assert 2 not in [p["PartNumber"] for p in s3.completed]
+    dlq_files = os.listdir(tmp_path / "data" / "dlq")
+    assert len(dlq_files) == 1 and ".part00002." in dlq_files[0]
+
+
+def test_write_records_atomic_parquet_is_typed(tmp_path):
+    records = [
+        {
+            "id": "a1", "customer_id": "c1", "account_number": "123456", "agency": "0001",
+            "balance": 10.5, "account_type": "CHECKING",
+            "created_at": "2025-01-02T03:04:05.123456", "status": "ACTIVE",
+        }
+    ]
+    path = tmp_path / "accounts" / "accounts_1.parquet"
+    write_records_atomic(records, str(path), "parquet", ACCOUNT_ARROW_SCHEMA)
+
+    table = pq.read_table(path)
+    assert table.schema.equals(ACCOUNT_ARROW_SCHEMA)
+    assert table.column("created_at")[0].as_py().microsecond == 123456
+    assert not os.path.exists(f"{path}.tmp")
+    assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+@mock_aws
+def test_upload_manager_uploads_paths_and_bytes_concurrently(tmp_path):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    local = tmp_path / "big.jsonl"
+    local.write_bytes(b'{"n": 1}\n' * 700_000)
+
+    items = [(str(local), "transactions/big.jsonl")]
+    items += [(f'{{"n": {i}}}\n'.encode(), f"transactions/small-{i}.jsonl") for i in range(20)]
+    manager = UploadManager(s3, "landing-zone", logger, max_workers=4, transfer_config=build_transfer_config(5, 2))
+    report = manager.upload_many(items)
+
+    assert report.files == 21 and not report.failed
+    assert report.bytes == local.stat().st_size + sum(len(body) for body, _ in items[1:])
+    head = s3.head_object(Bucket="landing-zone", Key="transactions/big.jsonl")
+    assert head["ContentLength"] == local.stat().st_size
+    assert head["ETag"].endswith('-2"')
+
+
+def test_metrics_spans_and_counters_export_json_and_prometheus(tmp_path):
+    metrics = MetricsRegistry()
+    for rows in (10, 30):
+        with metrics.span("write", rows=rows) as span:
+            span.bytes = rows * 8
+    with pytest.raises(ValueError):
+        with metrics.span("write"):
+            raise ValueError("disk full")
+    metrics.increment("dashboard_cache", "hit", 2)
+
+    stats = metrics.snapshot()["spans"]["write"]
+    assert (stats["count"], stats["errors"], stats["rows"], stats["bytes"]) == (3, 1, 40, 320)
+
+    json_path = metrics.write(str(tmp_path / "metrics.json"))
+    assert json.load(open(json_path))["counters"] == [{"name": "dashboard_cache", "label": "hit", "value": 2}]
+    prom = open(metrics.write(str(tmp_path / "metrics.prom"))).read()
+    assert 'luisbank_span_rows_total{span="write"} 40' in prom
+    assert 'luisbank_dashboard_cache_total{label="hit"} 2' in prom
+
+
+def test_metrics_write_is_thread_safe_and_throttled(tmp_path):
+    metrics = MetricsRegistry()
+    path = str(tmp_path / "metrics.json")
+    errors = []
+
+    def writer():
+        try:
+            for _ in range(50):
+                metrics.increment("dashboard_cache", "miss")
+                metrics.write(path)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [] and os.listdir(tmp_path) == ["metrics.json"]
+    assert metrics.write(path, min_interval=60) is None
+    assert json.load(open(path))["counters"][0]["value"] == 400
+
+
+def test_retries_are_counted_per_s3_call(monkeypatch):
+    monkeypatch.setattr(upload_part_with_retry.retry, "sleep", lambda _: None)
+    METRICS.reset()
+    with pytest.raises(ConnectionError):
+        upload_part_with_retry(FakeMultipartS3(fail_parts={1}), "bucket", "k", "upload-1", 1, b"x")
+
+    counters = {(c["name"], c["label"]): c["value"] for c in METRICS.snapshot()["counters"]}
+    assert counters[("s3_retries", "upload_part")] == 4
+    assert METRICS.snapshot()["spans"]["s3.upload_part"]["errors"] == 5
+
+
+def _generate_rows(rows):
+    with METRICS.span("generate", rows=rows):
+        return rows
+
+
+def test_map_shards_merges_child_process_metrics():
+    METRICS.reset()
+    assert map_shards(_generate_rows, [5, 7, 9], workers=2) == [5, 7, 9]
+    assert METRICS.snapshot()["spans"]["generate"]["rows"] == 21
+
+
+def test_listing_paginates_and_fans_out_per_partition():
+    keys = sorted(f"transactions/dt=2025-01-0{1 + i % 3}/part-{i:05d}.parquet" for i in range(230))
+    s3 = FakeListingS3(keys + ["customers/customers_1.parquet"], page_size=50)
+
+    assert list_objects_with_retry(s3, "landing-zone", "transactions/")["IsTruncated"]
+    assert [item["Key"] for item in list_all_objects(s3, "landing-zone", "transactions/")] == keys
+    assert list_common_prefixes(s3, "landing-zone", "transactions/") == [
+        f"transactions/dt=2025-01-0{day}/" for day in (1, 2, 3)
+    ]
+    partitioned = list_partitioned_objects(s3, "landing-zone", "transactions/", workers=3)
+    assert [item["Key"] for item in partitioned] == keys
+
+
+def test_catalog_resolves_latest_action_and_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    kept, dropped = "transactions/dt=2025-01-01/part-a.parquet", "transactions/dt=2025-01-01/part-b.parquet"
+    append_catalog(None, None, "transactions", "r1", [
+        {"key": kept, "rows": 10, "bytes": 100, "min_ts": "2025-01-01T00:00:00", "max_ts": "2025-01-01T23:59:00"},
+        {"key": dropped, "rows": 5, "bytes": 50},
+    ], logger)
+    append_catalog(None, None, "transactions", "r2", [{"key": dropped}], logger, action="remove")
+
+    live = read_catalog(None, None, "transactions")
+    assert live.column("key").to_pylist() == [kept]
+    row = live.to_pylist()[0]
+    assert row["partition"] == date(2025, 1, 1) and row["min_ts"] == datetime(2025, 1, 1) and row["rows"] == 10
+
+    checkpoint_catalog(None, None, "transactions", logger)
+    assert len(os.listdir(os.path.join("data", "_catalog", "transactions"))) == 1
+    assert read_catalog(None, None, "transactions").equals(live)
+
+
+@mock_aws
+def test_first_catalog_segment_keeps_objects_written_before_the_catalog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="landing-zone")
+    old, new = "accounts/accounts_1.parquet", "accounts/accounts_2.parquet"
+    s3.put_object(Bucket="landing-zone", Key=old, Body=b"old")
+    s3.put_object(Bucket="landing-zone", Key=new, Body=b"new")
+
+    append_catalog(s3, "landing-zone", "accounts", "2", [{"key": new, "rows": 1, "bytes": 3}], logger)
+    append_catalog(s3, "landing-zone", "accounts", "3", [{"key": new, "rows": 1, "bytes": 3}], logger)
+
+    assert sorted(discover_keys(s3, "landing-zone", "accounts")) == [old, new]
+    assert len(list_all_objects(s3, "landing-zone", "_catalog/accounts/")) == 3
+    assert read_catalog(s3, "landing-zone", "accounts").filter(pc.equal(pc.field("key"), new)).column("rows")[0].as_py() == 1
@@ -0,0 +1,44 @@
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.generators.transaction_generator import generate_partition, iter_partition_batches
+from src.generators.workload import AccountSampler, get_profile
+
+ACCOUNT_IDS = np.array([f"acc-{i:05d}" for i in range(10_000)], dtype=object)
+
+
+def test_retail_profile_seasonality():
+    profile = get_profile("retail", daily_volume=100_000)
+    rng = np.random.default_rng(0)
+    payday = profile.daily_volume(date(2025, 6, 20), rng)  # sexta e dia 20
+    sunday = profile.daily_volume(date(2025, 6, 22), rng)
+    assert payday > 2 * 90_000 and sunday < 0.6 * 110_000
+
+    hours = profile.draw_offsets(rng, 200_000) // 3600
+    assert np.mean(hours == 12) > 10 * np.mean(hours == 3)
+
+
+def test_zipf_sampler_has_stable_hot_accounts():
+    sampler = AccountSampler(len(ACCOUNT_IDS), 1.1, master_seed=1)
+    first = np.bincount(sampler.sample(np.random.default_rng(1), 500_000), minlength=len(ACCOUNT_IDS))
+    second = np.bincount(sampler.sample(np.random.default_rng(2), 500_000), minlength=len(ACCOUNT_IDS))
+
+    top = np.argsort(first)[-100:]
+    assert first[top].sum() / first.sum() > 0.4
+    assert len(set(top) & set(np.argsort(second)[-100:])) > 90
+    assert np.all(AccountSampler(10, 0.0, master_seed=1).sample(np.random.default_rng(0), 1000) < 10)
+
+
+def test_large_days_are_split_into_deterministic_batches():
+    profile = get_profile("retail", daily_volume=25_000)
+    batches = list(iter_partition_batches(ACCOUNT_IDS, date(2025, 6, 5), 3, profile=profile, max_batch_rows=10_000))
+    whole = generate_partition(ACCOUNT_IDS, date(2025, 6, 5), 3, profile=profile, max_batch_rows=10_000)
+
+    assert [len(b["id"]) for b in batches[:-1]] == [10_000] * (len(batches) - 1)
+    assert len(whole["id"]) == sum(len(b["id"]) for b in batches) > 2.5 * 22_500
+    assert list(whole["id"][-5:]) == list(batches[-1]["id"][-5:])